@@ -70,6 +70,30 @@ async def run_migrations():
                 log("MIGRATION: Added 'created_at'.")
             except Exception as e: log(f"Error {e}")
 
+        # 4. news_outlets.avg_scrape_seconds (digest scheduling)
+        has_avg = await conn.run_sync(lambda c: check_column_exists(c, 'news_outlets', 'avg_scrape_seconds'))
+        if not has_avg:
+            try:
+                await conn.execute(text("ALTER TABLE news_outlets ADD COLUMN avg_scrape_seconds FLOAT"))
+                log("MIGRATION: Added 'avg_scrape_seconds'.")
+            except Exception as e: log(f"Error {e}")
+
+        # 5. news_outlets.resolved_url / encoding (redirect + charset memoization)
+        for col in ["resolved_url", "encoding"]:
+            has_col = await conn.run_sync(lambda c: check_column_exists(c, 'news_outlets', col))
+            if not has_col:
+                try:
+                    await conn.execute(text(f"ALTER TABLE news_outlets ADD COLUMN {col} VARCHAR"))
+                    log(f"MIGRATION: Added '{col}'.")
+                except Exception as e: log(f"Error {e}")
+
+        # 6. deep_scan_cache.content_type (non-article verdict from the deep scan)
+        has_ct = await conn.run_sync(lambda c: check_column_exists(c, 'deep_scan_cache', 'content_type'))
+        if not has_ct:
+            try:
+                await conn.execute(text("ALTER TABLE deep_scan_cache ADD COLUMN content_type VARCHAR"))
+                log("MIGRATION: Added 'content_type'.")
+            except Exception as e: log(f"Error {e}")
 
 
     log("MIGRATION: Schema check complete.")
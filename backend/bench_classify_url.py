@@ -0,0 +1,239 @@
+"""
+Microbenchmark + parity check for the compiled URL classifier.
+
+classify_url / classify_urls (tables compiled once at import) against the old
+implementation, kept below as legacy_classify_url (sets rebuilt per call,
+substring loop, uncompiled regexes), on:
+  - URLs harvested from spam_urls.json, the spam reports and the link test scripts
+  - links of the bench_parse corpus pages (page cache, or synthetic pages)
+
+Parity: (keep, is_spam) must match everywhere. The reason may differ only
+where several blocked substrings match (the old loop reported whichever the
+set yielded first) or where the old substring domain test matched across a
+label boundary (mygoogle.com).
+
+Usage: python bench_classify_url.py [corpus_dir]
+"""
+import os
+import re
+import sys
+import time
+from urllib.parse import urlparse, urljoin
+
+os.environ.setdefault("DEBUG_LOG", "0") # time the classifier, not the log queue
+
+import scraper_engine
+from scraper_engine import classify_url, classify_urls, ParsedDocument
+from bench_parse import load_corpus
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+URL_SOURCES = ["spam_urls.json", "spam_report.txt", "spam_report_hybrid.txt", "spam_report_v2.txt",
+               "spam_report_v3.txt", "spam_report_v4.txt", "test_bad_links.py", "test_filtering.py", "debug_filter.py"]
+
+
+def legacy_classify_url(url: str) -> tuple:
+    """
+    Analyzes a URL and returns (keep: bool, is_spam: bool, reason: str).
+    """
+    if not url: return False, False, "Empty URL"
+    
+    url_lower = url.lower()
+    
+    # 0. Protocol Check (Hard Block)
+    if not (url_lower.startswith('http://') or url_lower.startswith('https://')):
+        return False, False, "Invalid Protocol"
+
+    # 1. Hard Block: Extensions (Technical)
+    IGNORED_EXTENSIONS = (
+        '.css', '.js', '.json', '.xml', '.rss', '.atom', 
+        '.jpg', '.jpeg', '.png', '.gif', '.webp', '.svg', '.ico',
+        '.mp4', '.mp3', '.wav', '.avi', '.mov', 
+        '.pdf', '.doc', '.docx', '.xls', '.xlsx', '.zip', '.tar', '.gz'
+    )
+    if url_lower.endswith(IGNORED_EXTENSIONS):
+        return False, False, "Ignored Extension"
+
+    # Universal Spam Filter Rules (V4 - Content Verified)
+    # 1. Substrings: Safe to block if anywhere in path
+    BLOCKED_SUBSTRINGS = {
+        "login", "signin", "signup", "register", "password", 
+        "subscribe", "subscription", "unsubscribe",
+        "terms-of-service", "privacy-policy", "cookie-policy",
+        "newsletter", "rss-feed", "sitemap", 
+        "advertorial", "mediakit",
+        "/tag/", "/category/", "/topic/", "/author/", "/section/", 
+        "/szero/", # Specific taxonomies
+        "odr/main", # EU Dispute
+        "epaper", "paperindex", "html5/reader", "onelink.me",
+        "/feed/", "/rss", "/search", "/cart/", "/basket/"
+    }
+
+    # 2. Segments: Only block if FULL path segment
+    BLOCKED_SEGMENTS = {
+        "admin", "dashboard", "profile", "user", "account", "billing", "my",
+        "donate", "donation", "giving", "pay", "payment", "checkout", "cart", "shop",
+        "careers", "jobs", "employment", "vacancy", "work-with-us",
+        "terms", "privacy", "legal", "gdpr", "tos", "policy", "rules", "disclaimer", "copyright",
+        "contact", "contact-us", "about", "about-us", "info", "help", "faq", "support", "feedback",
+        "search", "find", "archive", "weather", "horoscope", "traffic",
+        "gallery", "photos", "video", "videos", "live", "watch", "listen", "podcast", "shows",
+        "servicii", "codul", "redactia", "echipa", "publicitate", "abonamente",
+        "mobile", "scroll", "newmedia", "special", "specials" # Added specials back as it's often junk
+    }
+
+    # High-Risk Domains (Hard Block)
+    BLOCKED_DOMAINS = {
+        "accuweather.com", "weather.com", "airtable.com", "intuit.com", 
+        "oraclecloud.com", "pagesuite-professional.co.uk", "eepurl.com",
+        "facebook.com", "twitter.com", "instagram.com", "linkedin.com",
+        "youtube.com", "google.com", "bing.com", "foxlocal.onelink.me",
+        "help.startribune.com", "corp.sina.com.cn", "games.sina.com.cn",
+        "hugedomains.com", "issuu.com", "ec.europa.eu", "paydemic.com", "wordpress.org"
+    }
+    
+    parsed = urlparse(url)
+    domain_part = parsed.netloc.replace("www.", "").lower()
+    path = parsed.path.lower()
+
+    # A. Domain Check (Spam)
+    if any(d in domain_part for d in BLOCKED_DOMAINS):
+        return True, True, "Domain Block" # Keep as Spam
+        
+    # B. Substring Check (Spam)
+    for kw in BLOCKED_SUBSTRINGS:
+        if kw in path:
+            return True, True, f"Keyword Block: {kw}"
+
+    # C. Segment Check (Spam)
+    segments = [s for s in path.strip("/").split("/") if s]
+    for seg in segments:
+         if seg in BLOCKED_SEGMENTS:
+             return True, True, f"Segment Block: {seg}"
+
+    # 3. Explicit Pagination Check (Spam)
+    if re.search(r'/(page|p)/\d+', url_lower) or re.search(r'/\d+\.html$', url_lower):
+        match = re.search(r'/(\d+)\.html$', url_lower)
+        if match:
+             num = int(match.group(1))
+             if num < 50: 
+                 return True, True, "Pagination ID"
+        else:
+             if '/page/' in url_lower: 
+                 return True, True, "Pagination Pattern"
+            
+    # 4. Path Analysis (Structural) - Homepage is a Hard Block
+    path_strip = path.strip("/")
+    if not path_strip: 
+        return False, False, "Homepage" # Hard Block Homepage (redundant duplicate)
+
+    last_seg = segments[-1] if segments else ""
+    
+    # 5. Pagination Blocking (Spam)
+    if re.match(r'^\d+$', last_seg):
+        if len(last_seg) < 4: 
+             return True, True, "Short Digit (Pagination)"
+
+    # 6. Single Segment Category Heuristic (Spam)
+    if len(segments) == 1:
+        slug = segments[0]
+        has_digits = any(c.isdigit() for c in slug)
+        hyphen_count = slug.count("-")
+        
+        if len(slug) < 20 and not has_digits and hyphen_count < 2:
+             return True, True, "Short Path (Category Heuristic)"
+        
+        if slug in ["opinion", "editorials"]:
+             return True, True, "Opinion/Editorial"
+
+    # 7. Query Param Check (Spam)
+    if parsed.query:
+        q = parsed.query.lower()
+        if any(p in q for p in ['cat_id=', 'tag=', 'sort=', 'filter=', 'page=']):
+             return True, True, "Query Params"
+            
+    return True, False, "Result: Valid"
+
+
+def harvest_urls():
+    urls = set()
+    for name in URL_SOURCES:
+        path = os.path.join(BASE_DIR, name)
+        if os.path.exists(path):
+            with open(path, encoding="utf-8", errors="replace") as f:
+                urls |= set(re.findall(r'https?://[^\s"\'<>\)\],]+', f.read()))
+    return sorted(urls)
+
+
+def page_batches(corpus_dir=None):
+    batches = []
+    for _, url, html in load_corpus(corpus_dir):
+        doc = ParsedDocument(html, url)
+        batches.append([urljoin(url, href) for href, _ in doc.links if href])
+    return batches
+
+
+def explained(url, old, new):
+    """Known, intended reason differences (see module docstring)."""
+    if old[:2] != new[:2]:
+        return False
+    if old[2].startswith("Keyword Block") and new[2].startswith("Keyword Block"):
+        return new[2].split(": ", 1)[1] in urlparse(url).path.lower()
+    return False
+
+
+def bench(fn, batches, repeat):
+    t0 = time.perf_counter()
+    n = 0
+    for _ in range(repeat):
+        for batch in batches:
+            fn(batch)
+            n += len(batch)
+    return (time.perf_counter() - t0) / n * 1e6
+
+
+if __name__ == "__main__":
+    harvested = harvest_urls()
+    batches = page_batches(sys.argv[1] if len(sys.argv) > 1 else None)
+    all_urls = harvested + [u for b in batches for u in b]
+    extra = ["https://mygoogle.com/stiri/2026/un-articol", "https://news.google.com.ro/x", "ftp://x.ro/a", "https://x.ro/page/2",
+             "https://x.ro/stiri/12.html", "https://x.ro/stiri/123.html", "https://x.ro/7", "https://x.ro/politica", "https://x.ro/a?page=2"]
+    all_urls += extra
+
+    mismatches, explained_diffs = [], 0
+    for url in all_urls:
+        old, new = legacy_classify_url(url), classify_url(url)
+        if old == new:
+            continue
+        if explained(url, old, new):
+            explained_diffs += 1
+        else:
+            mismatches.append((url, old, new))
+    # The one intended verdict change: label-aligned domain matching
+    intended = [m for m in mismatches if m[0] == "https://mygoogle.com/stiri/2026/un-articol"]
+    mismatches = [m for m in mismatches if m not in intended]
+    for url, old, new in mismatches[:20]:
+        print(f"MISMATCH {url}\n  old: {old}\n  new: {new}")
+    print(f"parity: {len(all_urls)} URLs, {len(mismatches)} mismatches, {explained_diffs} keyword-reason differences, "
+          f"{len(intended)} label-boundary domain fix")
+
+    batches = [harvested] + batches
+    total = sum(len(b) for b in batches)
+    repeat = max(1, 200000 // max(1, total))
+    def cold(fn):
+        # Empty verdict cache before every page: only repeats within the page can hit
+        def run(batch):
+            scraper_engine._classify.cache_clear()
+            return fn(batch)
+        return run
+
+    legacy_us = bench(lambda b: [legacy_classify_url(u) for u in b], batches, repeat)
+    results = [
+        ("compiled, cold cache", bench(cold(lambda b: [classify_url(u) for u in b]), batches, repeat)),
+        ("classify_urls, cold cache", bench(cold(classify_urls), batches, repeat)),
+        ("compiled, warm cache", bench(lambda b: [classify_url(u) for u in b], batches, repeat)),
+    ]
+    print(f"{len(batches)} batches, {total} URLs x{repeat}")
+    print(f"{'legacy classify_url':<28}{legacy_us:>8.2f} us/URL")
+    for label, us in results:
+        print(f"{label:<28}{us:>8.2f} us/URL ({legacy_us / us:.1f}x)")
+    raise SystemExit(1 if mismatches else 0)
@@ -0,0 +1,61 @@
+"""
+Benchmark: old parse_romanian_date vs date_parser (cold cache and warm cache).
+
+Input mimics a digest run: every page offers the same handful of candidate
+strings per outlet (meta, JSON-LD, <time>, selector text), so most values repeat.
+
+Usage: python bench_date_parser.py [pages]
+"""
+import sys
+import time
+import random
+
+import date_parser
+from test_date_parser import CASES, harvested_strings, legacy_parse_romanian_date
+
+
+def workload(pages):
+    rnd = random.Random(7)
+    dated = [t for t, e in CASES if e]
+    titles, _ = harvested_strings()
+    per_outlet = [rnd.sample(dated, 4) + rnd.sample(titles, 4) for _ in range(40)] # 40 outlets
+    return [s for i in range(pages) for s in per_outlet[i % len(per_outlet)]]
+
+
+def bench(fn, items):
+    t0 = time.perf_counter()
+    for s in items:
+        fn(s)
+    return (time.perf_counter() - t0) / len(items)
+
+
+def main():
+    pages = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    items = workload(pages)
+
+    legacy = bench(legacy_parse_romanian_date, items)
+    date_parser._parse_cached.cache_clear()
+    uncached = bench(lambda s: date_parser._parse(date_parser._normalize(s), None), items)
+    date_parser._parse_cached.cache_clear()
+    cold = bench(date_parser.parse_date, items)  # first pass fills the cache
+    warm = bench(date_parser.parse_date, items)
+    t0 = time.perf_counter()
+    date_parser.parse_dates(items)
+    batch = (time.perf_counter() - t0) / len(items)
+
+    print(f"Workload: {len(items)} candidate strings ({len(set(items))} distinct), {pages} pages")
+    print(f"{'Parser':<32} | {'us/string':>9} | {'strings/sec':>11}")
+    print("-" * 58)
+    for label, per in (
+        ("legacy parse_romanian_date", legacy),
+        ("date_parser, no cache", uncached),
+        ("date_parser.parse_date (cold)", cold),
+        ("date_parser.parse_date (warm)", warm),
+        ("date_parser.parse_dates (batch)", batch),
+    ):
+        print(f"{label:<32} | {per * 1e6:>9.2f} | {1 / per:>11.0f}")
+    print(f"Cache: {date_parser.cache_info()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""
+Cost per debug record on the caller's thread: the old open/append/close per
+line vs. debug_log.dlog (queued, written by a background thread), at the
+default INFO level (per-URL DEBUG records filtered out), at DEBUG, and with
+DEBUG_LOG=0. Then checks the file side: JSON lines, run_id carried into
+parse-pool workers, rotation.
+
+Usage: python bench_debug_log.py
+"""
+import os
+import json
+import time
+import asyncio
+import logging
+import tempfile
+
+os.chdir(tempfile.mkdtemp())
+os.environ.setdefault("DEBUG_LOG_MAX_BYTES", str(256 * 1024)) # small, to see rotation
+os.environ.setdefault("DEBUG_LOG_QUEUE_SIZE", "100000") # measure the caller's cost, not drops
+os.environ["PARSE_WORKERS"] = "1"
+
+import debug_log
+from debug_log import dlog
+
+N = 20000
+URL = "https://ziar.example.ro/stiri/2026/10/01/un-titlu-de-articol-oarecare"
+
+
+def old_style(n):
+    for _ in range(n):
+        with open("old_stream_debug.log", "a") as f: f.write(f"SPAM_SEGMENT [video]: {URL}\n")
+
+
+def new_style(n, level):
+    for _ in range(n):
+        dlog("SPAM_SEGMENT", url=URL, segment="video", level=level)
+
+
+def per_call_us(fn, *args):
+    t0 = time.perf_counter()
+    fn(N, *args)
+    return (time.perf_counter() - t0) / N * 1e6
+
+
+async def check_worker_run_id():
+    from services import parse_pool
+    run_id = debug_log.start_run("bench")
+    html = f'<html><body><a href="{URL}">Un titlu de articol oarecare</a><a href="/video/x">Video</a></body></html>'
+    await parse_pool.parse_listing(html, "https://ziar.example.ro/")
+    await asyncio.sleep(0.5) # let the worker's queue feeder thread flush before shutdown
+    parse_pool.stop_parse_pool()
+    return run_id
+
+
+if __name__ == "__main__":
+    print(f"{'mode':<40}{'us/record':>10}")
+    print(f"{'open/append/close (old)':<40}{per_call_us(old_style):>10.2f}")
+    debug_log._threshold = logging.INFO
+    print(f"{'dlog DEBUG record, level INFO':<40}{per_call_us(new_style, logging.DEBUG):>10.2f}")
+    print(f"{'dlog INFO record, level INFO':<40}{per_call_us(new_style, logging.INFO):>10.2f}")
+    debug_log._threshold = logging.CRITICAL + 1
+    print(f"{'dlog, DEBUG_LOG=0':<40}{per_call_us(new_style, logging.INFO):>10.2f}")
+    debug_log._threshold = logging.DEBUG
+
+    run_id = asyncio.run(check_worker_run_id())
+    debug_log.stop_debug_log() # flush
+    stats = debug_log.get_debug_log_stats()
+
+    files = sorted(f for f in os.listdir(".") if f.startswith(debug_log.DEBUG_LOG_FILE))
+    records = []
+    for name in files:
+        with open(name, encoding="utf-8") as f:
+            records += [json.loads(line) for line in f]
+    worker = [r for r in records if r.get("run_id") == run_id and r["pid"] != os.getpid()]
+    print(f"files: {files}")
+    print(f"records: {len(records)} written, {stats['dropped']} dropped (queue full), {len(worker)} from the worker with run_id {run_id}")
+    ok = len(files) > 1 and bool(worker) and all(os.path.getsize(f) <= debug_log.DEBUG_LOG_MAX_BYTES + 4096 for f in files)
+    print("OK" if ok else "FAIL")
+    raise SystemExit(0 if ok else 1)
@@ -0,0 +1,125 @@
+"""
+Benchmark: TCP/TLS handshakes per digest, per-page clients vs the shared pool.
+
+Spins up local keep-alive HTTP servers (one per fake outlet) and replays the
+fetch pattern of one digest run: homepage + category page + N deep scans per
+outlet, 5 outlets at a time (generate_digest_stream) and up to 5 concurrent
+deep scans per outlet (smart_scrape_outlet).
+
+Usage: python bench_http_pool.py [outlets] [articles_per_outlet]
+"""
+import sys
+import time
+import asyncio
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+import httpx
+from services.http_client import build_client, ROBUST_HEADERS
+
+PAGE = b"<html><head><title>t</title></head><body>" + b"<p>lorem ipsum</p>" * 200 + b"</body></html>"
+
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1" # keep-alive
+
+    def do_GET(self):
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(PAGE)))
+        self.end_headers()
+        self.wfile.write(PAGE)
+
+    def log_message(self, *args):
+        pass
+
+
+def start_servers(n):
+    servers = []
+    for _ in range(n):
+        srv = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        threading.Thread(target=srv.serve_forever, daemon=True).start()
+        servers.append(srv)
+    return servers
+
+
+class Counter:
+    def __init__(self):
+        self.connects = 0
+
+    async def trace(self, name, info):
+        if name == "connection.connect_tcp.complete":
+            self.connects += 1
+
+    async def hook(self, request):
+        request.extensions["trace"] = self.trace
+
+
+async def run_digest(base_urls, articles, client_factory):
+    """client_factory() returns (client, owned) - owned clients are closed after one page."""
+
+    async def fetch(url):
+        client, owned = client_factory()
+        try:
+            await client.get(url)
+        finally:
+            if owned:
+                await client.aclose()
+
+    outlet_sem = asyncio.Semaphore(5)
+
+    async def outlet(base):
+        async with outlet_sem:
+            await scrape(base)
+
+    async def scrape(base):
+        await fetch(base + "/")
+        await fetch(base + "/politics/")
+        sem = asyncio.Semaphore(5)
+
+        async def scan(i):
+            async with sem:
+                await fetch(f"{base}/news/{i}-article-slug")
+
+        await asyncio.gather(*[scan(i) for i in range(articles)])
+
+    await asyncio.gather(*[outlet(b) for b in base_urls])
+
+
+async def main():
+    n_outlets = int(sys.argv[1]) if len(sys.argv) > 1 else 30
+    n_articles = int(sys.argv[2]) if len(sys.argv) > 2 else 40
+    servers = start_servers(n_outlets)
+    base_urls = [f"http://127.0.0.1:{s.server_address[1]}" for s in servers]
+    pages = n_outlets * (2 + n_articles)
+
+    # BEFORE: new AsyncClient per page (legacy behaviour)
+    before = Counter()
+    t0 = time.time()
+    await run_digest(
+        base_urls, n_articles,
+        lambda: (httpx.AsyncClient(headers=ROBUST_HEADERS, follow_redirects=True, event_hooks={"request": [before.hook]}), True),
+    )
+    t_before = time.time() - t0
+
+    # AFTER: one pooled client for the whole digest
+    after = Counter()
+    shared = build_client(event_hooks={"request": [after.hook]})
+    t0 = time.time()
+    await run_digest(base_urls, n_articles, lambda: (shared, False))
+    t_after = time.time() - t0
+    await shared.aclose()
+
+    print(f"Digest: {n_outlets} outlets x {2 + n_articles} pages = {pages} requests")
+    print(f"{'Mode':<20} | {'Handshakes':>10} | {'Per page':>8} | {'Wall (s)':>8}")
+    print("-" * 56)
+    print(f"{'per-page clients':<20} | {before.connects:>10} | {before.connects / pages:>8.2f} | {t_before:>8.2f}")
+    print(f"{'shared pool':<20} | {after.connects:>10} | {after.connects / pages:>8.2f} | {t_after:>8.2f}")
+    print("(Each handshake is one TCP connect; over HTTPS add one TLS handshake per connect.)")
+
+    for s in servers:
+        s.shutdown()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
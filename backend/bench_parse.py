@@ -0,0 +1,136 @@
+"""
+Benchmark: parse time per page, one parse per extractor vs a shared ParsedDocument,
+and pages/sec for every installed SCRAPER_PARSER backend, and the deep-scan
+date + title extraction with and without the head pre-scan fast path.
+
+The "separate" mode is how a page used to be handled: date, title, links, content
+type and visible text each re-parsed the same HTML (html.parser). The "shared"
+mode builds one scraper_engine.ParsedDocument and hands it to every extractor.
+
+Corpus (first that exists):
+  1. a directory of *.html files given as argv[1]
+  2. the page cache bodies under DATA_DIR/cache/pages
+  3. synthetic article/category pages
+
+Usage: python bench_parse.py [corpus_dir] [repeat]
+"""
+import os
+import io
+import sys
+import glob
+import gzip
+import json
+import time
+import tempfile
+import contextlib
+
+import scraper_engine
+from scraper_engine import ParsedDocument, PARSER_BACKENDS, resolve_parser_backend
+from services.page_cache import PAGE_CACHE_DIR
+
+
+def load_corpus(path=None):
+    pages = []
+    if path and os.path.isdir(path):
+        for fp in sorted(glob.glob(os.path.join(path, "*.html"))):
+            with open(fp, "r", encoding="utf-8", errors="replace") as f:
+                pages.append(("file", fp, f.read()))
+    if not pages and os.path.isdir(PAGE_CACHE_DIR):
+        for fp in glob.glob(os.path.join(PAGE_CACHE_DIR, "*", "*.json.gz")):
+            try:
+                with gzip.open(fp, "rt", encoding="utf-8") as f:
+                    entry = json.load(f)
+                pages.append(("cache", entry.get("final_url") or entry["url"], entry.get("body", "")))
+            except Exception:
+                continue
+    if not pages:
+        pages = synthetic_pages()
+    return pages
+
+
+def synthetic_pages(n=20):
+    pages = []
+    for i in range(n):
+        nav = "".join(f'<li><a href="/stiri/sectiune-{k}/">Sectiune {k}</a></li>' for k in range(60))
+        teasers = "".join(
+            f'<article><a href="/stiri/2026/10/{k:02d}/titlu-articol-numarul-{k}-{i}">Titlu articol numarul {k} despre consiliul local</a></article>'
+            for k in range(1, 90)
+        )
+        paras = "".join(f"<p>{'Consiliul Local a votat astazi proiectul de buget pentru anul viitor. ' * 4}</p>" for _ in range(25))
+        html = f"""<html><head><title>Articol {i} - Ziarul Local</title>
+<meta property="og:title" content="Articol de test {i}">
+<meta property="article:published_time" content="2026-10-{(i % 28) + 1:02d}T10:00:00+03:00">
+<script type="application/ld+json">{{"@type": "NewsArticle", "datePublished": "2026-10-{(i % 28) + 1:02d}T10:00:00"}}</script>
+</head><body><header><nav><ul>{nav}</ul></nav></header>
+<main><h1>Articol de test numarul {i}</h1>{paras}<aside>{teasers}</aside></main></body></html>"""
+        pages.append(("synthetic", f"https://ziar.example.ro/stiri/2026/10/articol-{i}", html))
+    return pages
+
+
+def run_separate(url, html):
+    scraper_engine.extract_date_from_html(ParsedDocument(html, url, backend="html.parser"), url)
+    scraper_engine.extract_title_from_html(ParsedDocument(html, url, backend="html.parser"), url)
+    scraper_engine.extract_article_links(ParsedDocument(html, url, backend="html.parser"), url)
+    scraper_engine.detect_content_type(ParsedDocument(html, url, backend="html.parser"))
+    ParsedDocument(html, backend="html.parser").get_text(" ") # smart_scrape_outlet's own get_text parse
+
+
+def run_shared(url, html, backend="html.parser"):
+    doc = ParsedDocument(html, url, backend=backend)
+    scraper_engine.extract_date_from_html(doc, url)
+    scraper_engine.extract_title_from_html(doc, url)
+    scraper_engine.extract_article_links(doc, url)
+    scraper_engine.detect_content_type(doc)
+    doc.get_text(" ")
+
+
+def run_article(url, html):
+    doc = ParsedDocument(html, url)
+    scraper_engine.extract_date_from_html(doc, url)
+    scraper_engine.extract_title_from_html(doc, url)
+
+
+def bench(pages, fn, repeat):
+    t0 = time.perf_counter()
+    for _ in range(repeat):
+        for _, url, html in pages:
+            fn(url, html)
+    return (time.perf_counter() - t0) / (repeat * len(pages))
+
+
+def main():
+    corpus_dir = sys.argv[1] if len(sys.argv) > 1 else None
+    repeat = int(sys.argv[2]) if len(sys.argv) > 2 else 3
+    pages = load_corpus(corpus_dir)
+
+    backends = [b for b in PARSER_BACKENDS if resolve_parser_backend(b) == b]
+
+    # Extractors print debug lines and append to stream_debug.log; keep both out of the way
+    os.chdir(tempfile.mkdtemp())
+    rows = []
+    with contextlib.redirect_stdout(io.StringIO()):
+        rows.append(("html.parser, separate parses", bench(pages, run_separate, repeat)))
+        for backend in backends:
+            rows.append((f"{backend}, shared document", bench(pages, lambda u, h: run_shared(u, h, backend), repeat)))
+        prescan = scraper_engine.PRESCAN_ENABLED
+        scraper_engine.PRESCAN_ENABLED = False
+        article_dom = bench(pages, run_article, repeat)
+        scraper_engine.PRESCAN_ENABLED = True
+        article_fast = bench(pages, run_article, repeat)
+        scraper_engine.PRESCAN_ENABLED = prescan
+
+    total_kb = sum(len(h) for _, _, h in pages) / 1024
+    print(f"Corpus: {len(pages)} pages ({pages[0][0]}), avg {total_kb / len(pages):.0f} KB/page, x{repeat}")
+    print("Full extraction per page: date + title + links + content type + text")
+    print(f"{'Mode':<34} | {'ms/page':>8} | {'pages/sec':>9}")
+    print("-" * 58)
+    for label, per_page in rows:
+        print(f"{label:<34} | {per_page * 1000:>8.1f} | {1 / per_page:>9.1f}")
+    print()
+    print(f"Deep scan (date + title, {scraper_engine.PARSER_BACKEND})")
+    print(f"{'DOM cascade':<34} | {article_dom * 1000:>8.1f} | {1 / article_dom:>9.1f}")
+    print(f"{'head pre-scan fast path':<34} | {article_fast * 1000:>8.1f} | {1 / article_fast:>9.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""
+Benchmark: event-loop responsiveness while pages are parsed inline vs in the parse pool.
+
+A ticker task wakes up every 10ms and records how late it was. Inline parsing
+blocks it for the whole parse of each page; with the pool the loop keeps ticking
+(that's what every other digest stream and /digests/public sees).
+
+Corpus: same as bench_parse.py (directory of *.html, page cache, or synthetic).
+
+Usage: python bench_parse_pool.py [corpus_dir] [repeat]
+"""
+import os
+import io
+import sys
+import time
+import asyncio
+import tempfile
+import contextlib
+
+from bench_parse import load_corpus
+from services import parse_pool
+
+
+async def ticker(lags, stop):
+    interval = 0.01
+    while not stop.is_set():
+        t0 = time.perf_counter()
+        await asyncio.sleep(interval)
+        lags.append(time.perf_counter() - t0 - interval)
+
+
+async def run(pages, repeat, inline):
+    lags, stop = [], asyncio.Event()
+    tick = asyncio.create_task(ticker(lags, stop))
+    await asyncio.sleep(0.05)
+
+    t0 = time.perf_counter()
+    jobs = [(url, html) for _ in range(repeat) for _, url, html in pages]
+    if inline:
+        for url, html in jobs:
+            parse_pool._parse_listing(html, url)
+            await asyncio.sleep(0) # what the handlers did: parse, then yield
+    else:
+        await asyncio.gather(*(parse_pool.parse_listing(html, url) for url, html in jobs))
+    elapsed = time.perf_counter() - t0
+
+    stop.set()
+    await tick
+    lags.sort()
+    p99 = lags[min(len(lags) - 1, int(len(lags) * 0.99))] if lags else 0.0
+    return len(jobs) / elapsed, p99, max(lags, default=0.0)
+
+
+async def main():
+    corpus_dir = sys.argv[1] if len(sys.argv) > 1 else None
+    repeat = int(sys.argv[2]) if len(sys.argv) > 2 else 3
+    pages = load_corpus(corpus_dir)
+
+    os.chdir(tempfile.mkdtemp()) # extractors append to stream_debug.log
+    parse_pool.start_parse_pool()
+    with contextlib.redirect_stdout(io.StringIO()):
+        await parse_pool.parse_listing("<html></html>", "https://warmup.example/") # wait for workers to import
+        inline = await run(pages, repeat, inline=True)
+        pooled = await run(pages, repeat, inline=False)
+    parse_pool.stop_parse_pool()
+
+    print(f"Corpus: {len(pages)} pages ({pages[0][0]}), x{repeat}, {parse_pool.PARSE_WORKERS} workers")
+    print(f"{'Mode':<10} | {'pages/sec':>9} | {'loop lag p99':>12} | {'loop lag max':>12}")
+    print("-" * 52)
+    for label, (rate, p99, worst) in (("inline", inline), ("pool", pooled)):
+        print(f"{label:<10} | {rate:>9.1f} | {p99 * 1000:>10.1f}ms | {worst * 1000:>10.1f}ms")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
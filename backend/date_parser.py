@@ -0,0 +1,336 @@
+"""
+Multilingual publication-date parser used by scraper_engine.
+
+Replaces the per-call month dictionary and uncompiled regexes of the old
+parse_romanian_date. Everything is built once at import:
+  - month tables for the languages of the countries we discover outlets in
+    (matched accent-insensitively, nominative + genitive + common abbreviations)
+  - precompiled numeric / textual / CJK patterns
+and results are memoized on the normalized input string, since the same
+meta/JSON-LD value shows up on every article of an outlet.
+Relative dates ("ieri, 18:20", "acum 3 ore", "2 часа назад") are only
+recognized as the whole string; their offset is memoized, the date is
+resolved against now on every call.
+
+parse_date(text, lang=None, now=None)   -> datetime | None
+parse_dates(texts, lang=None, now=None) -> [datetime | None]   (batch, duplicates parsed once)
+first_date(texts, lang=None, now=None)  -> first parsable value | None
+lang_for_domain("ziar.hr")    -> "hr"  (hint for the few month names that differ by language)
+"""
+import os
+import re
+import unicodedata
+from datetime import datetime, timedelta
+from functools import lru_cache
+from typing import Dict, Iterable, List, Optional
+
+DATE_CACHE_SIZE = int(os.getenv("DATE_PARSER_CACHE_SIZE", "8192"))
+MAX_CACHED_LEN = 256 # long inputs (element text) are parsed but not memoized
+
+# Month names per language, 1-based. Genitive/declined forms and abbreviations included.
+# Order matters: where two languages use the same word for different months
+# (hr "listopad" = October, cs/pl "listopad" = November) the earlier language wins
+# unless a lang hint is given.
+LANGUAGE_MONTHS: Dict[str, List[List[str]]] = {
+    "ro": [
+        ["ianuarie", "ian"], ["februarie", "feb"], ["martie", "mar"], ["aprilie", "apr"],
+        ["mai"], ["iunie", "iun"], ["iulie", "iul"], ["august", "aug"],
+        ["septembrie", "sep", "sept"], ["octombrie", "oct"], ["noiembrie", "noi", "nov"], ["decembrie", "dec"],
+    ],
+    "ru": [
+        ["январь", "января", "янв"], ["февраль", "февраля", "фев"], ["март", "марта", "мар"],
+        ["апрель", "апреля", "апр"], ["май", "мая"], ["июнь", "июня", "июн"],
+        ["июль", "июля", "июл"], ["август", "августа", "авг"], ["сентябрь", "сентября", "сен", "сент"],
+        ["октябрь", "октября", "окт"], ["ноябрь", "ноября", "ноя"], ["декабрь", "декабря", "дек"],
+    ],
+    "en": [
+        ["january", "jan"], ["february", "feb"], ["march", "mar"], ["april", "apr"],
+        ["may"], ["june", "jun"], ["july", "jul"], ["august", "aug"],
+        ["september", "sep", "sept"], ["october", "oct"], ["november", "nov"], ["december", "dec"],
+    ],
+    "uk": [
+        ["січень", "січня", "січ"], ["лютий", "лютого", "лют"], ["березень", "березня", "бер"],
+        ["квітень", "квітня", "квіт"], ["травень", "травня", "трав"], ["червень", "червня", "черв"],
+        ["липень", "липня", "лип"], ["серпень", "серпня", "серп"], ["вересень", "вересня", "вер"],
+        ["жовтень", "жовтня", "жовт"], ["листопад", "листопада", "лист"], ["грудень", "грудня", "груд"],
+    ],
+    "bg": [
+        ["януари"], ["февруари"], ["март"], ["април"], ["май"], ["юни"],
+        ["юли"], ["август"], ["септември"], ["октомври"], ["ноември"], ["декември"],
+    ],
+    "sr": [
+        ["јануар", "januar"], ["фебруар", "februar"], ["март", "mart"], ["април", "april"],
+        ["мај", "maj"], ["јун", "jun"], ["јул", "jul"], ["август", "avgust"],
+        ["септембар", "septembar"], ["октобар", "oktobar"], ["новембар", "novembar"], ["децембар", "decembar"],
+    ],
+    "pl": [
+        ["styczeń", "stycznia", "sty"], ["luty", "lutego", "lut"], ["marzec", "marca"],
+        ["kwiecień", "kwietnia", "kwi"], ["maj", "maja"], ["czerwiec", "czerwca", "cze"],
+        ["lipiec", "lipca"], ["sierpień", "sierpnia", "sie"], ["wrzesień", "września", "wrz"],
+        ["październik", "października", "paź"], ["listopad", "listopada"], ["grudzień", "grudnia", "gru"],
+    ],
+    "cs": [
+        ["leden", "ledna"], ["únor", "února"], ["březen", "března"], ["duben", "dubna"],
+        ["květen", "května"], ["červen", "června"], ["červenec", "července"], ["srpen", "srpna"],
+        ["září"], ["říjen", "října"], ["listopad", "listopadu"], ["prosinec", "prosince"],
+    ],
+    "sk": [
+        ["január", "januára"], ["február", "februára"], ["marec", "marca"], ["apríl", "apríla"],
+        ["máj", "mája"], ["jún", "júna"], ["júl", "júla"], ["august", "augusta"],
+        ["september", "septembra"], ["október", "októbra"], ["november", "novembra"], ["december", "decembra"],
+    ],
+    "hu": [
+        ["január", "jan"], ["február", "febr"], ["március", "márc"], ["április", "ápr"],
+        ["május", "máj"], ["június", "jún"], ["július", "júl"], ["augusztus", "aug"],
+        ["szeptember", "szept"], ["október", "okt"], ["november", "nov"], ["december", "dec"],
+    ],
+    "de": [
+        ["januar", "jänner", "jan"], ["februar", "feb"], ["märz", "mär", "mrz"], ["april", "apr"],
+        ["mai"], ["juni", "jun"], ["juli", "jul"], ["august", "aug"],
+        ["september", "sep", "sept"], ["oktober", "okt"], ["november", "nov"], ["dezember", "dez"],
+    ],
+    "fr": [
+        ["janvier", "janv"], ["février", "févr", "fév"], ["mars"], ["avril", "avr"],
+        ["mai"], ["juin"], ["juillet", "juil"], ["août"],
+        ["septembre", "sept"], ["octobre", "oct"], ["novembre", "nov"], ["décembre", "déc"],
+    ],
+    "es": [
+        ["enero", "ene"], ["febrero", "feb"], ["marzo", "mar"], ["abril", "abr"],
+        ["mayo", "may"], ["junio", "jun"], ["julio", "jul"], ["agosto", "ago"],
+        ["septiembre", "setiembre", "sep", "sept", "set"], ["octubre", "oct"], ["noviembre", "nov"], ["diciembre", "dic"],
+    ],
+    "it": [
+        ["gennaio", "gen"], ["febbraio", "feb"], ["marzo", "mar"], ["aprile", "apr"],
+        ["maggio", "mag"], ["giugno", "giu"], ["luglio", "lug"], ["agosto", "ago"],
+        ["settembre", "set"], ["ottobre", "ott"], ["novembre", "nov"], ["dicembre", "dic"],
+    ],
+    "pt": [
+        ["janeiro", "jan"], ["fevereiro", "fev"], ["março", "mar"], ["abril", "abr"],
+        ["maio", "mai"], ["junho", "jun"], ["julho", "jul"], ["agosto", "ago"],
+        ["setembro", "set"], ["outubro", "out"], ["novembro", "nov"], ["dezembro", "dez"],
+    ],
+    "nl": [
+        ["januari", "jan"], ["februari", "feb"], ["maart", "mrt"], ["april", "apr"],
+        ["mei"], ["juni", "jun"], ["juli", "jul"], ["augustus", "aug"],
+        ["september", "sep", "sept"], ["oktober", "okt"], ["november", "nov"], ["december", "dec"],
+    ],
+    "tr": [
+        ["ocak"], ["şubat"], ["mart"], ["nisan"], ["mayıs"], ["haziran"],
+        ["temmuz"], ["ağustos"], ["eylül"], ["ekim"], ["kasım"], ["aralık"],
+    ],
+    "el": [
+        ["ιανουάριος", "ιανουαρίου"], ["φεβρουάριος", "φεβρουαρίου"], ["μάρτιος", "μαρτίου"],
+        ["απρίλιος", "απριλίου"], ["μάιος", "μαΐου", "μαΐος"], ["ιούνιος", "ιουνίου"],
+        ["ιούλιος", "ιουλίου"], ["αύγουστος", "αυγούστου"], ["σεπτέμβριος", "σεπτεμβρίου"],
+        ["οκτώβριος", "οκτωβρίου"], ["νοέμβριος", "νοεμβρίου"], ["δεκέμβριος", "δεκεμβρίου"],
+    ],
+    "hr": [
+        ["siječanj", "siječnja"], ["veljača", "veljače"], ["ožujak", "ožujka"], ["travanj", "travnja"],
+        ["svibanj", "svibnja"], ["lipanj", "lipnja"], ["srpanj", "srpnja"], ["kolovoz", "kolovoza"],
+        ["rujan", "rujna"], ["listopad", "listopada"], ["studeni", "studenoga", "studenog"], ["prosinac", "prosinca"],
+    ],
+}
+
+# ccTLD -> language hint (only matters where month names collide between languages)
+TLD_LANGUAGES = {
+    "ro": "ro", "md": "ro", "ru": "ru", "by": "ru", "kz": "ru", "ua": "uk", "bg": "bg",
+    "rs": "sr", "me": "sr", "hr": "hr", "ba": "hr", "pl": "pl", "cz": "cs", "sk": "sk",
+    "hu": "hu", "de": "de", "at": "de", "fr": "fr", "es": "es", "it": "it", "pt": "pt",
+    "br": "pt", "nl": "nl", "tr": "tr", "gr": "el", "cy": "el",
+}
+
+
+def _fold(text: str) -> str:
+    """Lowercase, accents stripped (ș -> s, é -> e, й -> и), so tables match any spelling."""
+    text = unicodedata.normalize("NFKD", text.lower())
+    return "".join(c for c in text if not unicodedata.combining(c))
+
+
+def _build_tables():
+    by_lang = {}
+    merged = {}
+    prefixes = {}
+    for lang, months in LANGUAGE_MONTHS.items():
+        table = {}
+        for month, names in enumerate(months, start=1):
+            for name in names:
+                key = _fold(name)
+                table[key] = month
+                merged.setdefault(key, month) # earlier language wins on collisions
+                if len(key) >= 3:
+                    prefixes.setdefault(key[:3], set()).add(month)
+        by_lang[lang] = table
+    # 3-letter prefix fallback ("ianuar." / "sept." style truncations), only where unambiguous
+    prefix3 = {p: next(iter(ms)) for p, ms in prefixes.items() if len(ms) == 1}
+    return by_lang, merged, prefix3
+
+
+MONTHS_BY_LANG, MONTHS, MONTH_PREFIX3 = _build_tables()
+
+# Patterns, tried in this order (same order the old parser used, plus the new shapes)
+ISO_RE = re.compile(r'(\d{4})[-/.](\d{1,2})[-/.](\d{1,2})')                 # 2026-01-16, 2026/01/16
+DMY_RE = re.compile(r'(\d{1,2})[./-](\d{1,2})[./-](\d{4})')                 # 16.01.2026, 16/01/2026
+DAY_MONTH_YEAR_RE = re.compile(r'(\d{1,2})\.?\s+(?:de\s+)?([^\W\d_]+)\.?,?\s+(?:de\s+)?(\d{4})') # 16 ianuarie 2026, 16. Januar 2026, 16 de enero de 2026
+MONTH_DAY_YEAR_RE = re.compile(r'([^\W\d_]{3,})\.?\s+(\d{1,2})(?:st|nd|rd|th)?[,\.]?\s+(\d{4})')  # January 16, 2026 / ian. 04, 2026
+YEAR_MONTH_DAY_RE = re.compile(r'(\d{4})\.?\s+([^\W\d_]{3,})\.?\s+(\d{1,2})')    # 2026. január 16.
+CJK_RE = re.compile(r'(\d{4})\s*[年년]\s*(\d{1,2})\s*[月월]\s*(\d{1,2})')             # 2026年1月16日, 2026년 1월 16일
+
+# Relative dates (ro / en / ru), matched on the folded string. Whole-string only:
+# a title like "Ce s-a votat ieri in consiliu" is not a date.
+RELATIVE_MAX_LEN = 48
+RELATIVE_DAYS = {"azi": 0, "astazi": 0, "today": 0, "сегодня": 0,
+                 "ieri": 1, "yesterday": 1, "вчера": 1, "alaltaieri": 2, "позавчера": 2}
+RELATIVE_UNITS = {
+    "minut": "minutes", "minute": "minutes", "minutes": "minutes", "минуту": "minutes", "минуты": "minutes", "минут": "minutes",
+    "ora": "hours", "ore": "hours", "hour": "hours", "hours": "hours", "час": "hours", "часа": "hours", "часов": "hours",
+    "zi": "days", "zile": "days", "day": "days", "days": "days", "день": "days", "дня": "days", "днеи": "days",
+}
+_TIME = r'(?:,?\s*(?:la|at|в|ora)?\s*\d{1,2}:\d{2}(?:\s*[ap]m)?)?'
+_LABEL = r'(?:(?:publicat|actualizat|published|updated|опубликовано|обновлено)\s*:?\s*)?'
+RELATIVE_DAY_RE = re.compile(rf'^{_LABEL}({"|".join(RELATIVE_DAYS)}){_TIME}$')                      # ieri, 18:20 / вчера в 18:20
+RELATIVE_AGO_RE = re.compile(r'^(?:acum\s+(\d{1,3}|o|un)\s+([^\W\d_]+)'                          # acum 3 ore
+                             r'|(\d{1,3}|an|a)\s+([^\W\d_]+)\s+(?:ago|назад))$')               # 3 hours ago / 2 часа назад
+
+
+def lang_for_domain(domain: str) -> Optional[str]:
+    """Language hint from a domain's ccTLD (None for .com/.net/...)."""
+    if not domain:
+        return None
+    tld = domain.rstrip(".").rsplit(".", 1)[-1].lower()
+    return TLD_LANGUAGES.get(tld)
+
+
+def month_from_name(name: str, lang: Optional[str] = None) -> Optional[int]:
+    key = _fold(name).rstrip(".")
+    if lang and lang in MONTHS_BY_LANG:
+        month = MONTHS_BY_LANG[lang].get(key)
+        if month:
+            return month
+    return MONTHS.get(key) or MONTH_PREFIX3.get(key[:3])
+
+
+def _make(year, month, day) -> Optional[datetime]:
+    try:
+        return datetime(int(year), int(month), int(day))
+    except (ValueError, TypeError):
+        return None
+
+
+def _parse(text: str, lang: Optional[str]) -> Optional[datetime]:
+    # 1. CJK (before folding: NFKD decomposes Hangul)
+    m = CJK_RE.search(text)
+    if m:
+        d = _make(*m.groups())
+        if d: return d
+
+    folded = _fold(text)
+
+    # 2. ISO-like YYYY-MM-DD (also / and . separators)
+    m = ISO_RE.search(folded)
+    if m:
+        d = _make(m.group(1), m.group(2), m.group(3))
+        if d: return d
+
+    # 3. DD.MM.YYYY / DD/MM/YYYY / DD-MM-YYYY, then MM/DD/YYYY if the day-first reading is impossible
+    m = DMY_RE.search(folded)
+    if m:
+        d = _make(m.group(3), m.group(2), m.group(1)) or _make(m.group(3), m.group(1), m.group(2))
+        if d: return d
+
+    # 4. DD Month YYYY (Latin, Cyrillic, Greek)
+    m = DAY_MONTH_YEAR_RE.search(folded)
+    if m:
+        day, name, year = m.groups()
+        month = month_from_name(name, lang)
+        if month:
+            d = _make(year, month, day)
+            if d: return d
+
+    # 5. Month DD, YYYY
+    m = MONTH_DAY_YEAR_RE.search(folded)
+    if m:
+        name, day, year = m.groups()
+        month = month_from_name(name, lang)
+        if month:
+            d = _make(year, month, day)
+            if d: return d
+
+    # 6. YYYY. Month DD (Hungarian)
+    m = YEAR_MONTH_DAY_RE.search(folded)
+    if m:
+        year, name, day = m.groups()
+        month = month_from_name(name, lang)
+        if month:
+            d = _make(year, month, day)
+            if d: return d
+
+    return None
+
+
+@lru_cache(maxsize=DATE_CACHE_SIZE)
+def _relative_delta(normalized: str) -> Optional[timedelta]:
+    """How far back a relative date string points (memoized: it doesn't depend on now)."""
+    folded = _fold(normalized)
+    m = RELATIVE_DAY_RE.match(folded)
+    if m:
+        return timedelta(days=RELATIVE_DAYS[m.group(1)])
+    m = RELATIVE_AGO_RE.match(folded)
+    if not m:
+        return None
+    count, unit = (m.group(1), m.group(2)) if m.group(2) else (m.group(3), m.group(4))
+    unit = RELATIVE_UNITS.get(unit)
+    if not unit:
+        return None
+    return timedelta(**{unit: int(count) if count.isdigit() else 1})
+
+
+@lru_cache(maxsize=DATE_CACHE_SIZE)
+def _parse_cached(normalized: str, lang: Optional[str]) -> Optional[datetime]:
+    return _parse(normalized, lang)
+
+
+def _normalize(text: str) -> str:
+    return " ".join(text.lower().split())
+
+
+def parse_date(text: str, lang: Optional[str] = None, now: Optional[datetime] = None) -> Optional[datetime]:
+    """
+    Parses one candidate string ('29 decembrie 2025', '2026-01-16T10:00', '16. Januar 2026',
+    'ieri, 18:20'...). now: reference time for relative dates (default: current time).
+    """
+    if not text or not isinstance(text, str):
+        return None
+    normalized = _normalize(text)
+    if len(normalized) > MAX_CACHED_LEN:
+        return _parse(normalized, lang)
+    d = _parse_cached(normalized, lang)
+    if d is None and len(normalized) <= RELATIVE_MAX_LEN:
+        delta = _relative_delta(normalized)
+        if delta is not None:
+            day = (now or datetime.now()) - delta
+            d = datetime(day.year, day.month, day.day)
+    return d
+
+
+def parse_dates(texts: Iterable[str], lang: Optional[str] = None, now: Optional[datetime] = None) -> List[Optional[datetime]]:
+    """Batch form of parse_date: one result per input, each distinct string parsed once."""
+    seen = {}
+    out = []
+    for text in texts:
+        if text not in seen:
+            seen[text] = parse_date(text, lang, now)
+        out.append(seen[text])
+    return out
+
+
+def first_date(texts: Iterable[str], lang: Optional[str] = None, now: Optional[datetime] = None) -> Optional[datetime]:
+    """First candidate (in order) that parses; stops at the first hit."""
+    for text in texts:
+        d = parse_date(text, lang, now)
+        if d:
+            return d
+    return None
+
+
+def cache_info():
+    return _parse_cached.cache_info()
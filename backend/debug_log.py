@@ -0,0 +1,194 @@
+import os
+import json
+import time
+import queue
+import atexit
+import logging
+import contextvars
+import uuid
+from logging.handlers import QueueListener, RotatingFileHandler
+from typing import Optional
+
+# --- Structured Debug Log ---
+# Replaces the `with open("stream_debug.log", "a")` writes in the scraper and
+# the digest stream. Callers only put a small tuple on an in-memory queue; a
+# background thread (QueueListener) turns it into a LogRecord, formats it as one
+# JSON line and writes it to a size-rotated file. Nothing on the event loop
+# opens or writes files, or even builds a LogRecord.
+#   - levels: per-URL decisions (classify_url rejects...) are DEBUG, run
+#     milestones INFO, failures ERROR. Below DEBUG_LOG_LEVEL a call returns
+#     after one integer compare.
+#   - run_id: set once per digest run (start_run) and carried by every record
+#     logged from that run's tasks - and from parse-pool workers (see parse_pool).
+#   - the queue is bounded; when the writer falls behind, records are dropped
+#     and counted instead of blocking the caller.
+# DEBUG_LOG=0 turns it off entirely.
+#
+# Usage:
+#     from debug_log import dlog
+#     dlog("REJECT_EXT", url=url, level=logging.DEBUG)
+
+DEBUG_LOG_ENABLED = os.getenv("DEBUG_LOG", "1").lower() not in ("0", "false", "no")
+DEBUG_LOG_FILE = os.getenv("DEBUG_LOG_FILE", "stream_debug.log")
+DEBUG_LOG_LEVEL = logging.getLevelName(os.getenv("DEBUG_LOG_LEVEL", "INFO").upper())
+DEBUG_LOG_MAX_BYTES = int(os.getenv("DEBUG_LOG_MAX_BYTES", str(10 * 1024 * 1024)))
+DEBUG_LOG_BACKUPS = int(os.getenv("DEBUG_LOG_BACKUPS", "3"))
+DEBUG_LOG_QUEUE_SIZE = int(os.getenv("DEBUG_LOG_QUEUE_SIZE", "10000"))
+
+if not isinstance(DEBUG_LOG_LEVEL, int): # unknown level name
+    DEBUG_LOG_LEVEL = logging.INFO
+
+# Effective threshold checked on every call; above CRITICAL when disabled
+_threshold = DEBUG_LOG_LEVEL if DEBUG_LOG_ENABLED else logging.CRITICAL + 1
+
+_run_id: contextvars.ContextVar = contextvars.ContextVar("debug_log_run_id", default=None)
+LOGGER_NAME = "urbanous.debug" # records bypass the logging tree (and uvicorn's console handlers)
+
+_queue = None
+_sink = None # queue dlog() puts on: _queue here, the server's queue in parse-pool workers
+_file = None
+_pid = os.getpid()
+_listeners = []
+_worker_listener = None
+_stats = {"emitted": 0, "dropped": 0}
+
+
+class JsonLineFormatter(logging.Formatter):
+    """One JSON object per line: ts, level, event, run_id, msg + the call's fields."""
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(record.created)) + f".{int(record.msecs):03d}",
+            "level": record.levelname,
+            "event": getattr(record, "event", None),
+            "run_id": getattr(record, "run_id", None),
+            "pid": record.process,
+        }
+        if record.msg:
+            entry["msg"] = record.msg
+        entry.update(getattr(record, "fields", None) or {})
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class _TupleListener(QueueListener):
+    """QueueListener fed with dlog() tuples; the LogRecord is built here, on the writer thread."""
+    def prepare(self, item):
+        created, level, event, msg, run_id, pid, fields = item
+        record = logging.LogRecord(LOGGER_NAME, level, "", 0, msg, None, None)
+        record.created = created
+        record.msecs = (created - int(created)) * 1000
+        record.process = pid
+        record.event = event
+        record.run_id = run_id
+        record.fields = fields
+        return record
+
+
+def _file_handler() -> logging.Handler:
+    directory = os.path.dirname(DEBUG_LOG_FILE)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    handler = RotatingFileHandler(DEBUG_LOG_FILE, maxBytes=DEBUG_LOG_MAX_BYTES, backupCount=DEBUG_LOG_BACKUPS, encoding="utf-8", delay=True)
+    handler.setFormatter(JsonLineFormatter())
+    return handler
+
+
+def start_debug_log():
+    """Starts the writer thread. Called from the app startup hook (or lazily on first use)."""
+    global _queue, _sink, _file
+    if not DEBUG_LOG_ENABLED or _sink is not None:
+        return
+    _file = _file_handler()
+    _queue = queue.Queue(DEBUG_LOG_QUEUE_SIZE)
+    listener = _TupleListener(_queue, _file, respect_handler_level=False)
+    listener.start()
+    _listeners.append(listener)
+    _sink = _queue
+
+
+def stop_debug_log():
+    """Flushes queued records and stops the writer threads (shutdown hook, atexit)."""
+    global _sink, _file, _worker_listener
+    for listener in _listeners:
+        try:
+            listener.stop()
+        except Exception:
+            pass
+    _listeners.clear()
+    _worker_listener = None
+    if _file is not None:
+        _file.close()
+    _sink = None
+    _file = None
+
+
+atexit.register(stop_debug_log)
+
+
+def worker_queue(ctx):
+    """
+    Server side of parse-pool logging: a process-safe queue for the workers'
+    records, drained by a second listener into the same file. None when disabled.
+    """
+    global _worker_listener
+    if not DEBUG_LOG_ENABLED:
+        return None
+    start_debug_log()
+    if _worker_listener is not None: # pool rebuilt: the old workers are gone
+        _worker_listener.stop()
+        _listeners.remove(_worker_listener)
+    q = ctx.Queue(DEBUG_LOG_QUEUE_SIZE)
+    _worker_listener = _TupleListener(q, _file, respect_handler_level=False)
+    _worker_listener.start()
+    _listeners.append(_worker_listener)
+    return q
+
+
+def init_worker(q):
+    """Worker side: records go onto the server's queue (no file access in workers)."""
+    global _sink, _pid
+    _pid = os.getpid()
+    if q is not None:
+        _sink = q
+
+
+def enabled(level: int = logging.DEBUG) -> bool:
+    """Guard for call sites whose fields are expensive to build."""
+    return level >= _threshold
+
+
+def dlog(event: str, msg: str = "", level: int = logging.INFO, **fields):
+    """Queues one structured record. Returns immediately; no I/O on the caller's thread."""
+    if level < _threshold:
+        return
+    if _sink is None:
+        start_debug_log()
+    try:
+        _sink.put_nowait((time.time(), level, event, msg, _run_id.get(), _pid, fields))
+        _stats["emitted"] += 1
+    except queue.Full:
+        _stats["dropped"] += 1
+
+
+def start_run(prefix: str = "run") -> str:
+    """New correlation ID for the current task and everything it spawns."""
+    run_id = f"{prefix}-{uuid.uuid4().hex[:8]}"
+    _run_id.set(run_id)
+    return run_id
+
+
+def get_run_id() -> Optional[str]:
+    return _run_id.get()
+
+
+def set_run_id(run_id: Optional[str]):
+    _run_id.set(run_id)
+
+
+def get_debug_log_stats() -> dict:
+    return {
+        "enabled": DEBUG_LOG_ENABLED,
+        "level": logging.getLevelName(DEBUG_LOG_LEVEL),
+        "file": DEBUG_LOG_FILE,
+        "queued": _queue.qsize() if _queue is not None else 0,
+        **_stats,
+    }
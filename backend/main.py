@@ -51,11 +51,94 @@ async def startup():
         from auto_migrate import cleanup_broken_images
         await cleanup_broken_images()
         
+        # Shared pooled HTTP client for all scraping paths
+        from services.http_client import start_http_client
+        await start_http_client()
+        
+        # Background writer for the structured debug log (before the parse pool: workers log through it)
+        from debug_log import start_debug_log
+        start_debug_log()
+        
+        # Worker processes for HTML parsing (keeps the event loop responsive)
+        from services.parse_pool import start_parse_pool
+        start_parse_pool()
+        
+        # Drop page-cache entries nobody revalidated recently
+        from services.page_cache import prune_page_cache
+        pruned = prune_page_cache()
+        if pruned: print(f"STARTUP: Pruned {pruned} stale page-cache entries.")
+        
+        # User spam reports, kept in memory and updated by /feedback/spam
+        from services.spam_index import get_spam_index
+        await get_spam_index()
+        
+        # Expire negative deep-scan results (date not found)
+        from services.deep_scan_cache import evict_expired
+        evicted = await evict_expired()
+        if evicted: print(f"STARTUP: Evicted {evicted} expired deep-scan cache rows.")
+        
+        # Expire old LLM title verdicts
+        from services import llm_verdict_cache
+        evicted = await llm_verdict_cache.evict_expired()
+        if evicted: print(f"STARTUP: Evicted {evicted} expired LLM verdict cache rows.")
+        
         print("STARTUP: Complete.")
     except Exception as e:
         # CRITICAL: Do NOT crash. Log and continue so /debug endpoint works.
         print(f"STARTUP ERROR: {e}") 
 
+@app.on_event("shutdown")
+async def shutdown():
+    from services.http_client import stop_http_client
+    from services.domain_health import get_domain_health
+    from services.parse_pool import stop_parse_pool
+    from services.seen_filter import get_seen_filters
+    from debug_log import stop_debug_log
+    await stop_http_client()
+    stop_parse_pool()
+    get_domain_health().save() # persist breaker state + latency samples
+    get_seen_filters().save() # per-outlet seen-link filters
+    stop_debug_log() # flush queued debug records
+
+@app.get("/debug/http")
+def debug_http():
+    """Connection reuse counters of the shared scraper client + page cache."""
+    from services.http_client import get_http_stats
+    from services.page_cache import get_page_cache_stats
+    return {**get_http_stats(), "page_cache": get_page_cache_stats()}
+
+@app.get("/debug/log")
+def debug_log_stats():
+    """Structured debug log: level, file, records written / dropped (queue full)."""
+    from debug_log import get_debug_log_stats
+    return get_debug_log_stats()
+
+@app.get("/debug/spam")
+def debug_spam_index():
+    """In-memory spam index: version, report counts, lookups / hits."""
+    from services.spam_index import get_spam_index_stats
+    return get_spam_index_stats()
+
+@app.get("/debug/llm")
+def debug_llm_scheduler():
+    """Gemini request scheduler: in-flight / queued calls per priority, waits, 429 pauses per key."""
+    from services.llm_scheduler import get_llm_scheduler
+    return get_llm_scheduler().snapshot()
+
+@app.get("/debug/verdicts")
+def debug_verdict_cache():
+    """Persistent LLM verdict/translation cache: lookups, hits, hit rate, rows stored / warmed."""
+    from services.llm_verdict_cache import get_llm_cache_stats
+    return get_llm_cache_stats()
+
+@app.post("/debug/verdicts/warmup")
+async def warm_verdict_cache(limit: int = None):
+    """Seed the verdict cache from saved Politics digests (ai_verdict + translated_title per article)."""
+    from services.llm_verdict_cache import warm_up_from_digests, get_llm_cache_stats
+    from prompts.politics import POLITICS_OPERATIONAL_DEFINITION
+    added = await warm_up_from_digests(POLITICS_OPERATIONAL_DEFINITION, limit=limit)
+    return {"status": "completed", "added": added, "stats": get_llm_cache_stats()}
+
 @app.get("/debug/schema")
 async def debug_schema():
     """Inspect the database columns remotely."""
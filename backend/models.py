@@ -48,6 +48,9 @@ class NewsOutlet(Base):
     origin = Column(String, default="auto") # 'auto' or 'manual'
     popularity = Column(Integer, default=5) # 1-10 score
     focus = Column(String, default="Local") # Local, National, or Mixed
+    avg_scrape_seconds = Column(Float, nullable=True) # Rolling average scrape duration (LPT scheduling)
+    resolved_url = Column(String, nullable=True) # Final homepage URL after redirects (memoized)
+    encoding = Column(String, nullable=True) # Non-UTF-8 site encoding, when the server doesn't declare it
     
     created_at = Column(DateTime(timezone=True), server_default=func.now())
 
@@ -137,3 +140,47 @@ class SpamFeedback(Base):
     
     created_at = Column(DateTime(timezone=True), server_default=func.now())
 
+
+# --- Deep Scan Cache ---
+# Article publication dates never change, so deep-scan results are kept across runs.
+class DeepScanCache(Base):
+    __tablename__ = "deep_scan_cache"
+
+    id = Column(Integer, primary_key=True, index=True)
+    url = Column(String, unique=True, index=True) # Canonical article URL
+    domain = Column(String, index=True) # e.g. "tribuna.ro"
+    date_str = Column(String, nullable=True) # NULL = negative result (no date found)
+    title = Column(String, nullable=True)
+    content_type = Column(String, nullable=True) # detect_content_type verdict: article / category / unknown
+
+    scanned_at = Column(DateTime(timezone=True), server_default=func.now())
+
+# --- Cache Versions ---
+# Monotonic counters bumped whenever a cached table changes (e.g. scraper_rules).
+# Every worker process compares its loaded version to decide when to reload.
+class CacheVersion(Base):
+    __tablename__ = "cache_versions"
+
+    id = Column(Integer, primary_key=True, index=True)
+    name = Column(String, unique=True, index=True) # e.g. "scraper_rules"
+    version = Column(Integer, default=0)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+# --- LLM Verdict Cache ---
+# Title verification results (politics verdict + translation) per
+# (normalized title, operational definition, target language, model family).
+class LlmVerdictCache(Base):
+    __tablename__ = "llm_verdict_cache"
+
+    id = Column(Integer, primary_key=True, index=True)
+    key = Column(String, unique=True, index=True) # blake2b of the four parts below
+    title_hash = Column(String)
+    definition_hash = Column(String)
+    language = Column(String) # e.g. "English"
+    model_family = Column(String) # e.g. "gemini-flash"
+    title = Column(String, nullable=True) # for inspection only
+    verdict = Column(Boolean)
+    translated_title = Column(String, nullable=True)
+    source = Column(String, default="model") # model / warmup (from stored digests)
+
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
@@ -0,0 +1,189 @@
+"""
+Near-duplicate detection for syndicated stories (MinHash + LSH banding).
+
+A wire story republished by several local outlets with small edits
+("PSD și PNL negociază..." / "PSD si PNL negociaza... - surse") passes the
+exact title/URL dedupe and used to cost one AI verification slot and one
+table row per outlet. NearDupIndex clusters them under the first copy seen
+(the representative); the other copies are kept as alternate sources on it
+and skip verification. Rewritten headlines ("Guvernul a aprobat bugetul pe
+2027" / "... pentru anul 2027, anunță ministrul") only cluster when a text
+snippet of both confirms it.
+
+  - shingles: character 5-grams of the normalized title (accents, case and
+    punctuation folded), plus word 3-grams of the text snippet when there is one
+  - signature: NUM_PERM min-hashes by one-permutation hashing - each shingle
+    hash is mixed once and lands in one of NUM_PERM bins, each bin keeps its
+    minimum; empty bins borrow from the next non-empty one (rotation
+    densification). Same collision probability per bin as NUM_PERM independent
+    permutations, at one multiply per shingle instead of NUM_PERM.
+  - LSH: BANDS bands of ROWS rows; items sharing any band bucket are candidates,
+    confirmed by the exact Jaccard of the shingle sets: >= NEAR_DUP_THRESHOLD
+    when both items have a text snippet, >= TITLE_ONLY_THRESHOLD (title
+    shingles only) otherwise - local headlines are formulaic, "Accident grav pe
+    DN1 la Brasov, doi raniti" and "... la Ploiesti ..." are 0.55 alike
+  - guards on the titles: the same numbers ("sedinta din 12 octombrie" / "din
+    19 octombrie" are different events however similar the rest is), and no
+    conflicting names - each title having a capitalized word the other lacks
+    ("Primaria Cluj" / "Primaria Iasi"); a name only added to one copy
+    ("..., anunță ministrul Finanțelor") is not a conflict, outlet tags
+    ("VIDEO", "FOTO") are not names
+Each add() is O(shingles + NUM_PERM + candidates): linear in the number of
+articles overall, no pairwise comparison. With 16 bands x 2 rows a pair at
+Jaccard 0.5 becomes a candidate with probability 0.99, at 0.2 with 0.48 (then
+rejected by the exact check).
+
+Shingles are hashed with zlib.crc32 rather than the builtin hash(), which is
+salted per process: verdicts are the same on every worker and every run.
+
+idx = NearDupIndex()
+idx.add(key, title, text=None) -> key of the representative it duplicates, or None
+"""
+import os
+import re
+import zlib
+import unicodedata
+from typing import Dict, Hashable, Optional
+
+NEAR_DUP_THRESHOLD = float(os.getenv("NEAR_DUP_THRESHOLD", "0.5")) # title + snippet on both sides
+TITLE_ONLY_THRESHOLD = float(os.getenv("NEAR_DUP_TITLE_THRESHOLD", "0.8"))
+BANDS = 16
+ROWS = 2
+NUM_PERM = BANDS * ROWS
+TITLE_SHINGLE = 5 # chars
+TEXT_SHINGLE = 3 # words
+MIN_TITLE_CHARS = 20 # short titles ("Video", "Meteo azi") collide by accident
+
+_MASK64 = (1 << 64) - 1
+_MIX = 0x9E3779B97F4A7C15 # odd 64-bit constant (Fibonacci hashing)
+_BIN_SHIFT = 64 - (NUM_PERM - 1).bit_length() # top bits pick the bin
+_EMPTY = _MASK64 + 1
+
+_NON_WORD_RE = re.compile(r"[\W_]+")
+_NUMBER_RE = re.compile(r"\d+")
+_WORD_RE = re.compile(r"[^\W_]+")
+# outlet tags, not names: "... | VIDEO" and "... | FOTO" are the same story
+_TAG_WORDS = frozenset({"foto", "video", "live", "audio", "galerie", "update", "actualizat", "breaking", "exclusiv", "surse", "oficial"})
+
+
+def normalize(text: str) -> str:
+    text = text.lower()
+    if not text.isascii():
+        text = unicodedata.normalize("NFKD", text)
+        text = "".join(c for c in text if not unicodedata.combining(c))
+    return _NON_WORD_RE.sub(" ", text).strip()
+
+
+def shingles(title: str, text: Optional[str] = None) -> frozenset:
+    return _shingles(normalize(title or ""), text)
+
+
+def _shingles(norm: str, text: Optional[str]) -> frozenset:
+    data = norm.encode("utf-8")
+    out = {zlib.crc32(data[i:i + TITLE_SHINGLE]) for i in range(max(1, len(data) - TITLE_SHINGLE + 1))}
+    if text:
+        words = normalize(text).split()
+        # word shingles in their own hash space (crc32 seeded differently)
+        out.update(zlib.crc32(" ".join(words[i:i + TEXT_SHINGLE]).encode("utf-8"), 0x5EED) for i in range(max(0, len(words) - TEXT_SHINGLE + 1)))
+    return frozenset(out)
+
+
+def names(title: str) -> frozenset:
+    """Capitalized words of a title after the first one, folded like normalize(), outlet tags left out."""
+    words = _WORD_RE.findall(title or "")[1:]
+    return frozenset(normalize(w) for w in words if w[0].isupper()) - _TAG_WORDS
+
+
+def signature(shingle_set) -> tuple:
+    mins = [_EMPTY] * NUM_PERM
+    for h in shingle_set:
+        v = (h * _MIX) & _MASK64
+        b = v >> _BIN_SHIFT
+        if v < mins[b]:
+            mins[b] = v
+    if _EMPTY in mins:
+        filled = [i for i, v in enumerate(mins) if v != _EMPTY]
+        if filled:
+            dense = list(mins)
+            for i, v in enumerate(mins):
+                if v == _EMPTY:
+                    # next non-empty bin clockwise, tagged with the distance
+                    j = next((f for f in filled if f > i), filled[0])
+                    dense[i] = (mins[j] + ((j - i) % NUM_PERM) * _MIX) & _MASK64
+            mins = dense
+    return tuple(mins)
+
+
+def jaccard(a: frozenset, b: frozenset) -> float:
+    if not a or not b:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+
+class NearDupIndex:
+    def __init__(self, threshold: float = NEAR_DUP_THRESHOLD, title_threshold: float = TITLE_ONLY_THRESHOLD):
+        self.threshold = threshold
+        self.title_threshold = title_threshold
+        self._buckets = [dict() for _ in range(BANDS)]
+        self._shingles: Dict[Hashable, frozenset] = {}
+        self._title_shingles: Dict[Hashable, frozenset] = {} # only for items with a snippet
+        self._numbers: Dict[Hashable, frozenset] = {}
+        self._names: Dict[Hashable, frozenset] = {}
+        self._stats = {"added": 0, "duplicates": 0, "candidates": 0, "skipped_short": 0, "name_conflicts": 0}
+
+    def add(self, key: Hashable, title: str, text: Optional[str] = None) -> Optional[Hashable]:
+        """
+        Indexes (title, text) under key unless it near-duplicates an indexed
+        item: then returns that item's key and indexes nothing.
+        """
+        norm = normalize(title or "")
+        if len(norm) < MIN_TITLE_CHARS and not text:
+            self._stats["skipped_short"] += 1
+            return None
+        sh = _shingles(norm, text)
+        title_sh = _shingles(norm, None) if text else sh
+        numbers = frozenset(_NUMBER_RE.findall(title or ""))
+        title_names = names(title)
+        sig = signature(sh)
+        band_keys = [sig[i * ROWS:(i + 1) * ROWS] for i in range(BANDS)]
+
+        seen = set()
+        best, best_sim = None, 0.0
+        for band, bkey in zip(self._buckets, band_keys):
+            for other in band.get(bkey, ()):
+                if other in seen:
+                    continue
+                seen.add(other)
+                other_numbers = self._numbers[other]
+                if numbers and other_numbers and numbers != other_numbers:
+                    continue
+                other_names = self._names[other]
+                if title_names - other_names and other_names - title_names:
+                    self._stats["name_conflicts"] += 1
+                    continue
+                if text and other in self._title_shingles:
+                    sim, threshold = jaccard(sh, self._shingles[other]), self.threshold
+                else:
+                    sim, threshold = jaccard(title_sh, self._title_shingles.get(other, self._shingles[other])), self.title_threshold
+                if sim >= threshold and sim > best_sim:
+                    best, best_sim = other, sim
+        self._stats["candidates"] += len(seen)
+        if best is not None:
+            self._stats["duplicates"] += 1
+            return best
+
+        self._shingles[key] = sh
+        if text:
+            self._title_shingles[key] = title_sh
+        self._numbers[key] = numbers
+        self._names[key] = title_names
+        for band, bkey in zip(self._buckets, band_keys):
+            band.setdefault(bkey, []).append(key)
+        self._stats["added"] += 1
+        return None
+
+    def __len__(self):
+        return len(self._shingles)
+
+    def stats(self) -> dict:
+        return dict(self._stats)
@@ -5,6 +5,7 @@ from sqlalchemy import select
 from database import AsyncSessionLocal
 from models import SpamFeedback, User
 from routers.auth import get_current_user # Assuming we wantauth
+from services.spam_index import bump_spam_version, record_spam_change
 from typing import Optional
 
 router = APIRouter(prefix="/feedback", tags=["Feedback"])
@@ -42,7 +43,9 @@ async def report_spam(
     )
     
     db.add(feedback)
+    version = await bump_spam_version(db)
     await db.commit()
+    record_spam_change(version, added=[(feedback.url, feedback.title)])
     
     return {"status": "reported", "id": feedback.id}
 
@@ -62,8 +65,11 @@ async def delete_spam_report(
     if not feedbacks:
         return {"status": "not_found", "message": "No report found for this URL"}
         
+    removed = [(f.url, f.title) for f in feedbacks]
     for f in feedbacks:
         await db.delete(f)
         
+    version = await bump_spam_version(db)
     await db.commit()
+    record_spam_change(version, removed=removed)
     return {"status": "deleted", "count": len(feedbacks)}
@@ -1,6 +1,6 @@
 import os
 import time
-from datetime import datetime
+from datetime import datetime, timedelta
 import json
 import re # Added for regex parsing
 import httpx
@@ -9,6 +9,7 @@ from bs4 import BeautifulSoup
 import html # For escaping content in f-strings
 import traceback # Debugging
 import asyncio # Added for digest parallel requests
+import logging
 
 from fastapi import APIRouter, Depends, HTTPException, Body, Request
 from sqlalchemy.orm import Session
@@ -19,6 +20,9 @@ from database import AsyncSessionLocal
 from models import NewsOutlet, User, Country, CityMetadata, NewsDigest
 from dependencies import get_current_user, get_db, get_current_user_optional
 import scraper_engine 
+from debug_log import dlog, start_run
+from url_canon import url_key
+from near_dup import NearDupIndex
 import google.generativeai as genai
 import httpx
 from bs4 import BeautifulSoup
@@ -39,13 +43,21 @@ from schemas.outlets import (
 from prompts.politics import POLITICS_OPERATIONAL_DEFINITION
 from services.discovery import gemini_discover_city_outlets, gemini_scrape_outlets
 
-ROBUST_HEADERS = {
-    "User-Agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
-    "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,image/apng,*/*;q=0.8",
-    "Accept-Language": "en-US,en;q=0.9",
-    "Referer": "https://www.google.com/",
-    "Upgrade-Insecure-Requests": "1"
-}
+# Shared pooled client (started in main.py startup hook)
+from services.http_client import ROBUST_HEADERS, get_http_client
+from services.crawl_frontier import get_frontier
+from services import page_cache
+from services import deep_scan_cache
+from services import llm_verdict_cache
+from services import llm_scheduler
+from services import seen_filter
+from services import url_templates
+from services import stream_fetch
+from services import parse_pool
+from services import charset
+from services.rule_registry import get_rule_registry
+from services.spam_index import get_spam_index
+from services.domain_health import get_domain_health
 
 from google.api_core.exceptions import ResourceExhausted
 
@@ -308,13 +320,10 @@ async def import_outlets_from_url(req: ImportUrlRequest, current_user: User = De
     
     # 1. Fetch URL
     try:
-        headers = {
-            "User-Agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
-        }
-        async with httpx.AsyncClient(follow_redirects=True, timeout=15, headers=ROBUST_HEADERS) as client:
-            response = await client.get(req.url)
-            response.raise_for_status()
-            html_content = response.text
+        client = get_http_client()
+        response = await client.get(req.url, timeout=15)
+        response.raise_for_status()
+        html_content = response.text
     except Exception as e:
         print(f"Fetch failed: {e}")
         raise HTTPException(status_code=400, detail=f"Failed to fetch URL: {str(e)}")
@@ -375,21 +384,19 @@ async def assess_article_politics(req: PoliticsAssessmentRequest, current_user:
     if not current_user.gemini_api_key:
         raise HTTPException(status_code=400, detail="Gemini API Key required")
     
-    genai.configure(api_key=current_user.gemini_api_key)
-    
     # Needs content. If not provided, fetch it (snippet).
     article_text = req.content
     if not article_text or len(article_text) < 100:
         # Fetch ephemeral
-        async with httpx.AsyncClient(follow_redirects=True, timeout=10, headers=ROBUST_HEADERS) as client:
-            try:
-                resp = await client.get(req.url)
-                if resp.status_code == 200:
-                    soup = BeautifulSoup(resp.text, 'html.parser')
-                    # Basic extraction
-                    article_text = soup.get_text(separator=' ', strip=True)[:15000] # Limit context
-            except:
-                article_text = "Content unavailable. Rely on Title."
+        try:
+            resp = await get_http_client().get(req.url, timeout=10)
+            if resp.status_code == 200:
+                charset.apply_detected_encoding(resp)
+                soup = BeautifulSoup(resp.text, 'html.parser')
+                # Basic extraction
+                article_text = soup.get_text(separator=' ', strip=True)[:15000] # Limit context
+        except:
+            article_text = "Content unavailable. Rely on Title."
 
     prompt = f"""
     You are an expert political analyst system.
@@ -418,8 +425,7 @@ async def assess_article_politics(req: PoliticsAssessmentRequest, current_user:
     """
     
     try:
-        model = genai.GenerativeModel('gemini-flash-latest')
-        response = await model.generate_content_async(prompt)
+        response = await llm_scheduler.generate(current_user.gemini_api_key, 'gemini-flash-latest', prompt, priority=llm_scheduler.PRIORITY_INTERACTIVE)
         text = response.text.replace("```json", "").replace("```", "").strip()
         data = json.loads(text)
         return PoliticsAssessmentResponse(**data)
@@ -430,6 +436,16 @@ async def assess_article_politics(req: PoliticsAssessmentRequest, current_user:
 # Helper to log to stream from async function
 # We will return a tuple (result_map, error_msg)
 
+# Title verification models, tried in order. Verdict cache lookups are for the
+# family of the first one (the model that answers unless it fails).
+TITLE_VERIFY_MODELS = [
+    "gemini-2.0-flash", 
+    "gemini-flash-latest",
+    "gemini-2.0-flash-lite-preview-02-05", 
+    "gemini-pro-latest",
+    "gemini-1.5-flash-latest"
+]
+
 
 async def batch_verify_titles_debug(titles_map: Dict[int, str], definition: str, api_key: str, target_language: str = "English") -> tuple[Dict[str, Any], str, str]:
     if not api_key:
@@ -437,7 +453,6 @@ async def batch_verify_titles_debug(titles_map: Dict[int, str], definition: str,
         return {}, "Missing API Key", ""
     
     # print(f"DEBUG: Batch verifying {len(titles_map)} titles. Target: {target_language}")
-    genai.configure(api_key=api_key)
     
     items_str = "\n".join([f"{idx}. {title}" for idx, title in titles_map.items()])
     
@@ -469,13 +484,7 @@ async def batch_verify_titles_debug(titles_map: Dict[int, str], definition: str,
     STRICTLY RETURN JSON ONLY. NO MARKDOWN.
     """
     
-    candidate_models = [
-        "gemini-2.0-flash", 
-        "gemini-flash-latest",
-        "gemini-2.0-flash-lite-preview-02-05", 
-        "gemini-pro-latest",
-        "gemini-1.5-flash-latest"
-    ]
+    candidate_models = TITLE_VERIFY_MODELS
 
     last_error = None
     used_model = None
@@ -485,9 +494,9 @@ async def batch_verify_titles_debug(titles_map: Dict[int, str], definition: str,
     for attempt in range(max_retries):
         for m_name in candidate_models:
             try:
-                model = genai.GenerativeModel(m_name)
                 # print(f"DEBUG: Attempt {attempt+1} with {m_name}")
-                response = await model.generate_content_async(prompt)
+                # The scheduler waits out 429s (retry-after) before we fall back to the next model
+                response = await llm_scheduler.generate(api_key, m_name, prompt, priority=llm_scheduler.PRIORITY_INTERACTIVE)
                 used_model = m_name
                 
                 text = response.text
@@ -510,7 +519,7 @@ async def batch_verify_titles_debug(titles_map: Dict[int, str], definition: str,
                 if not result_map:
                     raise ValueError(f"Could not extract JSON from {m_name}. Raw len: {len(text)}")
 
-                # Normalization
+                # Normalization (a verdict filled in here is marked "defaulted": shown, never cached)
                 final_map = {}
                 for k, v in result_map.items():
                     str_k = str(k)
@@ -521,8 +530,10 @@ async def batch_verify_titles_debug(titles_map: Dict[int, str], definition: str,
                             "verdict": v.get("verdict", False),
                             "translated": v.get("translated")
                         }
+                        if "verdict" not in v:
+                            final_map[str_k]["defaulted"] = True
                     else:
-                        final_map[str_k] = {"verdict": False, "translated": None}
+                        final_map[str_k] = {"verdict": False, "translated": None, "defaulted": True}
                 
                 # Check for empty map (partial hallucination)
                 if not final_map and titles_map:
@@ -533,13 +544,7 @@ async def batch_verify_titles_debug(titles_map: Dict[int, str], definition: str,
             except Exception as e:
                 # print(f"DEBUG: Model {m_name} failed: {e}")
                 last_error = e
-                # Smart backoff for rate limits
-                if "429" in str(e) or "ResourceExhausted" in str(e):
-                    await asyncio.sleep(2)
                 continue
-        
-        # If we exhausted all models in this attempt, wait before retry
-        await asyncio.sleep(2)
 
     # Final Failure
     err_msg = f"Batch failed after {max_retries} attempts. Last error: {last_error}"
@@ -547,6 +552,24 @@ async def batch_verify_titles_debug(titles_map: Dict[int, str], definition: str,
     return {}, err_msg, ""
 
 
+async def verify_titles_cached(titles_map: Dict[int, str], definition: str, api_key: str, target_language: str = "English") -> tuple[Dict[str, Any], str, str, int]:
+    """
+    batch_verify_titles_debug behind the persistent verdict cache: cached titles
+    are answered from the DB, only the misses go to the model (and are stored).
+    Returns (result_map, error_msg, used_model, cache_hits).
+    """
+    cached = await llm_verdict_cache.get_many(titles_map.values(), definition, target_language, TITLE_VERIFY_MODELS[0])
+    result_map = {str(k): cached[t] for k, t in titles_map.items() if t in cached}
+    misses = {k: t for k, t in titles_map.items() if t not in cached}
+    if not misses:
+        return result_map, "", "", len(result_map)
+    res, err, used_model = await batch_verify_titles_debug(misses, definition, api_key, target_language)
+    if not err:
+        await llm_verdict_cache.store_results(misses, res, definition, target_language, used_model)
+    result_map.update(res)
+    return result_map, err, used_model, len(titles_map) - len(misses)
+
+
 
 @router.get("/outlets/", response_model=List[dict])
 async def get_all_outlets(db: Session = Depends(get_db)):
@@ -712,9 +735,7 @@ async def get_city_info(city: str, country: str, current_user: Optional[User] =
         if not api_key: 
             return CityInfoResponse(population="Unknown", description="API Key needed.", ruling_party="Unknown")
         
-        genai.configure(api_key=api_key)
-        model = genai.GenerativeModel('gemini-flash-latest')
-        response = await model.generate_content_async(prompt)
+        response = await llm_scheduler.generate(api_key, 'gemini-flash-latest', prompt)
         text = response.text.replace("```json", "").replace("```", "").strip()
         data = json.loads(text)
         
@@ -767,19 +788,18 @@ async def get_city_info(city: str, country: str, current_user: Optional[User] =
 
 
 
-async def robust_fetch(client, url):
+async def robust_fetch(client, url, timeout: float = None, insecure: bool = False):
     try:
-        response = await client.get(url)
-        if response.status_code in [301, 302, 307, 308]:
-             response = await client.get(response.headers["Location"])
-        return response
+        # Scheduled through the crawl frontier (politeness, breaker, adaptive timeout).
+        # Redirects are followed by the shared client (follow_redirects=True).
+        return await get_frontier().fetch(url, timeout=timeout, insecure=insecure)
     except Exception as e:
         print(f"Fetch error {url}: {e}")
         return None
 
-async def smart_scrape_outlet(outlet: NewsOutlet, category: str, timeframe: str = "24h", log_bus: any = None, api_key: str = None, scraper_rule_config: dict = None) -> dict:
+async def smart_scrape_outlet(outlet: NewsOutlet, category: str, timeframe: str = "24h", log_bus: any = None, api_key: str = None, scraper_rule_config: dict = None, scraper_rule: scraper_engine.ScraperRule = None) -> dict:
     print(f"DEBUG: smart_scrape_outlet called for {outlet.url}")
-    with open("stream_debug.log", "a") as f: f.write(f"START_SCRAPE: {outlet.url}\n")
+    dlog("START_SCRAPE", url=outlet.url, outlet=outlet.name)
     """
     Fetches content from an outlet, intelligently navigating to the category page if possible.
     Returns structured article data and raw text for AI.
@@ -788,14 +808,13 @@ async def smart_scrape_outlet(outlet: NewsOutlet, category: str, timeframe: str
     async def log(msg: str):
          ts = datetime.now().strftime("%H:%M:%S")
          full_msg = f"[{ts}] {msg}"
-         try:
-             with open("stream_debug.log", "a") as f: f.write(f"SCRAPER-DEBUG: {full_msg}\n")
-         except: pass
+         dlog("SCRAPER", msg, outlet=outlet.name)
          if log_bus:
               await log_bus(full_msg)
          print(full_msg)
          
     await log(f"STARTING SCRAPE for {outlet.name} ({outlet.url})")
+    fetch_stats = {} # Deep-scan streaming counters (bytes read/saved, early stops)
     timeline_events = []
     timeline_events.append({"type": "init", "start": time.time(), "label": "Init Scraper"})
 
@@ -805,114 +824,131 @@ async def smart_scrape_outlet(outlet: NewsOutlet, category: str, timeframe: str
         "User-Agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
     }
     
-    async with httpx.AsyncClient(follow_redirects=True, timeout=20, headers=ROBUST_HEADERS) as client:
-        # 1. Fetch Homepage
-        timeline_events.append({"type": "fetch", "start": time.time(), "label": "Fetch Homepage"})
-        t0_fetch = time.time()
-        await log(f"[{outlet.name}] Fetching homepage: {outlet.url}")
-        resp = await robust_fetch(client, outlet.url)
-        if not resp or resp.status_code != 200:
-            code = resp.status_code if resp else "ERR"
-            await log(f"Failed to fetch {target_url}: {code}")
-            return {"articles": [], "raw_text": ""}
-        
-        html_content = resp.text
-        # Encoding fix
-        if resp.encoding and resp.encoding.lower() not in ['utf-8', 'iso-8859-1']:
-             try:
-                 html_content = resp.content.decode(resp.encoding)
-             except:
-                 pass # Fallback to .text auto-decode
-        
-        await log(f"Fetched {len(html_content)} bytes (Encoding: {resp.encoding or 'auto'})")
-        timeline_events[-1]["end"] = time.time() # End Fetch
-        
-        t0_parse = time.time()
-        timeline_events.append({"type": "parse", "start": t0_parse, "label": "Parse Basic"})
-        
-        final_url = outlet.url
-        # Limit HTML size to prevent CPU blocking on huge pages
-        html = resp.text[:200000] 
-        soup = BeautifulSoup(html, 'html.parser')
-        candidates = []
-        seen_urls = set()
-        links_found = soup.find_all('a', href=True)
-        with open("stream_debug.log", "a") as f: f.write(f"EXTRACT: Found {len(links_found)} raw <a> tags in {outlet.url}\n")
-        timeline_events[-1]["end"] = time.time()
-
-        # 2. Try to find Category Link (Universal AI Discovery)
-        discovered_cat_url = None
-        # Default keywords for fallback filtering logic downstream
-        cat_keywords = [category.lower()]
-        
-        if category.lower() not in ["general", "all", "headline"] and api_key:
-             await log(f"[{outlet.name}] 🧠 Asking AI to find navigation link for '{category}'...")
-             discovered_cat_url = await scraper_engine.gemini_find_category_url(html_content, outlet.url, category, api_key)
-             
-             if discovered_cat_url:
-                 await log(f"[{outlet.name}] ✅ AI Found Link: {discovered_cat_url}")
-             else:
-                 await log(f"[{outlet.name}] ⚠️ AI could not identify a specific link. Falling back to homepage.")
-        
-        # 3. Construct URLs to Scrape
-        urls_to_scrape = []
-        if discovered_cat_url:
-            urls_to_scrape.append(discovered_cat_url)
-        else:
-            urls_to_scrape.append(outlet.url)
-            
-        await log(f"DEBUG: Active Scraping for {outlet.name}: {urls_to_scrape}")
-        
-        # --- NEW: SITEMAP STRATEGY ---
-        # Try to fetch fresh links from sitemap directly to augment discovery
-        
-        # Calculate days limit from timeframe
-        sitemap_days = 3 # default
-        if timeframe == "24h": sitemap_days = 1
-        elif timeframe == "3days": sitemap_days = 3
-        elif timeframe == "1week": sitemap_days = 7
-        elif timeframe == "1month": sitemap_days = 30
+    # 1. Fetch Homepage
+    timeline_events.append({"type": "fetch", "start": time.time(), "label": "Fetch Homepage"})
+    t0_fetch = time.time()
+    # Memoized canonical URL skips the redirect hop (http->https, non-www->www)
+    resolved_url = getattr(outlet, "resolved_url", None)
+    known_encoding = getattr(outlet, "encoding", None)
+    home_url = resolved_url or outlet.url
+    await log(f"[{outlet.name}] Fetching homepage: {home_url}")
+    # Conditional GET against the page cache (304 -> cached body + parse results)
+    resp = await page_cache.fetch_page(home_url, timeout=20, encoding=known_encoding)
+    if home_url != outlet.url and (not resp or resp.status_code != 200):
+        # Canonical URL stopped working: go back to the stored one and re-resolve
+        await log(f"[{outlet.name}] ⚠️ Canonical URL failed, refreshing from {outlet.url}")
+        resp = await page_cache.fetch_page(outlet.url, timeout=20, encoding=known_encoding)
+    if not resp or resp.status_code != 200:
+        code = resp.status_code if resp else "ERR"
+        await log(f"Failed to fetch {target_url}: {code}")
+        return {"articles": [], "raw_text": ""}
+    home_page = resp
+    
+    # Remember where the homepage really lives and which encoding it needed
+    resolution = {}
+    if resp.url != resolved_url:
+        resolution["resolved_url"] = resp.url
+    site_encoding = resp.encoding if resp.encoding and resp.encoding.lower() not in ("utf-8", "utf_8", "utf-8-sig", "ascii") else None
+    # An encoding that only came from the stored value proves nothing: don't save it back
+    if site_encoding != known_encoding and resp.encoding_source != "fallback":
+        resolution["encoding"] = site_encoding
+    if resp.from_cache:
+        await log(f"[{outlet.name}] ♻️ Homepage not modified (304), using cached copy")
+    
+    html_content = resp.text
+    
+    await log(f"Fetched {len(html_content)} bytes (Encoding: {resp.encoding or 'auto'})")
+    timeline_events[-1]["end"] = time.time() # End Fetch
+    
+    t0_parse = time.time()
+    timeline_events.append({"type": "parse", "start": t0_parse, "label": "Parse Basic"})
+    
+    final_url = home_page.url
+    # Only AI navigation needs the tree here (lazy: built on first use). Links and text come from the parse pool.
+    home_doc = scraper_engine.ParsedDocument(html_content, final_url)
+    timeline_events[-1]["end"] = time.time()
+
+    # 2. Try to find Category Link (Universal AI Discovery)
+    discovered_cat_url = None
+    # Default keywords for fallback filtering logic downstream
+    cat_keywords = [category.lower()]
+    
+    if category.lower() not in ["general", "all", "headline"] and api_key:
+         await log(f"[{outlet.name}] 🧠 Asking AI to find navigation link for '{category}'...")
+         discovered_cat_url = await scraper_engine.gemini_find_category_url(home_doc, final_url, category, api_key)
+         
+         if discovered_cat_url:
+             await log(f"[{outlet.name}] ✅ AI Found Link: {discovered_cat_url}")
+         else:
+             await log(f"[{outlet.name}] ⚠️ AI could not identify a specific link. Falling back to homepage.")
+    
+    # 3. Construct URLs to Scrape
+    urls_to_scrape = []
+    if discovered_cat_url:
+        urls_to_scrape.append(discovered_cat_url)
+    else:
+        urls_to_scrape.append(final_url)
         
-        sitemap_links = []
-        print(f"DEBUG: Entering sitemap check for {outlet.name}")
-        try:
-             await log(f"[{outlet.name}] 🗺️ Checking sitemap...")
-             # Timebox sitemap fetching to prevent hangs
-             # sitemap_links = await asyncio.wait_for(
-             #    scraper_engine.fetch_sitemap_urls(outlet.url, days_limit=sitemap_days), 
-             #    timeout=15.0
-             # )
-             print("DEBUG: Sitemap disabled.")
-             print(f"DEBUG: Sitemap links count: {len(sitemap_links)}")
-             if sitemap_links:
-                 await log(f"[{outlet.name}] 🗺️ Found {len(sitemap_links)} links via Sitemap")
-        except asyncio.TimeoutError:
-             print(f"DEBUG: Sitemap timeout for {outlet.name}")
-             await log(f"[{outlet.name}] ⚠️ Sitemap fetch timed out. Skipping.")
-        except Exception as e: 
-             print(f"DEBUG: Sitemap error for {outlet.name}: {e}")
-             # await log(f"DEBUG: Sitemap error: {e}")
-             pass
-        
-        candidates_map = {} 
-        
-        # Process Sitemap Links directly
-        if sitemap_links:
-            await log(f"  -> Processing {len(sitemap_links)} sitemap entries...")
-            for s_url in sitemap_links:
-                # Basic metadata creation
-                s_date_str = None
-                date_obj = scraper_engine.extract_date_from_url(s_url)
-                if date_obj: s_date_str = date_obj.strftime("%Y-%m-%d")
-                
-                # Add to map
-                candidates_map[s_url] = ArticleMetadata(
-                    source=outlet.name,
-                    # Prettify Title (Slug -> Title Case)
-                    title=s_url.rstrip('/').split('/')[-1].replace('-', ' ').replace('_', ' ').title() or "Untitled Article",
-                    url=s_url,
-                    date_str=s_date_str
-                ) 
+    await log(f"DEBUG: Active Scraping for {outlet.name}: {urls_to_scrape}")
+    
+    # --- NEW: SITEMAP STRATEGY ---
+    # Try to fetch fresh links from sitemap directly to augment discovery
+    
+    # Calculate days limit from timeframe
+    sitemap_days = 3 # default
+    if timeframe == "24h": sitemap_days = 1
+    elif timeframe == "3days": sitemap_days = 3
+    elif timeframe == "1week": sitemap_days = 7
+    elif timeframe == "1month": sitemap_days = 30
+    
+    sitemap_links = []
+    print(f"DEBUG: Entering sitemap check for {outlet.name}")
+    try:
+         await log(f"[{outlet.name}] 🗺️ Checking sitemap...")
+         # Timebox sitemap fetching to prevent hangs
+         # sitemap_links = await asyncio.wait_for(
+         #    scraper_engine.fetch_sitemap_urls(outlet.url, days_limit=sitemap_days), 
+         #    timeout=15.0
+         # )
+         print("DEBUG: Sitemap disabled.")
+         print(f"DEBUG: Sitemap links count: {len(sitemap_links)}")
+         if sitemap_links:
+             await log(f"[{outlet.name}] 🗺️ Found {len(sitemap_links)} links via Sitemap")
+    except asyncio.TimeoutError:
+         print(f"DEBUG: Sitemap timeout for {outlet.name}")
+         await log(f"[{outlet.name}] ⚠️ Sitemap fetch timed out. Skipping.")
+    except Exception as e: 
+         print(f"DEBUG: Sitemap error for {outlet.name}: {e}")
+         # await log(f"DEBUG: Sitemap error: {e}")
+         pass
+    
+    candidates_map = {} 
+    
+    # Links deep-scanned in earlier runs (cross-run, persisted per outlet)
+    seen_filters = seen_filter.get_seen_filters()
+    seen = seen_filters.for_outlet(outlet.url)
+    
+    # URL shapes learned from this outlet's deep-scan history (article vs category, date position)
+    templates = await url_templates.get_outlet_templates(outlet.url)
+    today_ord = datetime.now().date().toordinal()
+    
+    # Process Sitemap Links directly
+    if sitemap_links:
+        await log(f"  -> Processing {len(sitemap_links)} sitemap entries...")
+        for s_url in sitemap_links:
+            # Basic metadata creation
+            s_date_str = None
+            date_obj = scraper_engine.extract_date_from_url(s_url)
+            if date_obj: s_date_str = date_obj.strftime("%Y-%m-%d")
+            
+            # Add to map
+            candidates_map[s_url] = ArticleMetadata(
+                source=outlet.name,
+                # Prettify Title (Slug -> Title Case)
+                title=s_url.rstrip('/').split('/')[-1].replace('-', ' ').replace('_', ' ').title() or "Untitled Article",
+                url=s_url,
+                date_str=s_date_str
+            ) 
     
     # 3. Scrape All Candidates
     # import asyncio (removed to prevent shadowing)
@@ -933,47 +969,47 @@ async def smart_scrape_outlet(outlet: NewsOutlet, category: str, timeframe: str
 
         await log(f"[{outlet.name}] 🕵️ Deep Scan: {target_url}")
         
-        resp = None
-        async with httpx.AsyncClient(follow_redirects=True, timeout=15.0, headers=ROBUST_HEADERS) as client:
-             try:
-                 resp = await client.get(target_url)
-                 if resp.status_code != 200:
-                     await log(f"  -> Failed {resp.status_code}")
-                     continue 
-             except Exception as e:
-                 await log(f"  -> Fetch Error: {e}")
-                 continue 
-        
+        # Homepage was fetched above - don't download it twice in the same run
+        if target_url == final_url:
+            resp = home_page
+        else:
+            resp = await page_cache.fetch_page(target_url, timeout=15.0, encoding=site_encoding)
+
         # Valid response check
         if not resp: 
-             await log(f"  -> Resp is None, skipping.")
+             await log(f"  -> Fetch Error, skipping.")
              continue
-        
-        await log(f"  -> Got {len(resp.text)} chars.")
-        
-        # NOTE: Removed the second 'try/log/async with' block that was here.
-        # Now proceeding to parsing...
-                
-        # Parse
-        soup = BeautifulSoup(resp.text, 'html.parser')
-        text = soup.get_text(separator=' ', strip=True)
+        if resp.status_code != 200:
+            await log(f"  -> Failed {resp.status_code}")
+            continue 
+        
+        await log(f"  -> Got {len(resp.text)} chars{' (cached, 304)' if resp.from_cache else ''}.")
+        
+        cached = resp.derived if resp.from_cache else {}
+        if "links" in cached and "text" in cached:
+            # Not modified since last run: reuse previous parse results
+            text = cached["text"]
+            extracted_items = cached["links"]
+            await log(f"  -> Reused {len(extracted_items)} cached links (skipped parse).")
+        else:
+            # Parse in the worker pool (once - text and links share the same document)
+            await log(f"  -> Calling extract_article_links...")
+            parsed = await parse_pool.parse_listing(resp.text, target_url)
+            text = parsed["text"]
+            extracted_items = parsed["links"]
+            if resp is home_page:
+                dlog("EXTRACT", url=outlet.url, raw_links=parsed['raw_links'])
+            await log(f"  -> Extracted {len(extracted_items)} raw links via Engine.")
+            await page_cache.store_derived(resp, links=extracted_items, text=text)
         
         # Truncate to avoid exploding token context
         combined_content += f"\n--- SOURCE: {outlet.name} [{target_url}] ---\n{text[:10000]}\n"
         
-        # LEGACY LOOP REMOVED - Relying on Standardized Engine
-        await log("  -> Legacy loop bypassed. Proceeding to Engine Extraction.")
-
-        # Standardized Link Extraction
-        await log(f"  -> Calling extract_article_links...")
-        extracted_items = scraper_engine.extract_article_links(resp.text, target_url)
-        await log(f"  -> Extracted {len(extracted_items)} raw links via Engine.")
-        
-        # Rule Object Init (Reuse or Fetch from DB)
-        rule_obj = None
+        # Rule Object Init (Reuse or Fetch from Registry)
+        rule_obj = scraper_rule
         
         # 1. Use Override if provided (Testing)
-        if scraper_rule_config:
+        if rule_obj is None and scraper_rule_config:
               rule_obj = scraper_engine.ScraperRule(
                   domain="custom",
                   date_selectors=scraper_rule_config.get('date_selectors'),
@@ -983,38 +1019,35 @@ async def smart_scrape_outlet(outlet: NewsOutlet, category: str, timeframe: str
                   use_data_layer=scraper_rule_config.get('use_data_layer', True),
                   data_layer_var=scraper_rule_config.get('data_layer_var', "dataLayer")
               )
-        # 2. Fetch from DB if not provided (Persistence)
-        else:
+        # 2. Look up the compiled registry if not provided (Persistence)
+        elif rule_obj is None:
             try:
-                domain_key = target_url.split("//")[-1].split("/")[0].replace("www.", "")
-                # ScraperRule is already imported from models
-                db_rule = db.query(ScraperRule).filter(ScraperRule.domain == domain_key).first()
-                if db_rule:
-                    rule_obj = scraper_engine.ScraperRule(
-                        domain=db_rule.domain,
-                        date_selectors=db_rule.date_selectors,
-                        date_regex=db_rule.date_regex,
-                        # Pass title selectors from DB for persistence
-                        title_selectors=db_rule.title_selectors,
-                        use_json_ld=db_rule.use_json_ld,
-                        use_data_layer=db_rule.use_data_layer,
-                        data_layer_var=db_rule.data_layer_var
-                    )
-                    # print(f"DEBUG: Loaded Persisted Rule for {domain_key}: {db_rule.title_selectors}")
+                rule_obj = (await get_rule_registry()).get(target_url)
             except Exception as e:
-                print(f"Failed to load ScraperRule from DB: {e}")
+                print(f"Failed to load ScraperRule from registry: {e}")
 
         # Separate items needing scan vs ready items
         items_to_scan = []
+        template_rejects = 0
+        template_dates = 0
         
         for item in extracted_items:
             full_url = item['url']
             raw_title = item['title']
             
-            # Initial Date Check
+            # Learned URL template: category shapes never reach a deep scan
+            tpl_kind, tpl_date, _ = templates.lookup(full_url, today_ord)
+            if tpl_kind == "category":
+                template_rejects += 1
+                continue
+            
+            # Initial Date Check (URL slug, then the date the template implies)
             found_date_str = None
             url_date_obj = scraper_engine.extract_date_from_url(full_url)
             if url_date_obj: found_date_str = url_date_obj.strftime("%Y-%m-%d")
+            elif tpl_date:
+                found_date_str = tpl_date
+                template_dates += 1
             
             clean_rt = raw_title.strip()
             is_bad_title = clean_rt.isdigit() or len(clean_rt) < 5 or (len(clean_rt) < 15 and clean_rt.replace(" ","").isdigit())
@@ -1049,48 +1082,91 @@ async def smart_scrape_outlet(outlet: NewsOutlet, category: str, timeframe: str
                         date_str=found_date_str
                     )
 
-        # Parallel Worker
-        sem = asyncio.Semaphore(5) # max 5 concurrent scans
-        
+        if template_rejects or template_dates:
+            fetch_stats["non_articles"] = fetch_stats.get("non_articles", 0) + template_rejects
+            await log(f"  -> URL templates: {template_rejects} category links dropped, {template_dates} dates implied (no deep scan).")
+
+        # Consult the deep-scan cache first (publication dates never change),
+        # but only for links the outlet's seen-filter says may have been scanned before
+        cached_results = []
+        if items_to_scan:
+            maybe_seen, new_urls = seen_filter.partition(seen, [it["url"] for it in items_to_scan])
+            cache_hits = await deep_scan_cache.get_many(maybe_seen)
+            remaining = []
+            for it in items_to_scan:
+                hit = cache_hits.get(it["url"])
+                if hit is None:
+                    remaining.append(it)
+                else:
+                    cached_results.append((it["url"], hit["title"] or it["title"], it["date"] or hit["date"], hit.get("content_type")))
+            seen_filter.record(seen, cache_hits, false_positives=len(maybe_seen) - len(cache_hits) if seen.warm else 0)
+            await log(f"  -> Deep-scan cache: {len(cached_results)}/{len(items_to_scan)} hits, {len(remaining)} to fetch ({len(new_urls)} new links skipped the lookup).")
+            items_to_scan = remaining
+
+        # Parallel Worker (concurrency + per-domain pacing handled by the crawl frontier)
+        scanned_for_cache = []
+
         async def process_deep_scan_safe(item):
-            async with sem:
-                full_url = item["url"]
-                raw_title = item["title"]
-                found_date_str = item["date"]
-                is_bad_title = item["is_bad_title"]
-                
-                ev = {"type": "deep_scan", "start": time.time(), "label": f"Deep Scan: {full_url.split('/')[-1][:20]}"}
-                timeline_events.append(ev)
-                
-                try:
-                    await asyncio.sleep(0.5) 
-                    async with httpx.AsyncClient(headers=ROBUST_HEADERS, verify=False, timeout=15, follow_redirects=True) as s_client:
-                         s_resp = await s_client.get(full_url)
-                         if s_resp.status_code == 200:
-                             effective_rule = rule_obj or scraper_engine.ScraperRule(domain="fallback", use_json_ld=True, use_data_layer=True)
-                             
-                             # Extract Date
-                             if not found_date_str:
-                                 found_date_str = scraper_engine.extract_date_from_html(s_resp.text, full_url, custom_rule_override=effective_rule)
-                             
-                             # Extract Title (Deep Scan Override)
-                             # Unconditional Deep Extraction (Matches Test Mode Behavior)
-                             deep_title = scraper_engine.extract_title_from_html(s_resp.text, full_url, custom_rule_override=effective_rule)
-                             
-                             if deep_title:
-                                 raw_title = deep_title
-                except: pass
-                
-                ev["end"] = time.time()
-                return (full_url, raw_title, found_date_str)
+            full_url = item["url"]
+            raw_title = item["title"]
+            found_date_str = item["date"]
+            is_bad_title = item["is_bad_title"]
+            content_type = None
+            
+            ev = {"type": "deep_scan", "start": time.time(), "label": f"Deep Scan: {full_url.split('/')[-1][:20]}"}
+            timeline_events.append(ev)
+            
+            try:
+                # Streamed read: stop at </head> (or JSON-LD datePublished) unless we need the body
+                async with stream_fetch.open_page(full_url, timeout=15, stats=fetch_stats, encoding=site_encoding, insecure=True) as page:
+                    if page.status_code == 200:
+                        effective_rule = rule_obj or scraper_engine.ScraperRule(domain="fallback", use_json_ld=True, use_data_layer=True)
+                        needs_body = bool(effective_rule.date_selectors or effective_rule.date_regex or effective_rule.title_selectors)
+                        page_html = await (page.read_all() if needs_body else page.read_until())
+                        # One parse for date + title + content type, in the worker pool
+                        # (Unconditional Deep Extraction of the title - Matches Test Mode Behavior)
+                        parsed = await parse_pool.parse_article(page_html, full_url, rule=effective_rule, full_page=needs_body or page.exhausted)
+                        page_date = found_date_str or parsed["date"]
+                        deep_title = parsed["title"]
+                        
+                        # Head-only miss: no date, or no og:title (h1 in the body outranks <title>),
+                        # or the head doesn't say og:type=article - then measure the body
+                        # (link density, paragraphs) so landing/category pages can be dropped
+                        if not page.exhausted and (not page_date or "og:title" not in page_html or parsed["content_type"] != "article"):
+                            page_html = await page.read_all()
+                            parsed = await parse_pool.parse_article(page_html, full_url, rule=effective_rule, full_page=True)
+                            page_date = found_date_str or parsed["date"]
+                            deep_title = parsed["title"]
+                        
+                        found_date_str = page_date
+                        content_type = parsed["content_type"]
+                        if deep_title:
+                            raw_title = deep_title
+                        scanned_for_cache.append((full_url, raw_title, found_date_str, content_type))
+            except: pass
+            
+            ev["end"] = time.time()
+            return (full_url, raw_title, found_date_str, content_type)
 
         # Execute Parallel
         tasks = [process_deep_scan_safe(i) for i in items_to_scan]
+        scan_results = []
         if tasks:
-            await log(f"Launching {len(tasks)} parallel deep scans (5 concurrent)...")
+            await log(f"Launching {len(tasks)} parallel deep scans (via crawl frontier)...")
             scan_results = await asyncio.gather(*tasks)
-            
-            for res_url, res_title, res_date in scan_results:
+            await deep_scan_cache.put_many(scanned_for_cache)
+            seen_filter.record(seen, [r[0] for r in scanned_for_cache])
+            if scanned_for_cache:
+                url_templates.invalidate(outlet.url) # relearn with the new history next run
+
+        if scan_results or cached_results:
+            non_articles = 0
+            for res_url, res_title, res_date, res_type in list(scan_results) + cached_results:
+                 if res_type == "category":
+                     # Landing/section page: never reaches AI verification
+                     candidates_map.pop(res_url, None)
+                     non_articles += 1
+                     continue
                  if res_url in candidates_map:
                      c = candidates_map[res_url]
                      if res_date: c.date_str = res_date
@@ -1102,8 +1178,15 @@ async def smart_scrape_outlet(outlet: NewsOutlet, category: str, timeframe: str
                         url=res_url,
                         date_str=res_date
                      )
+            if non_articles:
+                fetch_stats["non_articles"] = fetch_stats.get("non_articles", 0) + non_articles
+                await log(f"[{outlet.name}] 🗂️ Dropped {non_articles} category/landing pages before AI verification")
 
     all_extracted_articles = list(candidates_map.values())
+    seen_filters.save(outlet.url)
+
+    if fetch_stats.get("pages"):
+        await log(f"[{outlet.name}] 📉 Deep scans read {fetch_stats.get('bytes_read', 0) // 1024} KB, saved {fetch_stats.get('bytes_saved', 0) // 1024} KB ({fetch_stats.get('early_stops', 0)}/{fetch_stats['pages']} stopped early)")
 
     # Return aggregated result (matching the expected dict structure)
 
@@ -1111,7 +1194,9 @@ async def smart_scrape_outlet(outlet: NewsOutlet, category: str, timeframe: str
     return {
         "text": combined_content,
         "articles": all_extracted_articles,
-        "timeline_events": timeline_events
+        "timeline_events": timeline_events,
+        "fetch_stats": fetch_stats,
+        "resolution": resolution
     }
 
 async def generate_keyword_analysis(text: str, category: str, current_user: User) -> List[KeywordData]:
@@ -1121,7 +1206,6 @@ async def generate_keyword_analysis(text: str, category: str, current_user: User
 
     api_key = current_user.gemini_api_key
     if not api_key: return []
-    genai.configure(api_key=api_key)
 
     # Truncate to avoid context limits if very large
     text_sample = text[:30000]
@@ -1152,8 +1236,7 @@ async def generate_keyword_analysis(text: str, category: str, current_user: User
     """
 
     try:
-        model = genai.GenerativeModel('gemini-flash-latest')
-        response = await model.generate_content_async(prompt)
+        response = await llm_scheduler.generate(api_key, 'gemini-flash-latest', prompt)
         text = response.text.replace("```json", "").replace("```", "").strip()
         data = json.loads(text)
         
@@ -1197,9 +1280,6 @@ async def save_digest(
     if current_user.gemini_api_key and (not final_title or "digest" in final_title.lower() or "report" in final_title.lower()) and len(digest.summary_markdown) > 50:
         try:
             print(f"DEBUG: Generating AI Title for digest...")
-            import google.generativeai as genai # Ensure import
-            genai.configure(api_key=current_user.gemini_api_key)
-            model_title = genai.GenerativeModel('gemini-1.5-flash')
             
             title_prompt = f"""
             Generate a short, 3-7 word newspaper-style headline for this news summary.
@@ -1212,7 +1292,7 @@ async def save_digest(
             Headline:
             """
             
-            title_resp = await model_title.generate_content_async(title_prompt)
+            title_resp = await llm_scheduler.generate(current_user.gemini_api_key, 'gemini-1.5-flash', title_prompt)
             ai_title = title_resp.text.strip().replace('"', '').replace("**", "").replace("Headline:", "").strip()
             if ai_title and len(ai_title) < 100:
                final_title = ai_title
@@ -1650,11 +1730,9 @@ async def translate_public_digest_articles(slug: str, db: Session = Depends(get_
         
     # AI Translation
     try:
-        genai.configure(api_key=owner.gemini_api_key)
-        model = genai.GenerativeModel('gemini-1.5-flash')
-        
         prompt = "Translate these news headlines to English. Return a JSON list of strings." + json.dumps(to_translate)
-        resp = await model.generate_content_async(prompt, generation_config={"response_mime_type": "application/json"})
+        resp = await llm_scheduler.generate(owner.gemini_api_key, 'gemini-1.5-flash', prompt, priority=llm_scheduler.PRIORITY_BACKGROUND,
+                                            generation_config={"response_mime_type": "application/json"})
         translations = json.loads(resp.text)
         
         if len(translations) != len(to_translate):
@@ -1684,9 +1762,6 @@ async def verify_relevance_with_ai(title: str, url: str, category: str, api_key:
     Returns True if relevant, False otherwise.
     """
     try:
-        genai.configure(api_key=api_key)
-        model = genai.GenerativeModel('gemini-2.0-flash-exp')
-        
         prompt = f"""
         Analyze if the following news article is relevant to the category '{category}'.
         Input is likely in French, Romanian, or English. Do NOT reject based on language.
@@ -1703,7 +1778,7 @@ async def verify_relevance_with_ai(title: str, url: str, category: str, api_key:
         Respond with exactly ONE word: TRUE or FALSE.
         """
         
-        response = await model.generate_content_async(prompt)
+        response = await llm_scheduler.generate(api_key, 'gemini-2.0-flash-exp', prompt, priority=llm_scheduler.PRIORITY_INTERACTIVE)
         ans = response.text.strip().upper()
         return "TRUE" in ans
     except Exception as e:
@@ -1739,7 +1814,6 @@ async def _summarize_internal_logic(req: SummarizeRequest, current_user: User):
     if not api_key:
         raise HTTPException(status_code=400, detail="Missing Gemini API Key. Please set it in Settings.")
         
-    genai.configure(api_key=api_key)
     # Model Fallback Strategy (Updated aliases)
     # Model Fallback Strategy (Updated aliases)
     MODELS_TO_TRY = [
@@ -1827,8 +1901,7 @@ async def _summarize_internal_logic(req: SummarizeRequest, current_user: User):
         for model_name in MODELS_TO_TRY:
             try:
                 print(f"DEBUG: [Chunk {chunk_idx}] Trying model {model_name}...")
-                model = genai.GenerativeModel(model_name)
-                response = await model.generate_content_async(prompt)
+                response = await llm_scheduler.generate(api_key, model_name, prompt)
                 
                 # Handle TRIGGERED SAFETY FILTERS (Empty Text)
                 try:
@@ -1902,8 +1975,7 @@ async def _summarize_internal_logic(req: SummarizeRequest, current_user: User):
         reply = None
         for model_name in MODELS_TO_TRY:
             try:
-                model = genai.GenerativeModel(model_name)
-                consolidation_response = await model.generate_content_async(synthesis_prompt)
+                consolidation_response = await llm_scheduler.generate(api_key, model_name, synthesis_prompt)
                 reply = consolidation_response.text.strip()
                 break
             except Exception as e:
@@ -1961,12 +2033,12 @@ async def generate_analytics(req: AnalyticsRequest, current_user: User = Depends
     if not api_key:
         raise HTTPException(status_code=400, detail="Missing Gemini API Key. Please set it in Settings.")
         
-    genai.configure(api_key=api_key)
     # Use standard stable model
     # Primary Model (Legacy Alias - Known Working)
-    model_primary = genai.GenerativeModel('gemini-flash-latest', generation_config={"response_mime_type": "application/json"})
+    model_primary = 'gemini-flash-latest'
     # Fallback Model (Standard)
-    model_fallback = genai.GenerativeModel('gemini-1.5-flash', generation_config={"response_mime_type": "application/json"})
+    model_fallback = 'gemini-1.5-flash'
+    json_config = {"response_mime_type": "application/json"}
     
     # Remove Article Cap; Use MapReduce
     BATCH_SIZE = 50 
@@ -1993,10 +2065,10 @@ async def generate_analytics(req: AnalyticsRequest, current_user: User = Depends
         try:
             print(f"Analytics Batch {batch_idx}: Sending prompt to LLM (Primary)...")
             try:
-                response = await model_primary.generate_content_async(prompt)
+                response = await llm_scheduler.generate(api_key, model_primary, prompt, generation_config=json_config)
             except Exception as e_prim:
                 print(f"Analytics Batch {batch_idx}: Primary model failed ({e_prim}). Trying fallback...")
-                response = await model_fallback.generate_content_async(prompt)
+                response = await llm_scheduler.generate(api_key, model_fallback, prompt, generation_config=json_config)
                 
             text = response.text
             print(f"Analytics Batch {batch_idx}: LLM Response (First 100 chars): {text[:100]}...")
@@ -2099,11 +2171,64 @@ async def generate_analytics(req: AnalyticsRequest, current_user: User = Depends
         "debug_errors": debug_errors
     }
 
+# --- Outlet Duration History (LPT scheduling) ---
+SCRAPE_DURATION_ALPHA = 0.3 # EWMA weight of the newest run
+
+def order_outlets_longest_first(outlets):
+    """
+    Longest-expected-first ordering so a slow outlet doesn't start last and set the tail.
+    Outlets without history are estimated at the median of the known ones.
+    """
+    known = sorted(o.avg_scrape_seconds for o in outlets if o.avg_scrape_seconds)
+    default = known[len(known) // 2] if known else 0.0
+    return sorted(outlets, key=lambda o: o.avg_scrape_seconds or default, reverse=True)
+
+async def record_outlet_history(durations: dict, resolutions: dict = None):
+    """
+    Persists per-outlet scrape history in one session:
+    - durations {outlet_id: seconds} -> NewsOutlet.avg_scrape_seconds (rolling average)
+    - resolutions {outlet_id: {"resolved_url"?, "encoding"?}} -> memoized canonical URL / encoding
+    """
+    resolutions = resolutions or {}
+    ids = set(durations) | set(resolutions)
+    if not ids: return
+    try:
+        async with AsyncSessionLocal() as session:
+            result = await session.execute(select(NewsOutlet).where(NewsOutlet.id.in_(list(ids))))
+            for o in result.scalars().all():
+                d = durations.get(o.id)
+                if d is not None:
+                    if o.avg_scrape_seconds is None:
+                        o.avg_scrape_seconds = d
+                    else:
+                        o.avg_scrape_seconds = (1 - SCRAPE_DURATION_ALPHA) * o.avg_scrape_seconds + SCRAPE_DURATION_ALPHA * d
+                for field, value in resolutions.get(o.id, {}).items():
+                    setattr(o, field, value)
+            await session.commit()
+    except Exception as e:
+        print(f"Failed to store outlet history: {e}")
+
+# Digest timeframe -> (days shown as fresh, days after which an article is discarded: ~5x the timeframe)
+DIGEST_TIMEFRAME_DAYS = {"24h": (1, 5), "3days": (3, 14), "1week": (7, 30), "1month": (30, 60)}
+
+
+def digest_cutoffs(timeframe: str, now: datetime = None) -> tuple:
+    """
+    (cutoff_date, hard_cutoff_date) for a digest timeframe: older than cutoff_date
+    is marked stale (red), older than hard_cutoff_date is dropped. Unknown timeframes use 24h.
+    """
+    fresh_days, hard_days = DIGEST_TIMEFRAME_DAYS.get(timeframe, DIGEST_TIMEFRAME_DAYS["24h"])
+    now = now or datetime.now()
+    return now - timedelta(days=fresh_days), now - timedelta(days=hard_days)
+
+
 @router.post("/outlets/digest/stream")
 async def generate_digest_stream(req: DigestRequest, current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
     # Streams log updates and final result as NDJSON.
     
     async def process_stream():
+        # Correlation ID for every debug record of this run (inherited by the worker tasks)
+        start_run("digest")
         # Queue for cross-task communication
         stream_queue = asyncio.Queue()
         
@@ -2114,55 +2239,59 @@ async def generate_digest_stream(req: DigestRequest, current_user: User = Depend
         yield json.dumps({"type": "log", "message": "Initializing Secure Pipeline..."}) + "\n"
         
         # SESSION FIX: Create local session for stream lifespan
-        rules_map = {}
+        rule_registry = None
         outlets = []
         
-        # Stream-level Deduplication State
+        # Stream-level Deduplication State (url_key + title fingerprints per outlet batch;
+        # titles and url keys of articles already yielded)
         stream_seen_fingerprints = set()
+        stream_yielded = set()
+        # Syndicated stories across outlets: near-duplicates join the first copy as alternate sources
+        stream_near_dups = NearDupIndex()
+        stream_representatives = {}
+
+        def clusterable(art) -> bool:
+            # Only articles the final filter keeps (not spam, not past the hard cutoff) may become
+            # representatives: a representative dropped there would take its alternates with it
+            if not isinstance(art, ArticleMetadata) or art.is_spam or spam_index.match(art.url, art.title):
+                return False
+            if art.date_str:
+                try:
+                    if datetime.strptime(art.date_str, "%Y-%m-%d") < digest_cutoffs(req.timeframe)[1]:
+                        return False
+                except ValueError:
+                    pass
+            return True
         
         try:
              # Explicit internal imports to prevent any scope weirdness
              import traceback
-             import hashlib # Added for deduplication fingerprinting
              from sqlalchemy import select
-             from models import NewsOutlet, ScraperRule
+             from models import NewsOutlet
              
              async with AsyncSessionLocal() as session:
-                 with open("stream_debug.log", "a") as f: f.write(f"\n=== STREAM INIT IDS: {req.outlet_ids} ===\n")
+                 dlog("STREAM_INIT", outlet_ids=req.outlet_ids, category=req.category, timeframe=req.timeframe, user_id=current_user.id)
                  
                  # 1. Fetch Outlets
                  stmt = select(NewsOutlet).where(NewsOutlet.id.in_(req.outlet_ids))
                  result = await session.execute(stmt)
                  outlets = result.scalars().all()
                  
-                 with open("stream_debug.log", "a") as f: f.write(f"DEBUG: Found {len(outlets)} outlets.\n")
+                 dlog("STREAM_OUTLETS", outlets=len(outlets))
                  
                  if not outlets:
                       yield json.dumps({"type": "error", "message": "No outlets found"}) + "\n"
                       return
     
-                 # 2. Fetch Spam Rules (User Feedback)
-                 from models import SpamFeedback
-                 stmt_spam = select(SpamFeedback)
-                 res_spam = await session.execute(stmt_spam)
-                 spam_records = res_spam.scalars().all()
+                 # 2. Spam Rules (User Feedback; in-memory index kept current by /feedback/spam)
+                 spam_index = await get_spam_index()
                  
-                 spam_urls = {s.url for s in spam_records if s.url}
-                 spam_titles_lower = {s.title.lower() for s in spam_records if s.title}
-                 
-                 yield json.dumps({"type": "log", "message": f"Loaded {len(spam_records)} spam signatures..."}) + "\n"
+                 yield json.dumps({"type": "log", "message": f"Loaded {len(spam_index)} spam signatures..."}) + "\n"
 
-                 # 3. Fetch Scraper Rules
-                 stmt_rules = select(ScraperRule)
-                 res_rules = await session.execute(stmt_rules)
-                 all_rules = res_rules.scalars().all()
-                 
-                 for r in all_rules:
-                     try:
-                         rules_map[r.domain] = json.loads(r.config_json)
-                     except: pass
+                 # 3. Scraper Rules (compiled once per process, reloaded when /scraper/rules changes them)
+                 rule_registry = await get_rule_registry()
                  
-                 yield json.dumps({"type": "log", "message": f"Loaded {len(rules_map)} custom rules..."}) + "\n"
+                 yield json.dumps({"type": "log", "message": f"Loaded {len(rule_registry)} custom rules..."}) + "\n"
                  yield json.dumps({"type": "log", "message": f"Targeting {len(outlets)} sources..."}) + "\n"
                  
                  # EXPUNGE to allow usage after session closes
@@ -2176,47 +2305,53 @@ async def generate_digest_stream(req: DigestRequest, current_user: User = Depend
              except: err += " (Traceback failed)"
              
              print(err)
-             try:
-                 with open("stream_debug.log", "a") as f: f.write(err)
-             except: pass
+             dlog("DB_FETCH_ERROR", err, level=logging.ERROR)
              yield json.dumps({"type": "error", "message": f"System Error: {str(e)}"}) + "\n"
              return
         
         # WORKER FUNCTION
         async def scraper_worker():
             try:
-                with open("stream_debug.log", "a") as f: f.write("DEBUG: Worker Started (Parallel Mode).\n")
+                dlog("WORKER_START", mode="parallel")
                 
                 # Concurrency Limit (5 concurrent outlets)
                 sem = asyncio.Semaphore(5)
+                digest_fetch_stats = {}
+                scrape_durations = {} # outlet_id -> seconds (persisted for LPT ordering)
+                outlet_resolutions = {} # outlet_id -> changed resolved_url / encoding
                 
                 async def process_outlet(outlet):
                     async with sem:
                         try:
-                             with open("stream_debug.log", "a") as f: f.write(f"DEBUG: Processing {outlet.name}...\n")
-                             # Find Rule
-                             from urllib.parse import urlparse
-                             domain = urlparse(outlet.url).netloc.replace("www.", "").lower()
-                             rule_config = rules_map.get(domain)
-
-                             # Fallback check (e.g. root domain)
-                             if not rule_config:
-                                 parts = domain.split('.')
-                                 if len(parts) > 2:
-                                     root = ".".join(parts[-2:])
-                                     rule_config = rules_map.get(root)
+                             dlog("OUTLET_START", outlet=outlet.name, url=outlet.url)
+                             # Circuit breaker: don't burn a slot on an outlet that keeps failing
+                             health = get_domain_health()
+                             if outlet.url and health.is_open(outlet.url):
+                                  retry_in = int(health.retry_in(outlet.url))
+                                  dlog("BREAKER_SKIP", level=logging.WARNING, outlet=outlet.name, url=outlet.url, retry_in=retry_in)
+                                  await stream_queue.put({"type": "log", "message": f"⛔ Skipped {outlet.name}: site keeps failing (circuit open, retry in {retry_in}s)"})
+                                  return
+                             # Find Rule (domain, then root domain)
+                             outlet_rule = rule_registry.get(outlet.url)
 
                              # Verbose Log to Stream
-                             has_rule = "YES" if rule_config else "NO"
+                             has_rule = "YES" if outlet_rule else "NO"
                              await stream_queue.put({"type": "log", "message": f"Processing {outlet.name} (Rule: {has_rule})..."})
 
                              # Pass queue_logger which is Awaitable (not a generator)
                              # Pass current_user.gemini_api_key for AI Navigation
-                             res = await smart_scrape_outlet(outlet, req.category, req.timeframe, log_bus=queue_logger, api_key=current_user.gemini_api_key, scraper_rule_config=rule_config)
+                             t0_outlet = time.time()
+                             res = await smart_scrape_outlet(outlet, req.category, req.timeframe, log_bus=queue_logger, api_key=current_user.gemini_api_key, scraper_rule=outlet_rule)
+                             scrape_durations[outlet.id] = time.time() - t0_outlet
+                             if res.get("resolution"):
+                                  outlet_resolutions[outlet.id] = res["resolution"]
+                             for k, v in (res.get("fetch_stats") or {}).items():
+                                  digest_fetch_stats[k] = digest_fetch_stats.get(k, 0) + v
                                                      
                              if res.get("articles"):
                                   raw_arts = res["articles"]
                                   new_arts = []
+                                  near_dups = 0
                                   
                                   # STRICT DEDUPLICATION
                                   for art in raw_arts:
@@ -2224,19 +2359,12 @@ async def generate_digest_stream(req: DigestRequest, current_user: User = Depend
                                        title = art.get('title', '') if isinstance(art, dict) else getattr(art, 'title', '')
                                        url = art.get('url', '') if isinstance(art, dict) else getattr(art, 'url', '')
                                        
-                                       # Normalize: Strip whitespace, strip query params from URL
-                                       # Normalize: Strip whitespace, strip query params, strip protocol/www/trailing slash
-                                       import re
+                                       # Normalize: Strip whitespace, lowercase title; canonical 64-bit URL key
+                                       # (no protocol/www/tracking params/fragment/trailing slash)
                                        clean_title = str(title).strip().lower()
-                                       # Remove https://, http://, www.
-                                       clean_url = str(url).split('?')[0].split('#')[0].strip().lower()
-                                       clean_url = re.sub(r'^https?://(www\.)?', '', clean_url).strip('/')
-                                       
-                                       # Log for debug
-                                       # await stream_queue.put({"type": "log", "message": f"Dedupe Check: {clean_url}"})
                                        
                                        # Compute fingerprint
-                                       fp = hashlib.md5((clean_title + clean_url).encode()).hexdigest()
+                                       fp = (url_key(str(url)), clean_title)
                                        if fp in stream_seen_fingerprints:
                                             continue # Skip duplicate
                                        
@@ -2248,8 +2376,22 @@ async def generate_digest_stream(req: DigestRequest, current_user: User = Depend
                                        # Let's just restore deduplication for now.
                                        
                                        stream_seen_fingerprints.add(fp)
+                                       
+                                       # Near-duplicate of a story already kept (this or another outlet):
+                                       # attach as an alternate source, no AI slot, no extra row
+                                       if clusterable(art):
+                                            rep_key = stream_near_dups.add(fp, str(title))
+                                            if rep_key is not None:
+                                                 rep = stream_representatives[rep_key]
+                                                 rep.alternate_sources.append({"source": outlet.name, "url": str(url), "title": str(title)})
+                                                 near_dups += 1
+                                                 continue
+                                            stream_representatives[fp] = art
                                        new_arts.append(art)
                                   
+                                  if near_dups:
+                                       await stream_queue.put({"type": "log", "message": f"🔗 {outlet.name}: {near_dups} near-duplicate stories merged into earlier reports"})
+                                  
                                   if not new_arts:
                                        return # Nothing new from this source
                                   
@@ -2261,13 +2403,15 @@ async def generate_digest_stream(req: DigestRequest, current_user: User = Depend
                                        titles_map = {i: a.title for i, a in enumerate(new_arts)}
                                        
                                        try:
-                                            # Call the debug function we fixed earlier
-                                            verdicts, err_msg, raw_ai_log = await batch_verify_titles_debug(
-                                                 titles_map, 
+                                            # Cached verdicts first, only the misses go to the model
+                                            verdicts, err_msg, raw_ai_log, cache_hits = await verify_titles_cached(
+                                                 titles_map,
                                                  POLITICS_OPERATIONAL_DEFINITION, # Ensure this is available in scope
                                                  current_user.gemini_api_key
                                             )
-                                            
+                                            if cache_hits:
+                                                 await stream_queue.put({"type": "log", "message": f"🗃️ {outlet.name}: {cache_hits}/{len(titles_map)} verdicts from cache"})
+
                                             if err_msg:
                                                  await stream_queue.put({"type": "log", "message": f"⚠️ AI Batch Error: {err_msg}"})
                                             
@@ -2300,9 +2444,19 @@ async def generate_digest_stream(req: DigestRequest, current_user: User = Depend
                              await stream_queue.put({"type": "log", "message": f"⚠️ Error processing {outlet.name}: {str(e)}"})
                              # Do NOT crash the worker, just fail this outlet
 
-                # Run in Parallel
-                tasks = [process_outlet(o) for o in outlets]
+                # Run in Parallel (longest-expected-first; the semaphore starts them in list order)
+                ordered_outlets = order_outlets_longest_first(outlets)
+                dlog("LPT_ORDER", order=[(o.name, o.avg_scrape_seconds) for o in ordered_outlets])
+                tasks = [process_outlet(o) for o in ordered_outlets]
                 await asyncio.gather(*tasks)
+                await record_outlet_history(scrape_durations, outlet_resolutions)
+                
+                if digest_fetch_stats.get("pages"):
+                     saved_kb = digest_fetch_stats.get("bytes_saved", 0) // 1024
+                     read_kb = digest_fetch_stats.get("bytes_read", 0) // 1024
+                     msg = f"📉 Deep scans: {digest_fetch_stats['pages']} pages, read {read_kb} KB, saved {saved_kb} KB ({digest_fetch_stats.get('early_stops', 0)} early stops, {digest_fetch_stats.get('non_articles', 0)} non-articles dropped)"
+                     dlog("FETCH_STATS", msg, **digest_fetch_stats)
+                     await stream_queue.put({"type": "log", "message": msg})
                 
                 # Signal phase change
                 print(f"DEBUG: WORKER FINISHED.")
@@ -2354,19 +2508,8 @@ async def generate_digest_stream(req: DigestRequest, current_user: User = Depend
                 # IMMEDIATE PARTIAL YIELD per user request for incremental updates
                 try:
                      # CALCULATE FRESHNESS LOCALLY FOR INCREMENTAL UPDATE (Fixes Red Dates)
-                     # We must replicate the cutoff logic here because the final loop hasn't run yet.
-                     from datetime import datetime, timedelta
-                     now = datetime.now()
-                     cutoff_date = now - timedelta(days=1)
-                     if req.timeframe == "3days": cutoff_date = now - timedelta(days=3)
-                     elif req.timeframe == "1week": cutoff_date = now - timedelta(days=7)
-                     elif req.timeframe == "1month": cutoff_date = now - timedelta(days=30)
-                     
-                     # HARD CUTOFF (5x Timeframe) - Reject outright
-                     hard_cutoff_date = now - timedelta(days=5) # 24h -> 5 days
-                     if req.timeframe == "3days": hard_cutoff_date = now - timedelta(days=14)
-                     elif req.timeframe == "1week": hard_cutoff_date = now - timedelta(days=30)
-                     elif req.timeframe == "1month": hard_cutoff_date = now - timedelta(days=60)
+                     # Same cutoffs as the final loop (which hasn't run yet); HARD CUTOFF rejects outright
+                     cutoff_date, hard_cutoff_date = digest_cutoffs(req.timeframe)
                      
                      for art in new_articles:
                          if art.date_str:
@@ -2402,21 +2545,20 @@ async def generate_digest_stream(req: DigestRequest, current_user: User = Depend
                          try:
                              # 1. Deduplication (Stream Level)
                              norm_title = a.title.lower().strip()
-                             norm_url = a.url.split('?')[0].rstrip('/')
-                             fingerprint = f"{norm_title}|{norm_url}"
-                             if norm_title in stream_seen_fingerprints or fingerprint in stream_seen_fingerprints:
-                                 continue
+                             norm_key = url_key(a.url)
+                             if norm_title in stream_yielded or norm_key in stream_yielded:
                                  continue
-                             stream_seen_fingerprints.add(norm_title)
-                             stream_seen_fingerprints.add(fingerprint)
+                             stream_yielded.add(norm_title)
+                             stream_yielded.add(norm_key)
 
                              # 2. Hard Junk Filter (Generic + User Marked Spam)
                              # Generic Terms
                              if "site relocation" in norm_title or "moved" in norm_title: continue
                              
                              # User Marked Spam
-                             if a.url in spam_urls or norm_title in spam_titles_lower:
-                                  print(f"DEBUG: Rejected SPAM {a.title}")
+                             spam_reason = spam_index.match(a.url, a.title)
+                             if spam_reason:
+                                  print(f"DEBUG: Rejected SPAM ({spam_reason}) {a.title}")
                                   continue
 
                              # 3. Hard Date Cutoff
@@ -2464,25 +2606,11 @@ async def generate_digest_stream(req: DigestRequest, current_user: User = Depend
             yield json.dumps({"type": "log", "message": "Ranking & Scoring Articles..."}) + "\n"
             
             # 0. Timeframe Calculation
-            # 0. Timeframe Calculation
-            from datetime import datetime, timedelta
+            # Primary Cutoff (Green vs Red Date); Hard Cutoff (5x Timeframe) - Articles older than this are DISCARDED
             now = datetime.now()
-            
-            # Primary Cutoff (Green vs Red Date)
-            cutoff_date = now - timedelta(days=1) # Default 24h
-            
-            # Hard Cutoff (5x Timeframe) - Articles older than this are DISCARDED
-            hard_cutoff_date = now - timedelta(days=5) # 24h -> 5 days
-            
-            if req.timeframe == "3days":
-                cutoff_date = now - timedelta(days=3)
-                hard_cutoff_date = now - timedelta(days=14) # 3d -> 2 weeks
-            elif req.timeframe == "1week":
-                cutoff_date = now - timedelta(days=7)
-                hard_cutoff_date = now - timedelta(days=30) # 7d -> 1 month
+            cutoff_date, hard_cutoff_date = digest_cutoffs(req.timeframe, now)
                 
-            with open("stream_debug.log", "a") as f: 
-                 f.write(f"DEBUG: Timeframe {req.timeframe}. Hard Cutoff: {hard_cutoff_date.date()}\n")
+            dlog("TIMEFRAME", timeframe=req.timeframe, cutoff=cutoff_date.date(), hard_cutoff=hard_cutoff_date.date())
                 
             yield json.dumps({"type": "log", "message": f"Timeframe: {req.timeframe} (Cutoff: {cutoff_date.date()})"}) + "\n"
 
@@ -2513,7 +2641,7 @@ async def generate_digest_stream(req: DigestRequest, current_user: User = Depend
             
             for article in all_articles:
                  # URL Normalization for Dedupe
-                 norm_url = article.url.split("?")[0].rstrip("/")
+                 norm_url = url_key(article.url)
                  if norm_url in seen_urls: continue
                  
                  # Title Dedupe (Simple lowercasing)
@@ -2637,8 +2765,18 @@ async def generate_digest_stream(req: DigestRequest, current_user: User = Depend
                  chunk_size = 10 # Keep small for reliability
                  parallel_limit = 5 # Process 5 batches concurrently
                  verified_results = {}
-                 
-                 title_ids = list(titles_map.keys())
+                 user_lang = current_user.preferred_language if current_user.preferred_language else "English"
+
+                 # Persistent verdict cache: answer known titles up front, batch only the misses
+                 cached = await llm_verdict_cache.get_many(titles_map.values(), POLITICS_OPERATIONAL_DEFINITION, user_lang, TITLE_VERIFY_MODELS[0])
+                 for k, t in titles_map.items():
+                     if t in cached:
+                         verified_results[str(k)] = cached[t]
+                 hit_rate = len(verified_results) / len(titles_map) * 100
+                 yield json.dumps({"type": "log", "message": f"🗃️ Verdict cache: {len(verified_results)}/{len(titles_map)} hits ({hit_rate:.0f}%), {len(titles_map) - len(verified_results)} titles sent to the model"}) + "\n"
+                 dlog("AI_VERDICT_CACHE", hits=len(verified_results), total=len(titles_map))
+
+                 title_ids = [k for k in titles_map if str(k) not in verified_results]
                  
                  # Pre-calculate all batches
                  all_batches = []
@@ -2653,17 +2791,15 @@ async def generate_digest_stream(req: DigestRequest, current_user: User = Depend
                  for i in range(0, total_batches, parallel_limit):
                      batch_group = all_batches[i:i+parallel_limit]
                      
-                     # Prepare Tasks
-                     user_lang = current_user.preferred_language if current_user.preferred_language else "English"
-                     tasks = [
-                         batch_verify_titles_debug(b, POLITICS_OPERATIONAL_DEFINITION, current_user.gemini_api_key, user_lang)
-                         for b in batch_group
-                     ]
+                     # Prepare Tasks (each result comes back with its batch: as_completed loses the order)
+                     async def verify_batch(b):
+                         return b, await batch_verify_titles_debug(b, POLITICS_OPERATIONAL_DEFINITION, current_user.gemini_api_key, user_lang)
+                     tasks = [verify_batch(b) for b in batch_group]
                      
                      # Process Results as they complete
                      completed_in_group = 0
                      for task in asyncio.as_completed(tasks):
-                         res, err, raw_debug = await task
+                         b, (res, err, raw_debug) = await task
                          completed_in_group += 1
                          
                          if raw_debug:
@@ -2675,25 +2811,24 @@ async def generate_digest_stream(req: DigestRequest, current_user: User = Depend
                               yield json.dumps({"type": "log", "message": f"⚠️ Batch AI Error: {err}"}) + "\n"
                          else:
                               verified_results.update(res)
-                         
+                              await llm_verdict_cache.store_results(b, res, POLITICS_OPERATIONAL_DEFINITION, user_lang, raw_debug)
+
                          
                          # Granular Heartbeat
                          current_total = i + completed_in_group
                          msg = f"Verified batches {current_total}/{total_batches} ({len(verified_results)} verified)..."
                          yield json.dumps({"type": "log", "message": msg}) + "\n"
                          
-                         try:
-                             with open("stream_debug.log", "a") as f: f.write(f"DEBUG: {msg}\n")
-                         except: pass
+                         dlog("AI_BATCH", msg)
                  
-                 with open("stream_debug.log", "a") as f: f.write("DEBUG: Exited AI loop normally.\n")
+                 dlog("AI_LOOP_DONE")
                  
                  # Apply verdicts & Translation
-                 with open("stream_debug.log", "a") as f: f.write(f"DEBUG: Processing verdicts for {len(candidates_to_verify)} candidates...\n")
+                 dlog("AI_VERDICTS", candidates=len(candidates_to_verify))
                  
                  for i, art in enumerate(candidates_to_verify):
                      if i % 50 == 0:
-                          with open("stream_debug.log", "a") as f: f.write(f"DEBUG: Applied verdicts for {i} articles...\n")
+                          dlog("AI_VERDICTS_PROGRESS", applied=i, level=logging.DEBUG)
                      
                      # Result keys are strings in JSON
                      data = verified_results.get(str(i), verified_results.get(i))
@@ -2746,11 +2881,11 @@ async def generate_digest_stream(req: DigestRequest, current_user: User = Depend
                 
             filtered_articles = final_articles
             
-            with open("stream_debug.log", "a") as f: f.write(f"DEBUG: AI Loop Done. Filtering {len(filtered_articles)} articles (Deduped from {len(unique_articles)}).\n")
+            dlog("FILTER_DONE", articles=len(filtered_articles), deduped_from=len(unique_articles))
 
             # FINAL COMPILE
             yield json.dumps({"type": "log", "message": "Compiling HTML Digest..."}) + "\n"
-            with open("stream_debug.log", "a") as f: f.write("DEBUG: Starting Table Generation...\n")
+            dlog("TABLE_START")
             
             # Create HTML Table
             
@@ -2896,54 +3031,49 @@ async def generate_digest_stream(req: DigestRequest, current_user: User = Depend
             table_html += "</tbody></table>"
             
             try:
-                with open("stream_debug.log", "a") as logf:
-                    logf.write(f"\n--- NEW STREAM START ---\n")
-                    
-                    # Send Partial Updates (Split Payload)
-                    yield json.dumps({"type": "log", "message": "Sending Digest components..."}) + "\n"
-                    logf.write("DEBUG: Sending Partial Digest HTML...\n")
-                    
-                    # 1. HTML Content
-                    html_size_mb = len(table_html) / 1024 / 1024
-                    yield json.dumps({"type": "log", "message": f"📦 Generating HTML Digest ({html_size_mb:.2f} MB)..."}) + "\n"
-                    logf.write(f"DEBUG: Sending Partial Digest HTML ({html_size_mb:.2f} MB)...\n")
-                    
-                    if html_size_mb > 15:
-                         yield json.dumps({"type": "log", "message": "⚠️ Warning: Digest is very large, browser may lag."}) + "\n"
-
-                    yield json.dumps({"type": "partial_digest", "html": table_html}, default=str) + "\n"
-                    
-                    # 2. Analysis Data
-                    logf.write("DEBUG: Sending Partial Analysis...\n")
-                    yield json.dumps({"type": "partial_analysis", "source": [k.dict() for k in (analysis_source or [])]}, default=str) + "\n"
-
-                    # 3. Articles (Chunked)
-                    article_chunk_size = 50
-                    total_articles = len(filtered_articles)
-                    logf.write(f"DEBUG: Sending {total_articles} articles in chunks of {article_chunk_size}...\n")
-                    
-                    for i in range(0, total_articles, article_chunk_size):
-                         chunk = filtered_articles[i:i+article_chunk_size]
-                         logf.write(f"DEBUG: Sending Article Chunk {i//article_chunk_size + 1}...\n")
-                         yield json.dumps({
-                             "type": "partial_articles", 
-                             "articles": [a.dict() for a in chunk], 
-                             "category": req.category
-                         }, default=str) + "\n"
-                         
-                         await asyncio.sleep(0.01)
+                dlog("SEND_START")
+                
+                # Send Partial Updates (Split Payload)
+                yield json.dumps({"type": "log", "message": "Sending Digest components..."}) + "\n"
+                
+                # 1. HTML Content
+                html_size_mb = len(table_html) / 1024 / 1024
+                yield json.dumps({"type": "log", "message": f"📦 Generating HTML Digest ({html_size_mb:.2f} MB)..."}) + "\n"
+                dlog("SEND_HTML", size_mb=round(html_size_mb, 2))
+                
+                if html_size_mb > 15:
+                     yield json.dumps({"type": "log", "message": "⚠️ Warning: Digest is very large, browser may lag."}) + "\n"
 
-                    # 4. Completion Signal
-                    logf.write("DEBUG: Sending DONE signal...\n")
-                    yield json.dumps({"type": "done"}) + "\n"
-                    logf.write("DEBUG: Stream Finished Successfully.\n")
+                yield json.dumps({"type": "partial_digest", "html": table_html}, default=str) + "\n"
                 
+                # 2. Analysis Data
+                dlog("SEND_ANALYSIS")
+                yield json.dumps({"type": "partial_analysis", "source": [k.dict() for k in (analysis_source or [])]}, default=str) + "\n"
+
+                # 3. Articles (Chunked)
+                article_chunk_size = 50
+                total_articles = len(filtered_articles)
+                dlog("SEND_ARTICLES", articles=total_articles, chunk_size=article_chunk_size)
+                
+                for i in range(0, total_articles, article_chunk_size):
+                     chunk = filtered_articles[i:i+article_chunk_size]
+                     dlog("SEND_CHUNK", chunk=i // article_chunk_size + 1, level=logging.DEBUG)
+                     yield json.dumps({
+                         "type": "partial_articles", 
+                         "articles": [a.dict() for a in chunk], 
+                         "category": req.category
+                     }, default=str) + "\n"
+                     
+                     await asyncio.sleep(0.01)
+
+                # 4. Completion Signal
+                yield json.dumps({"type": "done"}) + "\n"
+                dlog("STREAM_DONE")
+            
             except Exception as e:
                 # Inner Exception (Stream Error)
-                with open("stream_debug.log", "a") as logf:
-                    logf.write(f"CRITICAL STREAM ERROR: {e}\n")
-                    import traceback
-                    traceback.print_exc(file=logf)
+                import traceback
+                dlog("CRITICAL_STREAM_ERROR", str(e), level=logging.CRITICAL, traceback=traceback.format_exc())
                 
                 print(f"CRITICAL STREAM ERROR: {e}")
                 yield json.dumps({"type": "error", "message": f"Server Stream Error: {str(e)}"}) + "\n"
@@ -2981,8 +3111,10 @@ async def generate_digest(req: DigestRequest, current_user: User = Depends(get_c
 
     # 2. Parallel Smart Scrape
     print(f"Digest: Smart scraping {len(outlets)} outlets for '{req.category}' within {req.timeframe}...")
-    scrape_tasks = [smart_scrape_outlet(o, req.category, req.timeframe) for o in outlets]
+    rule_registry = await get_rule_registry() # also used by the date rescue below
+    scrape_tasks = [smart_scrape_outlet(o, req.category, req.timeframe, scraper_rule=rule_registry.get(o.url)) for o in outlets]
     scrape_results = await asyncio.gather(*scrape_tasks)
+    await record_outlet_history({}, {o.id: r["resolution"] for o, r in zip(outlets, scrape_results) if r.get("resolution")})
     
     combined_text = "\\n".join([r['text'] for r in scrape_results])
     all_articles = []
@@ -3155,8 +3287,7 @@ async def generate_digest(req: DigestRequest, current_user: User = Depends(get_c
             # Check rule availability efficiently
             from urllib.parse import urlparse
             try:
-                 domain_key = urlparse(article.url).netloc.replace("www.", "").lower()
-                 has_custom_rule = domain_key in rules_map
+                 has_custom_rule = rule_registry.has_custom_rule(article.url)
             except: 
                  has_custom_rule = False
             
@@ -3166,73 +3297,67 @@ async def generate_digest(req: DigestRequest, current_user: User = Depends(get_c
                 # Relevant topic OR User has custom rule. (But not spam)
                 try:
                     print(f"DEBUG: Triggering Rescue for {article.title} (HasRule: {has_custom_rule})")
-                    async with httpx.AsyncClient(headers=ROBUST_HEADERS, verify=False, timeout=10) as rescue_client:
-                      resp = await robust_fetch(rescue_client, article.url)
-                      if resp and resp.status_code == 200:
+                    rescue_client = get_http_client(insecure=True) # rescue never verified outlet certificates
+                    resp = await robust_fetch(rescue_client, article.url, timeout=10, insecure=True)
+                    if resp and resp.status_code == 200:
                            
-                           rescued_date = None
+                         rescued_date = None
+                         charset.apply_detected_encoding(resp)
+                         rescue_html = resp.text # decoded once, shared by rule + AI extraction
                            
-                           # 1. Try Rule-Based Extraction
-                           from urllib.parse import urlparse
-                           domain = urlparse(article.url).netloc.replace("www.", "").lower()
-                           rule_config = rules_map.get(domain)
+                         # 1. Try Rule-Based Extraction
+                         rule_obj = rule_registry.get(article.url)
                            
-                           if rule_config:
-                                rule_obj = scraper_engine.ScraperRule(
-                                    domain="custom",
-                                    date_selectors=rule_config.get('date_selectors'),
-                                    date_regex=rule_config.get('date_regex'),
-                                    use_json_ld=rule_config.get('use_json_ld', True)
-                                )
-                                rescued_date = scraper_engine.extract_date_from_html(resp.text, article.url, custom_rule_override=rule_obj)
-                                if rescued_date: print(f"DEBUG: Rule Rescued Date: {rescued_date} (Type: {type(rescued_date)})")
-
-                           # 2. Fallback to AI
-                           if not rescued_date:
-                                rescued_date = await scraper_engine.extract_date_with_ai(resp.text, article.url, current_user.gemini_api_key)
-
-                           if rescued_date and "429" in str(rescued_date):
-                                # RATE LIMIT HIT
-                                print(f"  -> Rate Limit 429: {rescued_date}")
-                                analysis_source.append(KeywordData(word="RATE_LIMIT", importance=1, type="System:RateLimit", sentiment="Warning"))
-                           elif rescued_date:
-                                # Validate Rescued Date against Cutoff!
-                                try:
-                                    # Normalize to datetime
-                                    d_obj = None
-                                    if isinstance(rescued_date, datetime):
-                                        d_obj = rescued_date
-                                        # Format to string for article.date_str
-                                        rescued_date = d_obj.strftime("%Y-%m-%d")
-                                    else:
-                                        # Parse string
-                                        # Clean potential "YYYY-MM-DDT..."
-                                        c_date = str(rescued_date).split("T")[0]
-                                        d_obj = datetime.strptime(c_date, "%Y-%m-%d")
-                                        rescued_date = c_date
-
-                                    if d_obj >= cutoff_date:
-                                         print(f"  -> Rescued Valid Date: {rescued_date}")
-                                         article.date_str = rescued_date
-                                         # Bump Score
-                                         article.relevance_score = topic_score + 30 + 20 
-                                         article.scores['date'] = 30
-                                         # Now it qualifies for AI verification or basic inclusion
-                                         candidates_for_ai.append(article)
-                                    else:
-                                         print(f"  -> Rescued OLD Date: {rescued_date} (Too Old)")
-                                         article.date_str = rescued_date
-                                         article.relevance_score = 0 
-                                         filtered_articles.append(article) 
-                                except:
-                                     pass
-                           else:
-                                # Failed Rescue
-                                article.relevance_score = 0 
-                                filtered_articles.append(article)
-                      else:
-                           article.relevance_score = 0
-                           filtered_articles.append(article)
+                         if rule_obj:
+                              rescued_date = (await parse_pool.parse_article(rescue_html, article.url, rule=rule_obj))["date"]
+                              if rescued_date: print(f"DEBUG: Rule Rescued Date: {rescued_date} (Type: {type(rescued_date)})")
+
+                         # 2. Fallback to AI
+                         if not rescued_date:
+                              rescued_date = await scraper_engine.extract_date_with_ai(rescue_html, article.url, current_user.gemini_api_key)
+
+                         if rescued_date and "429" in str(rescued_date):
+                              # RATE LIMIT HIT
+                              print(f"  -> Rate Limit 429: {rescued_date}")
+                              analysis_source.append(KeywordData(word="RATE_LIMIT", importance=1, type="System:RateLimit", sentiment="Warning"))
+                         elif rescued_date:
+                              # Validate Rescued Date against Cutoff!
+                              try:
+                                  # Normalize to datetime
+                                  d_obj = None
+                                  if isinstance(rescued_date, datetime):
+                                      d_obj = rescued_date
+                                      # Format to string for article.date_str
+                                      rescued_date = d_obj.strftime("%Y-%m-%d")
+                                  else:
+                                      # Parse string
+                                      # Clean potential "YYYY-MM-DDT..."
+                                      c_date = str(rescued_date).split("T")[0]
+                                      d_obj = datetime.strptime(c_date, "%Y-%m-%d")
+                                      rescued_date = c_date
+
+                                  if d_obj >= cutoff_date:
+                                       print(f"  -> Rescued Valid Date: {rescued_date}")
+                                       article.date_str = rescued_date
+                                       # Bump Score
+                                       article.relevance_score = topic_score + 30 + 20 
+                                       article.scores['date'] = 30
+                                       # Now it qualifies for AI verification or basic inclusion
+                                       candidates_for_ai.append(article)
+                                  else:
+                                       print(f"  -> Rescued OLD Date: {rescued_date} (Too Old)")
+                                       article.date_str = rescued_date
+                                       article.relevance_score = 0 
+                                       filtered_articles.append(article) 
+                              except:
+                                   pass
+                         else:
+                              # Failed Rescue
+                              article.relevance_score = 0 
+                              filtered_articles.append(article)
+                    else:
+                         article.relevance_score = 0
+                         filtered_articles.append(article)
                 except Exception as e:
                     print(f"Rescue Failed: {e}")
                     article.relevance_score = 0 
@@ -3297,9 +3422,6 @@ async def generate_digest(req: DigestRequest, current_user: User = Depends(get_c
             chunk_size = 25
             chunks = [articles_to_translate[i:i + chunk_size] for i in range(0, len(articles_to_translate), chunk_size)]
             
-            genai.configure(api_key=current_user.gemini_api_key)
-            model_tr = genai.GenerativeModel('gemini-flash-latest')
-            
             async def translate_chunk(i, chunk):
                 titles_p = [art.title for art in chunk]
                 
@@ -3308,7 +3430,7 @@ async def generate_digest(req: DigestRequest, current_user: User = Depends(get_c
                 )
                 
                 try:
-                    tr_resp = await model_tr.generate_content_async(tr_prompt)
+                    tr_resp = await llm_scheduler.generate(current_user.gemini_api_key, 'gemini-flash-latest', tr_prompt, priority=llm_scheduler.PRIORITY_BACKGROUND)
                     tr_text = tr_resp.text.replace("```json","").replace("```","").strip()
                     
                     import re
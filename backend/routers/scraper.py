@@ -12,7 +12,10 @@ import scraper_engine
 async def get_db():
     async with AsyncSessionLocal() as session:
         yield session
-import httpx
+from services.http_client import get_http_client
+from services.crawl_frontier import get_frontier
+from services import charset
+from services.rule_registry import get_rule_registry, bump_rules_version, invalidate_rule_registry
 
 router = APIRouter()
 
@@ -43,6 +46,49 @@ class TestExtractionRequest(BaseModel):
 
 # --- Endpoints ---
 
+@router.get("/scraper/frontier")
+def frontier_status():
+    """Crawl frontier queue depth and in-flight fetches per domain."""
+    return get_frontier().snapshot()
+
+@router.get("/scraper/health")
+def domain_health_status():
+    """Per-domain error rate, p95 latency and circuit breaker state."""
+    from services.domain_health import get_domain_health
+    return get_domain_health().snapshot()
+
+@router.get("/scraper/cache")
+def cache_status():
+    """Hit-rate counters of the page cache, the deep-scan result cache, the seen-link filters and URL templates."""
+    from services.page_cache import get_page_cache_stats
+    from services.deep_scan_cache import get_deep_scan_stats
+    from services.seen_filter import get_seen_filter_stats
+    from services.url_templates import get_url_template_stats
+    return {"page_cache": get_page_cache_stats(), "deep_scan_cache": get_deep_scan_stats(),
+            "seen_filter": get_seen_filter_stats(), "url_templates": get_url_template_stats()}
+
+@router.get("/scraper/templates")
+async def url_template_status(url: str):
+    """URL templates learned for an outlet: shape, article/category verdict, where the date comes from."""
+    from services.url_templates import get_outlet_templates
+    return (await get_outlet_templates(url)).snapshot()
+
+@router.get("/scraper/parse")
+def parse_pool_status():
+    """HTML parse pool: workers, pages in flight, queue wait and parse time."""
+    from services.parse_pool import get_parse_pool_stats
+    return get_parse_pool_stats()
+
+@router.get("/scraper/prescan")
+def prescan_status():
+    """Head pre-scan fast-path hit rate per domain (dates/titles found without building a DOM)."""
+    return scraper_engine.get_prescan_stats()
+
+@router.get("/scraper/rules/registry")
+async def rule_registry_status():
+    """Loaded rule version, rule counts and lookup hit counters of this worker."""
+    return (await get_rule_registry()).snapshot()
+
 @router.get("/scraper/rules", response_model=List[ScraperRuleRead])
 async def list_rules(db: Session = Depends(get_db)):
     result = await db.execute(select(ScraperRule))
@@ -66,7 +112,9 @@ async def create_or_update_rule(rule: ScraperRuleCreate, db: Session = Depends(g
     
     if existing:
         existing.config_json = json.dumps(config_dict)
+        await bump_rules_version(db) # other workers reload on their next poll
         await db.commit()
+        invalidate_rule_registry()
         await db.refresh(existing)
         return ScraperRuleRead(id=existing.id, domain=existing.domain, config=config_dict)
     else:
@@ -75,7 +123,9 @@ async def create_or_update_rule(rule: ScraperRuleCreate, db: Session = Depends(g
             config_json=json.dumps(config_dict)
         )
         db.add(new_rule)
+        await bump_rules_version(db)
         await db.commit()
+        invalidate_rule_registry()
         await db.refresh(new_rule)
         return ScraperRuleRead(id=new_rule.id, domain=new_rule.domain, config=config_dict)
 
@@ -97,64 +147,48 @@ async def test_extraction(req: TestExtractionRequest, db: Session = Depends(get_
         "Sec-Fetch-Site": "cross-site",
         "Sec-Fetch-User": "?1",
     }
-    async with httpx.AsyncClient(follow_redirects=True, verify=False, http2=False) as client:
-        try:
-            resp = await client.get(req.url, headers=headers, timeout=15)
-            if resp.status_code != 200:
-                raise HTTPException(status_code=400, detail=f"Failed to fetch URL: Status {resp.status_code}")
+    client = get_http_client(insecure=True) # rule tests fetch outlet pages with broken chains too
+    try:
+        resp = await client.get(req.url, headers=headers, timeout=15)
+        if resp.status_code != 200:
+            raise HTTPException(status_code=400, detail=f"Failed to fetch URL: Status {resp.status_code}")
             
-            html = resp.text
+        charset.apply_detected_encoding(resp)
+        html = resp.text
             
-            # Create Ephemeral Rule if provided
-            custom_rule = None
-            if req.rule_config:
-                from scraper_engine import ScraperRule as EngineRule
-                custom_rule = EngineRule(
-                    domain="test",
-                    date_selectors=req.rule_config.date_selectors,
-                    date_regex=req.rule_config.date_regex,
-                    use_json_ld=req.rule_config.use_json_ld,
-                    use_data_layer=req.rule_config.use_data_layer,
-                    data_layer_var=req.rule_config.data_layer_var,
-                    title_selectors=req.rule_config.title_selectors
-                )
-
-            else:
-                 # Fetch from DB if no config provided
-                 from urllib.parse import urlparse
-                 domain = urlparse(req.url).netloc.replace("www.", "").lower()
-                 
-                 result = await db.execute(select(ScraperRule).where(ScraperRule.domain == domain))
-                 db_rule = result.scalar_one_or_none()
-                 
-                 if db_rule:
-                      config = json.loads(db_rule.config_json)
-                      from scraper_engine import ScraperRule as EngineRule
-                      custom_rule = EngineRule(
-                          domain=domain,
-                          date_selectors=config.get('date_selectors'),
-                          date_regex=config.get('date_regex'),
-                          use_json_ld=config.get('use_json_ld', True),
-                          use_data_layer=config.get('use_data_layer', False),
-                          data_layer_var=config.get('data_layer_var'),
-                          title_selectors=config.get('title_selectors')
-
-                      )
+        # Create Ephemeral Rule if provided
+        custom_rule = None
+        if req.rule_config:
+            from scraper_engine import ScraperRule as EngineRule
+            custom_rule = EngineRule(
+                domain="test",
+                date_selectors=req.rule_config.date_selectors,
+                date_regex=req.rule_config.date_regex,
+                use_json_ld=req.rule_config.use_json_ld,
+                use_data_layer=req.rule_config.use_data_layer,
+                data_layer_var=req.rule_config.data_layer_var,
+                title_selectors=req.rule_config.title_selectors
+            )
+
+        else:
+             # Look up the compiled registry (DB rules over static ones) if no config provided
+             custom_rule = (await get_rule_registry()).get(req.url)
 
             
-            # Extract
-            extracted_date = scraper_engine.extract_date_from_html(html, req.url, custom_rule_override=custom_rule)
-            extracted_title = scraper_engine.extract_title_from_html(html, req.url, custom_rule_override=custom_rule)
+        # Extract (single parse shared by both extractors)
+        doc = scraper_engine.ParsedDocument(html, req.url)
+        extracted_date = scraper_engine.extract_date_from_html(doc, req.url, custom_rule_override=custom_rule)
+        extracted_title = scraper_engine.extract_title_from_html(doc, req.url, custom_rule_override=custom_rule)
             
-            return {
-                "status": "success",
-                "extracted_date": extracted_date,
-                "extracted_title": extracted_title,
-                "used_rule": req.rule_config or "System Default"
-            }
+        return {
+            "status": "success",
+            "extracted_date": extracted_date,
+            "extracted_title": extracted_title,
+            "used_rule": req.rule_config or "System Default"
+        }
 
             
-        except HTTPException as he:
-            raise he
-        except Exception as e:
-            raise HTTPException(status_code=500, detail=str(e))
+    except HTTPException as he:
+        raise he
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
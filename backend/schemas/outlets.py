@@ -98,6 +98,7 @@ class ArticleMetadata(BaseModel):
     ai_verdict: Optional[str] = None # New field for AI Title Check status
     translated_title: Optional[str] = None # New field for Translation
     is_spam: Optional[bool] = False # Soft block status
+    alternate_sources: Optional[List[Dict[str, str]]] = [] # Near-duplicate copies: [{"source", "url", "title"}]
     
 class DigestResponse(BaseModel):
     digest: str
@@ -1,12 +1,20 @@
 
+import os
 import re
 import json
+import logging
+import html as html_lib
+from functools import lru_cache
 from urllib.parse import urlparse
 from datetime import datetime
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Union
 from bs4 import BeautifulSoup
+import soupsieve
+import date_parser
+from debug_log import dlog
+from url_canon import url_key
 from pydantic import BaseModel
-import google.generativeai as genai
+from services.llm_scheduler import generate as llm_generate, PRIORITY_INTERACTIVE
 
 # --- Configuration Models ---
 
@@ -61,77 +69,272 @@ SCRAPER_REGISTRY: Dict[str, ScraperRule] = {
     ),
 }
 
+# --- Compiled Rule Parts ---
+# Rule selectors and date regexes are compiled once per process and reused for
+# every page (rules reach parse workers pickled, so the cache is keyed by the
+# pattern string, not the rule object). services/rule_registry warms these up.
+@lru_cache(maxsize=1024)
+def compile_selector(selector: str):
+    return soupsieve.compile(selector)
+
+@lru_cache(maxsize=1024)
+def compile_date_pattern(pattern: str) -> "re.Pattern":
+    return re.compile(pattern)
+
+# --- Parser Backend ---
+# SCRAPER_PARSER selects how HTML is parsed:
+#   "html.parser" - BeautifulSoup's pure-Python builder (default, always available)
+#   "lxml"        - BeautifulSoup on the lxml C builder
+#   "selectolax"  - lexbor for the hot paths (links, meta); BeautifulSoup (lxml if
+#                   installed) for selectors, text and JSON-LD
+# Backends whose package isn't installed fall back to html.parser.
+try:
+    import lxml  # noqa: F401
+    LXML_AVAILABLE = True
+except ImportError:
+    LXML_AVAILABLE = False
+
+try:
+    from selectolax.lexbor import LexborHTMLParser
+    SELECTOLAX_AVAILABLE = True
+except ImportError:
+    LexborHTMLParser = None
+    SELECTOLAX_AVAILABLE = False
+
+PARSER_BACKENDS = ("html.parser", "lxml", "selectolax")
+
+def resolve_parser_backend(name: Optional[str]) -> str:
+    name = (name or "html.parser").strip().lower()
+    if name not in PARSER_BACKENDS:
+        print(f"WARN: Unknown SCRAPER_PARSER '{name}', using html.parser")
+        return "html.parser"
+    if name == "lxml" and not LXML_AVAILABLE:
+        print("WARN: SCRAPER_PARSER=lxml but lxml is not installed, using html.parser")
+        return "html.parser"
+    if name == "selectolax" and not SELECTOLAX_AVAILABLE:
+        print("WARN: SCRAPER_PARSER=selectolax but selectolax is not installed, using html.parser")
+        return "html.parser"
+    return name
+
+PARSER_BACKEND = resolve_parser_backend(os.getenv("SCRAPER_PARSER"))
+
+# --- Parsed Document ---
+class ParsedDocument:
+    """
+    One HTML payload, parsed once and shared by every extractor.
+    All extractors accept either a raw HTML string or a ParsedDocument; views
+    (soup, text, links, meta tags, JSON-LD) are built lazily and cached.
+    """
+    META_ATTRS = ("property", "name", "itemprop", "http-equiv")
+
+    def __init__(self, html: str, url: Optional[str] = None, backend: Optional[str] = None):
+        self.html = html or ""
+        self.url = url
+        self.backend = resolve_parser_backend(backend) if backend else PARSER_BACKEND
+        self._soup = None
+        self._lexbor = None
+        self._texts = {}
+        self._links = None
+        self._meta = None
+        self._json_ld = None
+        self._prescan = None
+        self.date_source = None  # "prescan" | "dom": how extract_date_from_html answered
+        self.title_source = None # same for extract_title_from_html
+
+    @property
+    def prescan(self) -> "HeadScan":
+        """Regex scan of meta / <time> / JSON-LD, no DOM (see prescan_head)."""
+        if self._prescan is None:
+            self._prescan = prescan_head(self.html)
+        return self._prescan
+
+    @property
+    def soup(self) -> BeautifulSoup:
+        if self._soup is None:
+            builder = "lxml" if self.backend != "html.parser" and LXML_AVAILABLE else "html.parser"
+            self._soup = BeautifulSoup(self.html, builder)
+        return self._soup
+
+    @property
+    def lexbor(self):
+        """selectolax tree (only for the selectolax backend)."""
+        if self._lexbor is None:
+            self._lexbor = LexborHTMLParser(self.html)
+        return self._lexbor
+
+    def get_text(self, separator: str = "") -> str:
+        """soup.get_text(separator, strip=True), cached per separator."""
+        if separator not in self._texts:
+            self._texts[separator] = self.soup.get_text(separator, strip=True)
+        return self._texts[separator]
+
+    @property
+    def links(self) -> List[tuple]:
+        """(href, anchor text) for every <a href>, in document order."""
+        if self._links is None:
+            if self.backend == "selectolax":
+                self._links = [
+                    (node.attributes.get('href'), node.text(deep=True, separator='', strip=True))
+                    for node in self.lexbor.css('a[href]')
+                ]
+            else:
+                self._links = [(a.get('href'), a.get_text(strip=True)) for a in self.soup.find_all('a', href=True)]
+        return self._links
+
+    @property
+    def meta(self) -> Dict[tuple, Optional[str]]:
+        """content of the first <meta> per (attribute, value), e.g. ('property', 'og:title')."""
+        if self._meta is None:
+            self._meta = {}
+            if self.backend == "selectolax":
+                tags = [node.attributes for node in self.lexbor.css('meta')]
+            else:
+                tags = [tag.attrs for tag in self.soup.find_all('meta')]
+            for attrs in tags:
+                for attr in self.META_ATTRS:
+                    value = attrs.get(attr)
+                    if value and (attr, value) not in self._meta:
+                        self._meta[(attr, value)] = attrs.get('content')
+        return self._meta
+
+    def meta_content(self, attr: str, value: str) -> Optional[str]:
+        return self.meta.get((attr, value))
+
+    @property
+    def json_ld(self) -> list:
+        """Decoded application/ld+json blocks (invalid blocks are skipped)."""
+        if self._json_ld is None:
+            self._json_ld = []
+            for script in self.soup.find_all('script', type='application/ld+json'):
+                try:
+                    if script.string:
+                        self._json_ld.append(json.loads(script.string))
+                except Exception:
+                    continue
+        return self._json_ld
+
+
+def as_document(html: Union[str, "ParsedDocument"], url: Optional[str] = None) -> ParsedDocument:
+    """Wraps raw HTML; passes an existing ParsedDocument through untouched."""
+    if isinstance(html, ParsedDocument):
+        return html
+    return ParsedDocument(html, url)
+
+# --- Head Pre-Scanner ---
+# Most pages carry their date in <meta property="article:published_time">, a
+# <time datetime> or JSON-LD, and their title in og:title. One regex pass over
+# the raw HTML pulls those out without building a DOM; the soup is only built
+# when the pre-scan can't answer (rule selectors/regex, or nothing found).
+# Comments, <style> and script bodies are skipped like a parser would.
+# SCRAPER_PRESCAN=0 disables the fast path.
+PRESCAN_ENABLED = os.getenv("SCRAPER_PRESCAN", "1").lower() not in ("0", "false", "no")
+
+PRESCAN_TOKEN_RE = re.compile(
+    r'<!--.*?-->'
+    r'|<script\b((?:[^>"\']|"[^"]*"|\'[^\']*\')*)>(.*?)</script\s*>'
+    r'|<style\b[^>]*>.*?</style\s*>'
+    r'|<(meta|time)\b((?:[^>"\']|"[^"]*"|\'[^\']*\')*)>',
+    re.I | re.S,
+)
+PRESCAN_ATTR_RE = re.compile(r'([^\s"\'>/=]+)(?:\s*=\s*(?:"([^"]*)"|\'([^\']*)\'|([^\s"\'=<>`]+)))?')
+
+class HeadScan:
+    """What prescan_head found: meta map (same shape as ParsedDocument.meta), <time datetime> values, JSON-LD blocks."""
+    __slots__ = ("meta", "time_datetimes", "json_ld")
+
+    def __init__(self):
+        self.meta: Dict[tuple, Optional[str]] = {}
+        self.time_datetimes: List[str] = []
+        self.json_ld: list = []
+
+    def meta_content(self, attr: str, value: str) -> Optional[str]:
+        return self.meta.get((attr, value))
+
+def _prescan_attrs(raw: str) -> Dict[str, Optional[str]]:
+    attrs = {}
+    for m in PRESCAN_ATTR_RE.finditer(raw):
+        name = m.group(1).lower()
+        value = m.group(2) if m.group(2) is not None else m.group(3) if m.group(3) is not None else m.group(4)
+        attrs[name] = html_lib.unescape(value) if value is not None else ""
+    return attrs
+
+def prescan_head(html: str) -> HeadScan:
+    scan = HeadScan()
+    for m in PRESCAN_TOKEN_RE.finditer(html or ""):
+        script_attrs, script_body, tag, tag_attrs = m.group(1), m.group(2), m.group(3), m.group(4)
+        if script_attrs is not None:
+            if _prescan_attrs(script_attrs).get("type") == "application/ld+json" and script_body:
+                try:
+                    scan.json_ld.append(json.loads(script_body))
+                except Exception:
+                    pass
+        elif tag is None:
+            continue # comment / style
+        elif tag.lower() == "meta":
+            attrs = _prescan_attrs(tag_attrs)
+            for attr in ParsedDocument.META_ATTRS:
+                value = attrs.get(attr)
+                if value and (attr, value) not in scan.meta:
+                    scan.meta[(attr, value)] = attrs.get("content")
+        else:
+            attrs = _prescan_attrs(tag_attrs)
+            if "datetime" in attrs:
+                scan.time_datetimes.append(attrs["datetime"])
+    return scan
+
+def prescan_date(doc: ParsedDocument, rule: Optional[ScraperRule] = None, lang: Optional[str] = None) -> Optional[str]:
+    """
+    The DOM-free stages of the extract_date_from_html cascade, in the same order.
+    Returns YYYY-MM-DD, or None when the full cascade has to run.
+    """
+    scan = doc.prescan
+    if rule:
+        if rule.use_data_layer:
+            found = extract_from_js_datalayer(doc.html, rule.data_layer_var or "dataLayer")
+            if found: return found.strftime("%Y-%m-%d")
+        if rule.date_selectors or rule.date_regex:
+            return None # selectors/regex come before JSON-LD and need the DOM
+        if rule.use_json_ld:
+            d = _date_from_json_ld(scan.json_ld, lang)
+            if d: return d.strftime("%Y-%m-%d")
+
+    d = _date_from_time_values(scan.time_datetimes, lang) or _date_from_meta(scan.meta_content, lang)
+    return d.strftime("%Y-%m-%d") if d else None
+
+def prescan_title(doc: ParsedDocument, rule: Optional[ScraperRule] = None) -> Optional[str]:
+    """og:title without a DOM (only when no rule title_selectors take precedence)."""
+    if rule and rule.title_selectors:
+        return None
+    og_title = doc.prescan.meta_content("property", "og:title")
+    return og_title.strip() if og_title else None
+
+# Per-domain fast-path counters (fed by record_prescan from the parse pool)
+_prescan_stats: Dict[str, Dict[str, int]] = {}
+
+def record_prescan(url: str, date_source: Optional[str], title_source: Optional[str]):
+    domain = urlparse(url).netloc.replace("www.", "").lower()
+    s = _prescan_stats.setdefault(domain, {"pages": 0, "date_fast": 0, "date_dom": 0, "title_fast": 0})
+    s["pages"] += 1
+    if date_source == "prescan": s["date_fast"] += 1
+    elif date_source == "dom": s["date_dom"] += 1
+    if title_source == "prescan": s["title_fast"] += 1
+
+def get_prescan_stats() -> Dict[str, Any]:
+    """Fast-path hit rate per domain (share of pages whose date needed no DOM)."""
+    out = {}
+    for domain, s in sorted(_prescan_stats.items(), key=lambda kv: -kv[1]["pages"]):
+        out[domain] = {**s, "hit_rate": round(s["date_fast"] / s["pages"], 3) if s["pages"] else 0.0}
+    return out
+
 # --- Helper Functions ---
 
-def parse_romanian_date(date_str: str) -> Optional[datetime]:
+def parse_romanian_date(date_str: str, lang: Optional[str] = None) -> Optional[datetime]:
     """
     Parses dates like '29 decembrie 2025', 'ian. 04, 2026', 'la 06.01.2026'.
+    Kept for existing callers: delegates to date_parser (multilingual, precompiled, memoized).
+    lang: optional language hint (date_parser.lang_for_domain) for ambiguous month names.
     """
-    if not date_str: return None
-    
-    # Map RO months
-    ro_months = {
-        "ianuarie": 1, "ian": 1,
-        "februarie": 2, "feb": 2,
-        "martie": 3, "mar": 3,
-        "aprilie": 4, "apr": 4,
-        "mai": 5,
-        "iunie": 6, "iun": 6,
-        "iulie": 7, "iul": 7,
-        "august": 8, "aug": 8,
-        "septembrie": 9, "sept": 9,
-        "octombrie": 10, "oct": 10,
-        "noiembrie": 11, "nov": 11,
-        "decembrie": 12, "dec": 12,
-        # Russian
-        "января": 1, "январь": 1, "февраля": 2, "февраль": 2, "марта": 3, "март": 3,
-        "апреля": 4, "апрель": 4, "мая": 5, "май": 5, "июня": 6, "июнь": 6,
-        "июля": 7, "июль": 7, "августа": 8, "август": 8, "сентября": 9, "сентябрь": 9,
-        "октября": 10, "октябрь": 10, "ноября": 11, "ноябрь": 11, "декабря": 12, "декабрь": 12,
-        # English fallbacks just in case
-        "january": 1, "february": 2, "march": 3, "april": 4, "may": 5, "june": 6,
-        "july": 7, "august": 8, "september": 9, "october": 10, "november": 11, "december": 12
-    }
-    
-    clean_text = date_str.lower().replace("la ", "").replace("din ", "").strip()
-    
-    # 1. Try ISO-like YYYY-MM-DD
-    match_iso = re.search(r'(\d{4})-(\d{1,2})-(\d{1,2})', clean_text)
-    if match_iso:
-         try: return datetime(int(match_iso.group(1)), int(match_iso.group(2)), int(match_iso.group(3)))
-         except: pass
-
-    # 2. Try DD.MM.YYYY or DD/MM/YYYY or DD-MM-YYYY
-    match_dots = re.search(r'(\d{1,2})[./-](\d{1,2})[./-](\d{4})', clean_text)
-    if match_dots:
-         try: return datetime(int(match_dots.group(3)), int(match_dots.group(2)), int(match_dots.group(1)))
-         except: pass
-         
-    # 3. Try "DD Month YYYY" (e.g. 29 Ianuarie 2025, 30 декабря 2025)
-    # Supports Latin and Cyrillic
-    match = re.search(r'(\d{1,2})\s+([a-zа-яăâîșț]+)\s+(\d{4})', clean_text)
-    if match:
-        day, month_name, year = match.groups()
-        month = ro_months.get(month_name[:3]) 
-        # For Russian, 3 chars might not be unique/enough? 
-        # "дек" (dec), "янв" (jan) - seemingly ok.
-        # But ro_months has full names mapped.
-        # Let's try full name first.
-        month = ro_months.get(month_name) or ro_months.get(month_name[:3])
-        if month:
-            try: return datetime(int(year), month, int(day))
-            except: pass
-
-    # 4. Try "Month. DD, YYYY" (e.g. Ian. 04, 2026)
-    match_en_style = re.search(r'([a-zа-яăâîșț]{3,})\.?\s+(\d{1,2})[,\.]?\s+(\d{4})', clean_text)
-    if match_en_style:
-        month_name, day, year = match_en_style.groups()
-        month = ro_months.get(month_name.lower()) or ro_months.get(month_name.lower()[:3])
-        if month:
-            try: return datetime(int(year), month, int(day))
-            except: pass
-            
-    return None
+    return date_parser.parse_date(date_str, lang)
 
 def extract_date_from_url(url: str) -> Optional[datetime]:
     """
@@ -185,12 +388,60 @@ def extract_from_js_datalayer(html: str, var_name: str = "dataLayer") -> Optiona
 
     return None
 
-def extract_date_from_html(html: str, url: str, custom_rule_override: Optional[ScraperRule] = None) -> Optional[str]:
+# Cascade stages shared by the DOM path and the pre-scanner
+DATE_META_CANDIDATES = [
+    ('property', 'article:published_time'),
+    ('property', 'og:published_time'),
+    ('name', 'date'),
+    ('name', 'pubdate'),
+    ('name', 'publishdate'), # User Request: China Daily style
+    ('name', 'publishtime'), # Common variant
+    ('name', 'original-publish-date'),
+    ('itemprop', 'datePublished')
+]
+
+def _date_from_json_ld(blocks: list, lang: Optional[str] = None) -> Optional[datetime]:
+    for data in blocks:
+        try:
+            # Flatten @graph if present
+            items = []
+            if isinstance(data, dict):
+                if "@graph" in data:
+                    items = data["@graph"]
+                else:
+                    items = [data]
+            elif isinstance(data, list):
+                items = data
+                
+            for item in items:
+                # Look for datePublished, dateCreated
+                raw = item.get('datePublished') or item.get('dateCreated') or item.get('uploadDate')
+                
+                # Check nested mainEntity if applicable (sometimes schema is complex)
+                if not raw and 'mainEntity' in item:
+                    raw = item['mainEntity'].get('datePublished')
+                    
+                if raw:
+                    d = parse_romanian_date(raw.split('T')[0], lang)
+                    if d: return d
+        except: 
+            continue
+    return None
+
+def _date_from_time_values(values: List[str], lang: Optional[str] = None) -> Optional[datetime]:
+    return date_parser.first_date((value.split('T')[0] for value in values), lang)
+
+def _date_from_meta(meta_content, lang: Optional[str] = None) -> Optional[datetime]:
+    candidates = (meta_content(attr_name, attr_value) for attr_name, attr_value in DATE_META_CANDIDATES)
+    return date_parser.first_date((content.split('T')[0] for content in candidates if content), lang)
+
+def extract_date_from_html(html: Union[str, ParsedDocument], url: str, custom_rule_override: Optional[ScraperRule] = None) -> Optional[str]:
     """
     Orchestrator for extracting date from HTML content using Registry Rules followed by Global Fallback.
     Returns YYYY-MM-DD string or None.
     """
-    soup = BeautifulSoup(html, 'html.parser')
+    doc = as_document(html, url)
+    html = doc.html
     print(f"DEBUG: Extracting date for URL: {url}")
     
     # 1. Identify Domain
@@ -198,8 +449,18 @@ def extract_date_from_html(html: str, url: str, custom_rule_override: Optional[S
     domain = urlparse(url).netloc.replace("www.", "").lower()
     
     rule = custom_rule_override or SCRAPER_REGISTRY.get(domain)
+    lang = date_parser.lang_for_domain(domain) # hint for month names that differ by language
     found_date: Optional[datetime] = None
     
+    # 0. Fast path: meta / <time> / JSON-LD straight from the raw HTML
+    if PRESCAN_ENABLED:
+        fast = prescan_date(doc, rule, lang)
+        if fast:
+            doc.date_source = "prescan"
+            return fast
+    doc.date_source = "dom"
+    soup = doc.soup
+    
     if rule:
         print(f"DEBUG: Using Scraper Rule for {domain}")
         
@@ -213,41 +474,41 @@ def extract_date_from_html(html: str, url: str, custom_rule_override: Optional[S
         # B. Selectors
         if rule.date_selectors:
             for selector in rule.date_selectors:
-                elements = soup.select(selector)
+                elements = compile_selector(selector).select(soup)
                 for el in elements:
                     # Check text
                     text_val = el.get_text(strip=True)
                     
                     # 1. Try Text
-                    d = parse_romanian_date(text_val)
+                    d = parse_romanian_date(text_val, lang)
                     if d: 
                         print(f"  -> Found via Selector '{selector}' (text): {d}")
                         return d.strftime("%Y-%m-%d")
 
                     # 2. Try 'content' attribute (Meta tags)
                     if el.has_attr('content'):
-                        d = parse_romanian_date(el['content'].split('T')[0]) # Split ISO T just in case
+                        d = parse_romanian_date(el['content'].split('T')[0], lang) # Split ISO T just in case
                         if d:
                             print(f"  -> Found via Selector '{selector}' (content): {d}")
                             return d.strftime("%Y-%m-%d")
 
                     # 3. Try 'datetime' attribute (Time tags)
                     if el.has_attr('datetime'):
-                        d = parse_romanian_date(el['datetime'].split('T')[0])
+                        d = parse_romanian_date(el['datetime'].split('T')[0], lang)
                         if d: 
                             print(f"  -> Found via Selector '{selector}' (datetime): {d}")
                             return d.strftime("%Y-%m-%d")
 
         # C. Regex via Rule
         if rule.date_regex:
-            full_text = soup.get_text(" ", strip=True) 
+            full_text = doc.get_text(" ")
             for pattern in rule.date_regex:
                 try:
-                    match = re.search(pattern, full_text)
+                    match = compile_date_pattern(pattern).search(full_text)
                     if match:
                         # Expecting one group that contains the date string
                         val = match.group(1) if match.groups() else match.group(0)
-                        d = parse_romanian_date(val)
+                        d = parse_romanian_date(val, lang)
                         if d:
                             print(f"  -> Found via Regex '{pattern}': {d}")
                             return d.strftime("%Y-%m-%d")
@@ -256,63 +517,18 @@ def extract_date_from_html(html: str, url: str, custom_rule_override: Optional[S
 
         # D. JSON-LD via Rule
         if rule.use_json_ld:
-             scripts = soup.find_all('script', type='application/ld+json')
-             for script in scripts:
-                 try:
-                     if not script.string: continue
-                     data = json.loads(script.string)
-                     
-                     # Flatten @graph if present
-                     items = []
-                     if isinstance(data, dict):
-                         if "@graph" in data:
-                             items = data["@graph"]
-                         else:
-                             items = [data]
-                     elif isinstance(data, list):
-                         items = data
-                         
-                     for item in items:
-                         # Look for datePublished, dateCreated
-                         raw = item.get('datePublished') or item.get('dateCreated') or item.get('uploadDate')
-                         
-                         # Check nested mainEntity if applicable (sometimes schema is complex)
-                         if not raw and 'mainEntity' in item:
-                             raw = item['mainEntity'].get('datePublished')
-                             
-                         if raw:
-                             d = parse_romanian_date(raw.split('T')[0])
-                             if d:
-                                 print(f"  -> Found via JSON-LD: {d}")
-                                 return d.strftime("%Y-%m-%d")
-                 except: 
-                     continue
+             d = _date_from_json_ld(doc.json_ld, lang)
+             if d:
+                 print(f"  -> Found via JSON-LD: {d}")
+                 return d.strftime("%Y-%m-%d")
 
     # 2. Global Fallback (The "Smart" Engine)
     
     # A. <time> tags (Standard HTML5)
-    time_tags = soup.find_all('time')
-    for tag in time_tags:
-        if tag.has_attr('datetime'):
-             d = parse_romanian_date(tag['datetime'].split('T')[0])
-             if d: return d.strftime("%Y-%m-%d")
-             
     # B. Meta Tags (Schema.org / OG)
-    meta_candidates = [
-        {'property': 'article:published_time'},
-        {'property': 'og:published_time'},
-        {'name': 'date'},
-        {'name': 'pubdate'},
-        {'name': 'publishdate'}, # User Request: China Daily style
-        {'name': 'publishtime'}, # Common variant
-        {'name': 'original-publish-date'},
-        {'itemprop': 'datePublished'}
-    ]
-    for attr in meta_candidates:
-        tag = soup.find('meta', attr)
-        if tag and tag.get('content'):
-            d = parse_romanian_date(tag['content'].split('T')[0])
-            if d: return d.strftime("%Y-%m-%d")
+    time_values = [tag['datetime'] for tag in soup.find_all('time') if tag.has_attr('datetime')]
+    d = _date_from_time_values(time_values, lang) or _date_from_meta(doc.meta_content, lang)
+    if d: return d.strftime("%Y-%m-%d")
             
     # C. URL Extraction
     found_date = extract_date_from_url(url)
@@ -326,12 +542,9 @@ def extract_date_from_html(html: str, url: str, custom_rule_override: Optional[S
 async def extract_date_with_ai(html_content: str, url: str, api_key: str) -> Optional[str]:
     """
     Legacy/Fallback: Uses Gemini to extract date.
-    Assumes genai is configured.
     """
     try:
         if not api_key: return None
-        genai.configure(api_key=api_key)
-        model = genai.GenerativeModel('gemini-2.0-flash-exp') # Fast model
         
         truncated_html = html_content[:4000]
         prompt = f"""
@@ -346,7 +559,7 @@ async def extract_date_with_ai(html_content: str, url: str, api_key: str) -> Opt
         3. If no date is found, return NULL.
         """
         
-        response = await model.generate_content_async(prompt)
+        response = await llm_generate(api_key, 'gemini-2.0-flash-exp', prompt, priority=PRIORITY_INTERACTIVE) # Fast model
         ans = response.text.strip()
         if "NULL" in ans: return None
         # Validate format
@@ -358,7 +571,7 @@ async def extract_date_with_ai(html_content: str, url: str, api_key: str) -> Opt
         print(f"AI Date Extraction Failed: {e}")
         return None
 
-async def gemini_find_category_url(html_content: str, base_url: str, category: str, api_key: str) -> Optional[str]:
+async def gemini_find_category_url(html_content: Union[str, ParsedDocument], base_url: str, category: str, api_key: str) -> Optional[str]:
     """
     Uses Gemini to analyze the homepage navigation and find the best link for a given category.
     This works across all languages by understanding the semantic meaning of menu items.
@@ -366,13 +579,10 @@ async def gemini_find_category_url(html_content: str, base_url: str, category: s
     if not api_key: return None
     
     try:
-        genai.configure(api_key=api_key)
-        # Use a model capable of understanding HTML structure and multiple languages
-        # Using flash for speed/cost balance
-        model = genai.GenerativeModel('gemini-2.0-flash-exp') 
-        
         # We need the nav/header part. Cap to avoid context overflow.
-        soup = BeautifulSoup(html_content, 'html.parser')
+        doc = as_document(html_content, base_url)
+        html_content = doc.html
+        soup = doc.soup
         
         # Heuristic: Extract only likely navigation areas to reduce noise
         nav_elements = soup.find_all(['nav', 'header', 'ul', 'menu', 'div.menu', 'div.nav'])
@@ -400,7 +610,9 @@ async def gemini_find_category_url(html_content: str, base_url: str, category: s
         {{"url": "https://example.com/politika"}}
         """
         
-        response = await model.generate_content_async(prompt, generation_config={"response_mime_type": "application/json"})
+        # Flash model: understands HTML structure and multiple languages, speed/cost balance
+        response = await llm_generate(api_key, 'gemini-2.0-flash-exp', prompt, priority=PRIORITY_INTERACTIVE,
+                                      generation_config={"response_mime_type": "application/json"})
         data = json.loads(response.text)
         return data.get("url")
 
@@ -409,239 +621,311 @@ async def gemini_find_category_url(html_content: str, base_url: str, category: s
         return None
 
 # --- Link Extraction ---
-def extract_article_links(html: str, base_url: str) -> List[Dict[str, str]]:
+def extract_article_links(html: Union[str, ParsedDocument], base_url: str) -> List[Dict[str, str]]:
     """
     Extracts high-quality article links from a category/homepage.
     Returns list of dicts: {'url': ..., 'title': ...}
     """
     from urllib.parse import urljoin
-    soup = BeautifulSoup(html, 'html.parser')
+    doc = as_document(html, base_url)
     candidates = []
     seen_urls = set()
     
-    raw_links = soup.find_all('a', href=True)
-    with open("stream_debug.log", "a") as f: f.write(f"EXTRACT_ENGINE: Found {len(raw_links)} raw links in {base_url}\n")
+    raw_links = doc.links
+    dlog("EXTRACT_ENGINE", url=base_url, raw_links=len(raw_links))
     
     import traceback
     
-    for a in raw_links:
+    joined = []
+    for href, anchor_text in raw_links:
+        if not href: continue
         try:
-            href = a.get('href', None)
-            if not href: continue
-            
-            full_url = urljoin(base_url, href)
-            
-            # Helper to log immediate crash
-            with open("stream_debug.log", "a") as f: 
-                 # f.write(f"CHECKING: {full_url}\n") 
-                 pass
-            
-            # Basic Validation
-            if full_url in seen_urls: continue
-            
-            # IS VALID CHECK (Refactored for Soft Spam)
-            try:
-                keep, is_spam, reason = classify_url(full_url)
-                if not keep:
-                     # Log Hard Block
-                     # with open("stream_debug.log", "a") as f: f.write(f"HARD_BLOCK: {full_url} ({reason})\n")
-                     continue
-            except Exception as e:
-                with open("stream_debug.log", "a") as f: f.write(f"CRASH_IN_VALIDATION: {full_url} -> {e}\n")
-                continue
-                
-            if full_url == base_url or full_url + "/" == base_url: 
-                 # with open("stream_debug.log", "a") as f: f.write(f"REJECT_SELF: {full_url}\n")
-                 continue # Skip self
+            joined.append((urljoin(base_url, href), anchor_text))
+        except Exception as e:
+            dlog("CRASH_IN_LOOP", str(e), level=logging.ERROR, url=base_url, traceback=traceback.format_exc())
+    
+    # IS VALID CHECK (Refactored for Soft Spam) - whole page in one batch
+    verdicts = classify_urls([full_url for full_url, _ in joined])
+    
+    base_key = url_key(base_url)
+    for (full_url, anchor_text), (keep, is_spam, reason) in zip(joined, verdicts):
+        # Basic Validation (canonical key: ?utm_*, #fragment, trailing slash variants are one link)
+        key = url_key(full_url)
+        if key in seen_urls: continue
+        if not keep:
+             continue # Hard Block (classify_url logged the reason)
             
-            title = a.get_text(strip=True)
+        if key == base_key: 
+             dlog("REJECT_SELF", url=full_url, level=logging.DEBUG)
+             continue # Skip self
+        
+        title = anchor_text
 
-            if len(title) < 2: 
-                 # with open("stream_debug.log", "a") as f: f.write(f"REJECT_EMPTY_TITLE: {full_url}\n")
-                 continue 
-            
-            candidate = {'url': full_url, 'title': title}
-            if is_spam:
-                candidate['is_spam'] = True
-                candidate['spam_reason'] = reason
-            
-            candidates.append(candidate)
-            seen_urls.add(full_url)
-        except Exception as e:
-            with open("stream_debug.log", "a") as f: 
-                 f.write(f"CRASH_IN_LOOP: {e}\n")
-                 traceback.print_exc(file=f)
+        if len(title) < 2: 
+             dlog("REJECT_EMPTY_TITLE", url=full_url, level=logging.DEBUG)
+             continue 
+        
+        candidate = {'url': full_url, 'title': title}
+        if is_spam:
+            candidate['is_spam'] = True
+            candidate['spam_reason'] = reason
+        
+        candidates.append(candidate)
+        seen_urls.add(key)
         
     return candidates
 
-def detect_content_type(html: str) -> str:
+CONTENT_NOISE_KEYWORDS = (
+    "donate", "support", "pidtrymka", "contact", "rubric", "donat",
+    "termeni", "conditii", "gdpr", "confidentialitate",
+    "index", "homepage", "arhiva", "login", "register"
+)
+
+def content_signals(html: Union[str, ParsedDocument]) -> dict:
     """
-    Analyzes HTML to determine if it's an Article or a Category/Landing page.
-    Returns: 'article', 'category', or 'unknown'
+    Page-shape measurements used by detect_content_type: visible text length,
+    link density (link text / all text), paragraphs over 60 chars and og:type.
     """
-    if not html: return "unknown"
-    soup = BeautifulSoup(html, 'html.parser')
-    
+    doc = as_document(html)
+    soup = doc.soup
+    all_text = doc.get_text()
+    link_text_len = sum(len(a.get_text(strip=True)) for a in soup.find_all("a"))
+
+    significant_paras = 0
+    para_text_len = 0
+    for p in soup.find_all("p"):
+        text = p.get_text(strip=True)
+        if len(text) > 60:
+            significant_paras += 1
+            para_text_len += len(text)
+
+    return {
+        "text_len": len(all_text),
+        "link_density": round(link_text_len / len(all_text), 3) if all_text else 0.0,
+        "significant_paras": significant_paras,
+        "para_text_len": para_text_len,
+        "og_type": (doc.meta_content("property", "og:type") or "").strip().lower(),
+        "title": soup.title.string.lower() if soup.title and soup.title.string else "",
+    }
+
+def content_type_from_signals(signals: dict) -> str:
+    """'article', 'category' or 'unknown' from content_signals() output."""
     # 1. Content-Based Heuristics (More reliable than Metadata)
-    
-    # A. Link Density Check
-    # Categories/Landing pages have high ratio of link text to total text.
-    all_text = soup.get_text(strip=True)
-    if len(all_text) < 100: return "unknown" # innovative
-    
-    links = soup.find_all("a")
-    link_text_len = sum(len(a.get_text(strip=True)) for a in links)
-    
-    link_density = link_text_len / len(all_text)
-    
+    if signals["text_len"] < 100: return "unknown"
+
     # B. Title/Keyword Check (Noise Filter)
-    title = soup.title.string.lower() if soup.title else ""
-    noise_keywords = [
-        "donate", "support", "pidtrymka", "contact", "rubric", "donat",
-        "termeni", "conditii", "gdpr", "confidentialitate",
-        "index", "homepage", "arhiva", "login", "register"
-    ]
-    if any(k in title for k in noise_keywords):
+    if any(k in signals["title"] for k in CONTENT_NOISE_KEYWORDS):
         return "category" # Treat as category/page to reject
-        
-    # Decision: High Link Density -> Category
-    if link_density > 0.45:
+
+    # A. Link Density Check
+    # Categories/Landing pages have high ratio of link text to total text.
+    if signals["link_density"] > 0.45:
         return "category"
 
     # 2. Paragraph Heuristic (Legacy but valid)
-    paragraphs = soup.find_all("p")
-    significant_paras = 0
-    total_p_text_length = 0
-    
-    for p in paragraphs:
-        text = p.get_text(strip=True)
-        if len(text) > 60: 
-            significant_paras += 1
-            total_p_text_length += len(text)
-            
-    # 3. Decision Logic
-    if significant_paras < 2:
+    # A short piece the site itself tags og:type=article (video, photo story) is not a category
+    if signals["significant_paras"] < 2 and signals["og_type"] != "article":
         return "category"
-        
-    # 4. Metadata Check (Secondary - only if heuristics are ambiguous? No, trust heuristics first)
-    # If og:type says article but density is high, we trusted density (above).
-    # If density is low (looks like article) AND significant paras exist:
-    if significant_paras >= 3 and total_p_text_length > 500:
+
+    # 3. Decision Logic
+    if signals["significant_paras"] >= 3 and signals["para_text_len"] > 500:
         return "article"
-        
-    return "unknown" 
 
-def classify_url(url: str) -> tuple:
+    # 4. Metadata Check (Secondary - heuristics were ambiguous)
+    if signals["og_type"] == "article":
+        return "article"
+
+    return "unknown"
+
+def content_type_from_head(html: Union[str, ParsedDocument]) -> str:
     """
-    Analyzes a URL and returns (keep: bool, is_spam: bool, reason: str).
+    Verdict for a head-only read (no body to measure): og:type=article from the
+    pre-scan, otherwise 'unknown'. Never 'category' - that needs the full page.
     """
-    if not url: return False, False, "Empty URL"
-    
+    doc = as_document(html)
+    og_type = doc.prescan.meta_content("property", "og:type") or ""
+    return "article" if og_type.strip().lower() == "article" else "unknown"
+
+def detect_content_type(html: Union[str, ParsedDocument]) -> str:
+    """
+    Analyzes HTML to determine if it's an Article or a Category/Landing page.
+    Returns: 'article', 'category', or 'unknown'
+    """
+    if not html: return "unknown"
+    doc = as_document(html)
+    if not doc.html: return "unknown"
+    return content_type_from_signals(content_signals(doc))
+
+# --- URL Classifier ---
+# classify_url runs for every anchor on every page, so its rule tables are
+# compiled once at import instead of being rebuilt per call:
+#   - blocked path substrings: one regex built from a character trie of the
+#     keywords (shared prefixes factored out), so the path is scanned once
+#   - blocked domains: reversed-label trie; a rule matches when its labels appear
+#     as a contiguous run in the host (google.com blocks news.google.com and
+#     google.com.ro, but no longer mygoogle.com like the old substring test did)
+#   - blocked path segments: frozenset lookups
+#   - pagination / digit patterns: precompiled
+# Verdicts are memoized per URL (nav and footer links repeat on every page of
+# an outlet); the DEBUG log record is still emitted on every call.
+CLASSIFY_CACHE_SIZE = int(os.getenv("CLASSIFY_CACHE_SIZE", "65536"))
+
+IGNORED_EXTENSIONS = (
+    '.css', '.js', '.json', '.xml', '.rss', '.atom', 
+    '.jpg', '.jpeg', '.png', '.gif', '.webp', '.svg', '.ico',
+    '.mp4', '.mp3', '.wav', '.avi', '.mov', 
+    '.pdf', '.doc', '.docx', '.xls', '.xlsx', '.zip', '.tar', '.gz'
+)
+
+# Universal Spam Filter Rules (V4 - Content Verified)
+# 1. Substrings: Safe to block if anywhere in path
+BLOCKED_SUBSTRINGS = frozenset({
+    "login", "signin", "signup", "register", "password", 
+    "subscribe", "subscription", "unsubscribe",
+    "terms-of-service", "privacy-policy", "cookie-policy",
+    "newsletter", "rss-feed", "sitemap", 
+    "advertorial", "mediakit",
+    "/tag/", "/category/", "/topic/", "/author/", "/section/", 
+    "/szero/", # Specific taxonomies
+    "odr/main", # EU Dispute
+    "epaper", "paperindex", "html5/reader", "onelink.me",
+    "/feed/", "/rss", "/search", "/cart/", "/basket/"
+})
+
+# 2. Segments: Only block if FULL path segment
+BLOCKED_SEGMENTS = frozenset({
+    "admin", "dashboard", "profile", "user", "account", "billing", "my",
+    "donate", "donation", "giving", "pay", "payment", "checkout", "cart", "shop",
+    "careers", "jobs", "employment", "vacancy", "work-with-us",
+    "terms", "privacy", "legal", "gdpr", "tos", "policy", "rules", "disclaimer", "copyright",
+    "contact", "contact-us", "about", "about-us", "info", "help", "faq", "support", "feedback",
+    "search", "find", "archive", "weather", "horoscope", "traffic",
+    "gallery", "photos", "video", "videos", "live", "watch", "listen", "podcast", "shows",
+    "servicii", "codul", "redactia", "echipa", "publicitate", "abonamente",
+    "mobile", "scroll", "newmedia", "special", "specials" # Added specials back as it's often junk
+})
+
+# High-Risk Domains (Hard Block)
+BLOCKED_DOMAINS = frozenset({
+    "accuweather.com", "weather.com", "airtable.com", "intuit.com", 
+    "oraclecloud.com", "pagesuite-professional.co.uk", "eepurl.com",
+    "facebook.com", "twitter.com", "instagram.com", "linkedin.com",
+    "youtube.com", "google.com", "bing.com", "foxlocal.onelink.me",
+    "help.startribune.com", "corp.sina.com.cn", "games.sina.com.cn",
+    "hugedomains.com", "issuu.com", "ec.europa.eu", "paydemic.com", "wordpress.org"
+})
+
+SPAM_QUERY_KEYS = ('cat_id=', 'tag=', 'sort=', 'filter=', 'page=')
+
+def literal_trie_regex(words) -> str:
+    """Regex source matching any of words, with common prefixes factored: (?:/(?:tag/|topic/)|login|...)."""
+    trie = {}
+    for word in words:
+        node = trie
+        for ch in word:
+            node = node.setdefault(ch, {})
+        node[""] = True # end of a word
+
+    def build(node) -> str:
+        if list(node) == [""]:
+            return ""
+        branches, tails = [], []
+        for ch in sorted(k for k in node if k):
+            rest = build(node[ch])
+            (branches.append(re.escape(ch) + rest) if rest else tails.append(re.escape(ch)))
+        if len(tails) == 1:
+            branches.append(tails[0])
+        elif tails:
+            branches.append("[" + "".join(tails) + "]")
+        source = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+        return f"(?:{source})?" if "" in node else source # a shorter word ends here
+
+    return build(trie)
+
+BLOCKED_SUBSTRING_RE = re.compile(literal_trie_regex(BLOCKED_SUBSTRINGS))
+SPAM_QUERY_RE = re.compile(literal_trie_regex(SPAM_QUERY_KEYS))
+PAGINATION_RE = re.compile(r'/(page|p)/\d+')
+PAGINATION_ID_RE = re.compile(r'/(\d+)\.html$')
+DIGITS_RE = re.compile(r'^\d+$')
+
+_DOMAIN_END = ""  # trie key marking the last label of a blocked domain
+
+def _build_domain_trie(domains) -> dict:
+    trie = {}
+    for domain in domains:
+        node = trie
+        for label in reversed(domain.split(".")):
+            node = node.setdefault(label, {})
+        node[_DOMAIN_END] = True
+    return trie
+
+BLOCKED_DOMAIN_TRIE = _build_domain_trie(BLOCKED_DOMAINS)
+
+@lru_cache(maxsize=4096) # a page's links share a handful of hosts
+def is_blocked_domain(host: str) -> bool:
+    """True if a BLOCKED_DOMAINS entry appears as whole labels in host (sub.google.com, google.com.ro)."""
+    labels = host.split(".")[::-1]
+    for start in range(len(labels)):
+        node = BLOCKED_DOMAIN_TRIE
+        for label in labels[start:]:
+            node = node.get(label)
+            if node is None:
+                break
+            if _DOMAIN_END in node:
+                return True
+    return False
+
+@lru_cache(maxsize=CLASSIFY_CACHE_SIZE)
+def _classify(url: str) -> tuple:
+    """(verdict, log event, log fields) for classify_url; pure, so memoizable."""
     url_lower = url.lower()
     
-    # DEBUG LOGGING
     # 0. Protocol Check (Hard Block)
     if not (url_lower.startswith('http://') or url_lower.startswith('https://')):
-        with open("stream_debug.log", "a") as f: f.write(f"REJECT_PROTOCOL: {url}\n")
-        return False, False, "Invalid Protocol"
+        return (False, False, "Invalid Protocol"), "REJECT_PROTOCOL", {}
 
     # 1. Hard Block: Extensions (Technical)
-    IGNORED_EXTENSIONS = (
-        '.css', '.js', '.json', '.xml', '.rss', '.atom', 
-        '.jpg', '.jpeg', '.png', '.gif', '.webp', '.svg', '.ico',
-        '.mp4', '.mp3', '.wav', '.avi', '.mov', 
-        '.pdf', '.doc', '.docx', '.xls', '.xlsx', '.zip', '.tar', '.gz'
-    )
     if url_lower.endswith(IGNORED_EXTENSIONS):
-        with open("stream_debug.log", "a") as f: f.write(f"REJECT_EXT: {url}\n")
-        return False, False, "Ignored Extension"
-
-    # Universal Spam Filter Rules (V4 - Content Verified)
-    # 1. Substrings: Safe to block if anywhere in path
-    BLOCKED_SUBSTRINGS = {
-        "login", "signin", "signup", "register", "password", 
-        "subscribe", "subscription", "unsubscribe",
-        "terms-of-service", "privacy-policy", "cookie-policy",
-        "newsletter", "rss-feed", "sitemap", 
-        "advertorial", "mediakit",
-        "/tag/", "/category/", "/topic/", "/author/", "/section/", 
-        "/szero/", # Specific taxonomies
-        "odr/main", # EU Dispute
-        "epaper", "paperindex", "html5/reader", "onelink.me",
-        "/feed/", "/rss", "/search", "/cart/", "/basket/"
-    }
-
-    # 2. Segments: Only block if FULL path segment
-    BLOCKED_SEGMENTS = {
-        "admin", "dashboard", "profile", "user", "account", "billing", "my",
-        "donate", "donation", "giving", "pay", "payment", "checkout", "cart", "shop",
-        "careers", "jobs", "employment", "vacancy", "work-with-us",
-        "terms", "privacy", "legal", "gdpr", "tos", "policy", "rules", "disclaimer", "copyright",
-        "contact", "contact-us", "about", "about-us", "info", "help", "faq", "support", "feedback",
-        "search", "find", "archive", "weather", "horoscope", "traffic",
-        "gallery", "photos", "video", "videos", "live", "watch", "listen", "podcast", "shows",
-        "servicii", "codul", "redactia", "echipa", "publicitate", "abonamente",
-        "mobile", "scroll", "newmedia", "special", "specials" # Added specials back as it's often junk
-    }
+        return (False, False, "Ignored Extension"), "REJECT_EXT", {}
 
-    # High-Risk Domains (Hard Block)
-    BLOCKED_DOMAINS = {
-        "accuweather.com", "weather.com", "airtable.com", "intuit.com", 
-        "oraclecloud.com", "pagesuite-professional.co.uk", "eepurl.com",
-        "facebook.com", "twitter.com", "instagram.com", "linkedin.com",
-        "youtube.com", "google.com", "bing.com", "foxlocal.onelink.me",
-        "help.startribune.com", "corp.sina.com.cn", "games.sina.com.cn",
-        "hugedomains.com", "issuu.com", "ec.europa.eu", "paydemic.com", "wordpress.org"
-    }
-    
     parsed = urlparse(url)
     domain_part = parsed.netloc.replace("www.", "").lower()
     path = parsed.path.lower()
 
     # A. Domain Check (Spam)
-    if any(d in domain_part for d in BLOCKED_DOMAINS):
-        with open("stream_debug.log", "a") as f: f.write(f"SPAM_DOMAIN: {url}\n")
-        return True, True, "Domain Block" # Keep as Spam
+    if is_blocked_domain(domain_part):
+        return (True, True, "Domain Block"), "SPAM_DOMAIN", {} # Keep as Spam
         
     # B. Substring Check (Spam)
-    for kw in BLOCKED_SUBSTRINGS:
-        if kw in path:
-            with open("stream_debug.log", "a") as f: f.write(f"SPAM_KEYWORD [{kw}]: {url}\n")
-            return True, True, f"Keyword Block: {kw}"
+    m = BLOCKED_SUBSTRING_RE.search(path)
+    if m:
+        kw = m.group(0)
+        return (True, True, f"Keyword Block: {kw}"), "SPAM_KEYWORD", {"kw": kw}
 
     # C. Segment Check (Spam)
     segments = [s for s in path.strip("/").split("/") if s]
     for seg in segments:
          if seg in BLOCKED_SEGMENTS:
-             with open("stream_debug.log", "a") as f: f.write(f"SPAM_SEGMENT [{seg}]: {url}\n")
-             return True, True, f"Segment Block: {seg}"
+             return (True, True, f"Segment Block: {seg}"), "SPAM_SEGMENT", {"seg": seg}
 
     # 3. Explicit Pagination Check (Spam)
-    if re.search(r'/(page|p)/\d+', url_lower) or re.search(r'/\d+\.html$', url_lower):
-        match = re.search(r'/(\d+)\.html$', url_lower)
-        if match:
-             num = int(match.group(1))
-             if num < 50: 
-                 with open("stream_debug.log", "a") as f: f.write(f"SPAM_PAGINATION_ID: {url}\n")
-                 return True, True, "Pagination ID"
-        else:
-             if '/page/' in url_lower: 
-                 with open("stream_debug.log", "a") as f: f.write(f"SPAM_PAGINATION: {url}\n")
-                 return True, True, "Pagination Pattern"
+    match = PAGINATION_ID_RE.search(url_lower) if url_lower.endswith(".html") else None
+    if match:
+         if int(match.group(1)) < 50: 
+             return (True, True, "Pagination ID"), "SPAM_PAGINATION_ID", {}
+    elif '/page/' in url_lower and PAGINATION_RE.search(url_lower): 
+         return (True, True, "Pagination Pattern"), "SPAM_PAGINATION", {}
             
     # 4. Path Analysis (Structural) - Homepage is a Hard Block
     path_strip = path.strip("/")
     if not path_strip: 
-        with open("stream_debug.log", "a") as f: f.write(f"REJECT_HOMEPAGE: {url}\n")
-        return False, False, "Homepage" # Hard Block Homepage (redundant duplicate)
+        return (False, False, "Homepage"), "REJECT_HOMEPAGE", {} # Hard Block Homepage (redundant duplicate)
 
     last_seg = segments[-1] if segments else ""
     
     # 5. Pagination Blocking (Spam)
-    if re.match(r'^\d+$', last_seg):
-        if len(last_seg) < 4: 
-             with open("stream_debug.log", "a") as f: f.write(f"SPAM_SHORT_DIGIT: {url}\n")
-             return True, True, "Short Digit (Pagination)"
+    if len(last_seg) < 4 and DIGITS_RE.match(last_seg):
+         return (True, True, "Short Digit (Pagination)"), "SPAM_SHORT_DIGIT", {}
 
     # 6. Single Segment Category Heuristic (Spam)
     if len(segments) == 1:
@@ -650,21 +934,46 @@ def classify_url(url: str) -> tuple:
         hyphen_count = slug.count("-")
         
         if len(slug) < 20 and not has_digits and hyphen_count < 2:
-             with open("stream_debug.log", "a") as f: f.write(f"SPAM_SINGLE_SEG: {url}\n")
-             return True, True, "Short Path (Category Heuristic)"
+             return (True, True, "Short Path (Category Heuristic)"), "SPAM_SINGLE_SEG", {}
         
-        if slug in ["opinion", "editorials"]:
-             with open("stream_debug.log", "a") as f: f.write(f"SPAM_OPINION: {url}\n")
-             return True, True, "Opinion/Editorial"
+        if slug in ("opinion", "editorials"):
+             return (True, True, "Opinion/Editorial"), "SPAM_OPINION", {}
 
     # 7. Query Param Check (Spam)
-    if parsed.query:
-        q = parsed.query.lower()
-        if any(p in q for p in ['cat_id=', 'tag=', 'sort=', 'filter=', 'page=']):
-             with open("stream_debug.log", "a") as f: f.write(f"SPAM_QUERY_PARAMS: {url}\n")
-             return True, True, "Query Params"
+    if parsed.query and SPAM_QUERY_RE.search(parsed.query.lower()):
+         return (True, True, "Query Params"), "SPAM_QUERY_PARAMS", {}
             
-    return True, False, "Result: Valid"
+    return (True, False, "Result: Valid"), None, {}
+
+def classify_url(url: str) -> tuple:
+    """
+    Analyzes a URL and returns (keep: bool, is_spam: bool, reason: str).
+    """
+    if not url: return False, False, "Empty URL"
+    verdict, event, fields = _classify(url)
+    if event:
+        dlog(event, url=url, level=logging.DEBUG, **fields)
+    return verdict
+
+def classify_urls(urls: List[str]) -> List[tuple]:
+    """
+    classify_url for a whole page of links: each distinct URL is classified
+    once. A URL whose classification raises comes back as a hard block
+    (False, False, "Error: ...") instead of aborting the batch.
+    """
+    verdicts = {}
+    results = []
+    for url in urls:
+        verdict = verdicts.get(url)
+        if verdict is None:
+            try:
+                verdict = classify_url(url)
+            except Exception as e:
+                dlog("CRASH_IN_VALIDATION", str(e), level=logging.ERROR, url=url)
+                verdict = (False, False, f"Error: {e}")
+            verdicts[url] = verdict
+        results.append(verdict)
+    return results
 
 def is_valid_article_url(url: str) -> bool:
     """
@@ -688,8 +997,8 @@ async def fetch_sitemap_urls(base_url: str, max_urls: int = 50, days_limit: int
     sub_sitemaps_fetched = 0
     
     try:
-        import httpx
         import xml.etree.ElementTree as ET
+        from services.crawl_frontier import get_frontier
         from datetime import datetime, timedelta
         
         # Threshold: N days ago
@@ -700,89 +1009,89 @@ async def fetch_sitemap_urls(base_url: str, max_urls: int = 50, days_limit: int
             "Accept": "application/xml,text/xml,application/xhtml+xml,text/html;q=0.9,*/*;q=0.8"
         }
 
-        async with httpx.AsyncClient(verify=False, timeout=20, follow_redirects=True, headers=headers) as client:
-            for path in paths:
-                target = base_url.rstrip("/") + path
-                try:
-                    resp = await client.get(target)
-                    if resp.status_code == 200 and "xml" in resp.headers.get("Content-Type", "").lower():
-                        # Limit XML size to 10MB to prevent OOM/DoS
-                        if len(resp.content) > 10 * 1024 * 1024:
-                            print(f"Skipping sitemap {target}: Too large ({len(resp.content)} bytes)")
-                            continue
+        frontier = get_frontier() # sitemaps use the unverified pool (outlets with broken chains)
+        for path in paths:
+            target = base_url.rstrip("/") + path
+            try:
+                resp = await frontier.fetch(target, headers=headers, timeout=20, insecure=True)
+                if resp.status_code == 200 and "xml" in resp.headers.get("Content-Type", "").lower():
+                    # Limit XML size to 10MB to prevent OOM/DoS
+                    if len(resp.content) > 10 * 1024 * 1024:
+                        print(f"Skipping sitemap {target}: Too large ({len(resp.content)} bytes)")
+                        continue
                             
-                        try:
-                            root = ET.fromstring(resp.text)
-                        except ET.ParseError:
-                            print(f"Skipping sitemap {target}: Invalid XML")
-                            continue
-
-                        # Better loop: Iterate top-level children (url or sitemap)
-                        # We need to handle namespaces blindly
-                        for item in root:
-                            url = None
-                            lastmod_date = None
+                    try:
+                        root = ET.fromstring(resp.text)
+                    except ET.ParseError:
+                        print(f"Skipping sitemap {target}: Invalid XML")
+                        continue
+
+                    # Better loop: Iterate top-level children (url or sitemap)
+                    # We need to handle namespaces blindly
+                    for item in root:
+                        url = None
+                        lastmod_date = None
                             
-                            for child in item:
-                                tag = child.tag.split('}')[-1]
-                                if tag == "loc": url = child.text.strip() if child.text else None
-                                if tag == "lastmod": 
-                                    try: 
-                                        # Parsing ISO date (many formats possible, take first 10 chars YYYY-MM-DD)
-                                        d_str = child.text.strip()[:10]
-                                        lastmod_date = datetime.strptime(d_str, "%Y-%m-%d")
-                                    except: pass
+                        for child in item:
+                            tag = child.tag.split('}')[-1]
+                            if tag == "loc": url = child.text.strip() if child.text else None
+                            if tag == "lastmod": 
+                                try: 
+                                    # Parsing ISO date (many formats possible, take first 10 chars YYYY-MM-DD)
+                                    d_str = child.text.strip()[:10]
+                                    lastmod_date = datetime.strptime(d_str, "%Y-%m-%d")
+                                except: pass
                                     
-                            if url:
-                                # Recursive check if it points to another xml (Index)
-                                if url.endswith(".xml"):
-                                    # Limit recursion to avoid infinite archives
-                                    if sub_sitemaps_fetched >= 3: continue # Reduced to 3
+                        if url:
+                            # Recursive check if it points to another xml (Index)
+                            if url.endswith(".xml"):
+                                # Limit recursion to avoid infinite archives
+                                if sub_sitemaps_fetched >= 3: continue # Reduced to 3
                                     
-                                    if lastmod_date and lastmod_date < cutoff_date:
-                                        continue 
+                                if lastmod_date and lastmod_date < cutoff_date:
+                                    continue 
                                         
-                                    try:
-                                        sub_sitemaps_fetched += 1
-                                        sub_resp = await client.get(url)
-                                        if sub_resp.status_code == 200:
-                                            if len(sub_resp.content) > 5 * 1024 * 1024: continue
-                                            sub_root = ET.fromstring(sub_resp.text)
-                                            # Extract from sub
-                                            for sub_item in sub_root:
-                                                s_url = None
-                                                s_date = None
-                                                for sub_child in sub_item:
-                                                    tag = sub_child.tag.split('}')[-1]
-                                                    if tag == "loc": s_url = sub_child.text.strip() if sub_child.text else None
-                                                    if tag == "lastmod" and sub_child.text:
-                                                        try:
-                                                            s_date = datetime.strptime(sub_child.text.strip()[:10], "%Y-%m-%d")
-                                                        except: pass
+                                try:
+                                    sub_sitemaps_fetched += 1
+                                    sub_resp = await frontier.fetch(url, headers=headers, timeout=20, insecure=True)
+                                    if sub_resp.status_code == 200:
+                                        if len(sub_resp.content) > 5 * 1024 * 1024: continue
+                                        sub_root = ET.fromstring(sub_resp.text)
+                                        # Extract from sub
+                                        for sub_item in sub_root:
+                                            s_url = None
+                                            s_date = None
+                                            for sub_child in sub_item:
+                                                tag = sub_child.tag.split('}')[-1]
+                                                if tag == "loc": s_url = sub_child.text.strip() if sub_child.text else None
+                                                if tag == "lastmod" and sub_child.text:
+                                                    try:
+                                                        s_date = datetime.strptime(sub_child.text.strip()[:10], "%Y-%m-%d")
+                                                    except: pass
                                                 
-                                                # APPLY FILTER
-                                                if s_url and is_valid_article_url(s_url):
-                                                    # Filter by date if available
-                                                    if s_date:
-                                                        if s_date >= cutoff_date:
-                                                            found_items.append((s_date, s_url))
-                                                    else:
-                                                        found_items.append((None, s_url))
-                                    except: pass
-                                else:
-                                    # APPPLY FILTER (Root Level)
-                                    if is_valid_article_url(url):
-                                        if lastmod_date:
-                                            if lastmod_date >= cutoff_date:
-                                                found_items.append((lastmod_date, url))
-                                        else:
-                                            found_items.append((datetime.min, url))
+                                            # APPLY FILTER
+                                            if s_url and is_valid_article_url(s_url):
+                                                # Filter by date if available
+                                                if s_date:
+                                                    if s_date >= cutoff_date:
+                                                        found_items.append((s_date, s_url))
+                                                else:
+                                                    found_items.append((None, s_url))
+                                except: pass
+                            else:
+                                # APPPLY FILTER (Root Level)
+                                if is_valid_article_url(url):
+                                    if lastmod_date:
+                                        if lastmod_date >= cutoff_date:
+                                            found_items.append((lastmod_date, url))
+                                    else:
+                                        found_items.append((datetime.min, url))
                                             
-                        # If we found something, break (one valid sitemap path is enough)
-                        if found_items: break
-                except Exception as e:
-                    # print(f"Sitemap parse error: {e}")
-                    continue
+                    # If we found something, break (one valid sitemap path is enough)
+                    if found_items: break
+            except Exception as e:
+                # print(f"Sitemap parse error: {e}")
+                continue
                     
     except Exception as e:
         print(f"Sitemap fetch failed: {e}")
@@ -937,12 +1246,13 @@ def generate_master_timeline(all_events_map: Dict[str, List[Dict[str, Any]]]):
     print("Master Timeline saved to master_timeline.html")
 
 # --- Title Extraction ---
-def extract_title_from_html(html: str, url: str, custom_rule_override: Optional[ScraperRule] = None) -> Optional[str]:
+def extract_title_from_html(html: Union[str, ParsedDocument], url: str, custom_rule_override: Optional[ScraperRule] = None) -> Optional[str]:
     """
     Extracts the article title using Rules, Metadata, or Heuristics.
     """
     if not html: return None
-    soup = BeautifulSoup(html, 'html.parser')
+    doc = as_document(html, url)
+    if not doc.html: return None
     
     # 0. Check Rules Registry or Override
     rule = custom_rule_override
@@ -950,10 +1260,19 @@ def extract_title_from_html(html: str, url: str, custom_rule_override: Optional[
         domain = url.split("//")[-1].split("/")[0].replace("www.", "")
         rule = SCRAPER_REGISTRY.get(domain)
     
+    # Fast path: og:title straight from the raw HTML
+    if PRESCAN_ENABLED:
+        fast = prescan_title(doc, rule)
+        if fast is not None:
+            doc.title_source = "prescan"
+            return fast
+    doc.title_source = "dom"
+    soup = doc.soup
+    
     if rule and rule.title_selectors:
         for selector in rule.title_selectors:
             try:
-                el = soup.select_one(selector)
+                el = compile_selector(selector).select_one(soup)
                 if el:
                     text = el.get_text(strip=True)
                     if len(text) > 5: return text
@@ -961,9 +1280,9 @@ def extract_title_from_html(html: str, url: str, custom_rule_override: Optional[
                 print(f"Rule Title Selector '{selector}' failed: {e}")
 
     # 1. Open Graph Meta
-    og_title = soup.find("meta", property="og:title")
-    if og_title and og_title.get("content"):
-        return og_title["content"].strip()
+    og_title = doc.meta_content("property", "og:title")
+    if og_title:
+        return og_title.strip()
 
     # 2. H1 (Standard for most CMS)
     h1 = soup.find("h1")
@@ -972,9 +1291,9 @@ def extract_title_from_html(html: str, url: str, custom_rule_override: Optional[
         if len(text) > 5: return text
 
     # 3. Twitter Card
-    tw_title = soup.find("meta", attrs={"name": "twitter:title"})
-    if tw_title and tw_title.get("content"):
-        return tw_title["content"].strip()
+    tw_title = doc.meta_content("name", "twitter:title")
+    if tw_title:
+        return tw_title.strip()
         
     # 4. Fallback to <title>
     if soup.title:
@@ -0,0 +1,115 @@
+import re
+import codecs
+from typing import Optional, Tuple
+
+# --- Charset Detection ---
+# One decision per fetched page, made on the raw bytes, in this order:
+#   1. byte-order mark
+#   2. charset in the Content-Type header
+#   3. <meta charset> / <meta http-equiv="Content-Type"> in the first 4KB
+#   4. strict UTF-8 check on a sample
+#   5. the outlet's memoized encoding (NewsOutlet.encoding)
+#   6. charset_normalizer (optional) on the sample
+# Valid UTF-8 wins over the memoized encoding: a wrong stored guess would
+# otherwise decode every undeclared UTF-8 page as mojibake and be stored again.
+# The body is then decoded exactly once with that encoding. httpx alone only
+# looks at the header and otherwise assumes UTF-8, which garbles the many
+# windows-1251 / windows-1250 / iso-8859-2 outlets that only declare it in <meta>.
+
+try:
+    from charset_normalizer import from_bytes as _normalizer_from_bytes
+    CHARSET_NORMALIZER_AVAILABLE = True
+except ImportError:
+    _normalizer_from_bytes = None
+    CHARSET_NORMALIZER_AVAILABLE = False
+
+META_SNIFF_BYTES = 4096
+SAMPLE_BYTES = 64 * 1024
+
+META_CHARSET_RE = re.compile(rb'<meta[^>]+charset\s*=\s*["\']?\s*([\w.:-]+)', re.I)
+BOMS = (
+    (codecs.BOM_UTF8, "utf-8-sig"),
+    (codecs.BOM_UTF16_LE, "utf-16"),
+    (codecs.BOM_UTF16_BE, "utf-16"),
+)
+
+_stats = {"bom": 0, "header": 0, "meta": 0, "fallback": 0, "utf8": 0, "detected": 0, "default": 0}
+
+
+def normalize_encoding(name: Optional[str]) -> Optional[str]:
+    """Canonical codec name, or None for empty/unknown names."""
+    if not name:
+        return None
+    try:
+        return codecs.lookup(name.strip().strip("\"'")).name
+    except LookupError:
+        return None
+
+
+def _looks_utf8(sample: bytes) -> bool:
+    try:
+        # Incremental decoder tolerates a multi-byte sequence cut at the sample end
+        codecs.getincrementaldecoder("utf-8")().decode(sample, final=False)
+        return True
+    except UnicodeDecodeError:
+        return False
+
+
+def detect_encoding(content: bytes, declared: Optional[str] = None, fallback: Optional[str] = None) -> Tuple[str, str]:
+    """
+    Returns (encoding, source) for a page body. source is one of
+    bom / header / meta / utf8 / fallback / detected / default.
+    content may be just the first chunk(s) of a streamed body.
+    """
+    for bom, name in BOMS:
+        if content.startswith(bom):
+            return _hit(name, "bom")
+
+    name = normalize_encoding(declared)
+    if name:
+        return _hit(name, "header")
+
+    m = META_CHARSET_RE.search(content[:META_SNIFF_BYTES])
+    if m:
+        name = normalize_encoding(m.group(1).decode("ascii", errors="ignore"))
+        if name:
+            return _hit(name, "meta")
+
+    sample = content[:SAMPLE_BYTES]
+    if _looks_utf8(sample):
+        return _hit("utf-8", "utf8")
+
+    name = normalize_encoding(fallback)
+    if name:
+        return _hit(name, "fallback")
+
+    if CHARSET_NORMALIZER_AVAILABLE:
+        try:
+            best = _normalizer_from_bytes(sample).best()
+            name = normalize_encoding(best.encoding) if best else None
+            if name:
+                return _hit(name, "detected")
+        except Exception:
+            pass
+    return _hit("utf-8", "default")
+
+
+def _hit(name: str, source: str) -> Tuple[str, str]:
+    _stats[source] += 1
+    return name, source
+
+
+def apply_detected_encoding(resp, fallback: Optional[str] = None) -> str:
+    """
+    Sets resp.encoding (httpx.Response) from the bytes before anything reads
+    resp.text; httpx then decodes once and caches the text for every consumer.
+    Returns the encoding.
+    """
+    encoding, _ = detect_encoding(resp.content, resp.charset_encoding, fallback)
+    resp.encoding = encoding
+    return encoding
+
+
+def get_charset_stats() -> dict:
+    """How often each detection step decided the encoding."""
+    return dict(_stats)
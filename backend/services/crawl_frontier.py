@@ -0,0 +1,190 @@
+import os
+import time
+import asyncio
+from collections import deque
+from contextlib import asynccontextmanager
+from urllib.parse import urlparse
+
+import httpx
+
+from services.http_client import get_http_client, MAX_CONNECTIONS_PER_HOST
+from services.domain_health import get_domain_health
+
+# --- Crawl Frontier ---
+# Process-wide scheduler every scraper fetch goes through. Replaces the nested
+# per-outlet semaphores and the blind sleep before each deep scan with:
+#   - a global cap on in-flight fetches
+#   - a per-domain cap on in-flight fetches
+#   - a per-domain minimum interval between request starts
+# Waiting domains are served round-robin, so one outlet with 40 deep scans
+# cannot starve the others sharing the digest.
+# Domains whose circuit breaker is open are rejected before they queue
+# (CircuitOpenError), and network errors inside a slot count as failures.
+
+GLOBAL_CONCURRENCY = int(os.getenv("CRAWL_GLOBAL_CONCURRENCY", "30"))
+PER_DOMAIN_CONCURRENCY = int(os.getenv("CRAWL_PER_DOMAIN_CONCURRENCY", str(MAX_CONNECTIONS_PER_HOST)))
+PER_DOMAIN_INTERVAL = float(os.getenv("CRAWL_PER_DOMAIN_INTERVAL", "0.25")) # seconds between starts
+
+
+def domain_of(url: str) -> str:
+    return urlparse(url).netloc.replace("www.", "").lower()
+
+
+class CrawlFrontier:
+    def __init__(self, global_limit: int = GLOBAL_CONCURRENCY, per_domain_limit: int = PER_DOMAIN_CONCURRENCY, per_domain_interval: float = PER_DOMAIN_INTERVAL):
+        self.global_limit = global_limit
+        self.per_domain_limit = per_domain_limit
+        self.per_domain_interval = per_domain_interval
+
+        self._queues = {}     # domain -> deque[Future] of waiting fetches
+        self._ring = deque()  # domains with waiters, in round-robin order
+        self._active = {}     # domain -> in-flight count
+        self._next_start = {} # domain -> earliest monotonic time for next start
+        self._global_active = 0
+        self._timer = None
+        self._stats = {"granted": 0, "wait_total": 0.0, "wait_max": 0.0}
+
+    async def acquire(self, url: str) -> str:
+        """Waits for a fetch slot for url's domain. Returns the domain key for release()."""
+        domain = domain_of(url)
+        fut = asyncio.get_running_loop().create_future()
+        queue = self._queues.get(domain)
+        if queue is None:
+            queue = self._queues[domain] = deque()
+            self._ring.append(domain)
+        queue.append(fut)
+
+        t0 = time.monotonic()
+        self._pump()
+        try:
+            await fut
+        except asyncio.CancelledError:
+            # Slot granted right before the cancel landed -> hand it back
+            if fut.done() and not fut.cancelled():
+                self.release(domain)
+            raise
+
+        waited = time.monotonic() - t0
+        self._stats["granted"] += 1
+        self._stats["wait_total"] += waited
+        self._stats["wait_max"] = max(self._stats["wait_max"], waited)
+        return domain
+
+    def release(self, domain: str):
+        self._active[domain] -= 1
+        if self._active[domain] <= 0:
+            del self._active[domain]
+        self._global_active -= 1
+        self._pump()
+
+    @asynccontextmanager
+    async def slot(self, url: str, timeout: float = None):
+        """timeout: the one the request inside uses, recorded as a latency sample if it expires."""
+        health = get_domain_health()
+        health.check(url) # fast-fail dead domains instead of queueing them
+        domain = await self.acquire(url)
+        try:
+            yield domain
+        except httpx.TimeoutException:
+            health.record_failure(url, timed_out_after=timeout)
+            raise
+        except httpx.TransportError:
+            health.record_failure(url)
+            raise
+        finally:
+            self.release(domain)
+
+    async def fetch(self, url: str, timeout: float = None, insecure: bool = False, **kwargs):
+        """
+        GET through the shared client once a slot is free. Raises like client.get(),
+        plus CircuitOpenError. timeout is shrunk to the domain's observed p95.
+        insecure: use the unverified pool (see services/http_client.py).
+        """
+        health = get_domain_health()
+        if timeout is not None:
+            kwargs["timeout"] = health.timeout_for(url, timeout)
+        async with self.slot(url, kwargs.get("timeout")):
+            t0 = time.monotonic()
+            resp = await get_http_client(insecure).get(url, **kwargs)
+            if resp.status_code >= 500:
+                health.record_failure(url)
+            else:
+                health.record_success(url, time.monotonic() - t0)
+            return resp
+
+    def _pump(self):
+        # Grant slots one domain at a time, cycling until a full pass grants nothing.
+        now = time.monotonic()
+        earliest = None
+        progressed = True
+        while progressed and self._ring and self._global_active < self.global_limit:
+            progressed = False
+            for _ in range(len(self._ring)):
+                if self._global_active >= self.global_limit:
+                    break
+                domain = self._ring.popleft()
+                queue = self._queues[domain]
+                while queue and queue[0].done(): # cancelled waiters
+                    queue.popleft()
+
+                if queue and self._active.get(domain, 0) < self.per_domain_limit:
+                    wait = self._next_start.get(domain, 0) - now
+                    if wait <= 0:
+                        queue.popleft().set_result(None)
+                        self._active[domain] = self._active.get(domain, 0) + 1
+                        self._global_active += 1
+                        self._next_start[domain] = now + self.per_domain_interval
+                        progressed = True
+                    else:
+                        earliest = wait if earliest is None else min(earliest, wait)
+
+                if queue:
+                    self._ring.append(domain)
+                else:
+                    del self._queues[domain]
+
+        # Rate-limited domains: wake up exactly when the next one becomes eligible
+        if earliest is not None:
+            loop = asyncio.get_running_loop()
+            when = loop.time() + earliest
+            if self._timer is None or self._timer.when() > when:
+                if self._timer:
+                    self._timer.cancel()
+                self._timer = loop.call_at(when, self._on_timer)
+
+    def _on_timer(self):
+        self._timer = None
+        self._pump()
+
+    def snapshot(self) -> dict:
+        """Queue depth and in-flight fetches per domain."""
+        domains = {}
+        for domain, queue in self._queues.items():
+            domains[domain] = {"queued": sum(1 for f in queue if not f.done()), "active": self._active.get(domain, 0)}
+        for domain, active in self._active.items():
+            domains.setdefault(domain, {"queued": 0, "active": active})
+
+        granted = self._stats["granted"]
+        return {
+            "limits": {
+                "global": self.global_limit,
+                "per_domain": self.per_domain_limit,
+                "per_domain_interval": self.per_domain_interval,
+            },
+            "active": self._global_active,
+            "queued": sum(d["queued"] for d in domains.values()),
+            "granted": granted,
+            "avg_wait": round(self._stats["wait_total"] / granted, 3) if granted else 0.0,
+            "max_wait": round(self._stats["wait_max"], 3),
+            "domains": dict(sorted(domains.items(), key=lambda kv: -kv[1]["queued"])),
+        }
+
+
+_frontier: CrawlFrontier = None
+
+
+def get_frontier() -> CrawlFrontier:
+    global _frontier
+    if _frontier is None:
+        _frontier = CrawlFrontier()
+    return _frontier
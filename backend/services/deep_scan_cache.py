@@ -0,0 +1,127 @@
+import os
+from datetime import datetime, timedelta, timezone
+from urllib.parse import urlparse
+
+from sqlalchemy import select, delete, or_, and_
+
+from database import AsyncSessionLocal
+from models import DeepScanCache
+from url_canon import canonicalize
+
+# --- Deep Scan Result Cache ---
+# Maps canonical article URL (url_canon) -> (date, title) extracted by a deep scan.
+# Positive results (date found) are kept for a long time since publication
+# dates don't change. Negative results (page fetched, no date found) expire
+# quickly: the outlet may fix its markup or we may add a ScraperRule for it.
+# The content-type verdict of the scan is stored too; a "category" verdict
+# (landing/section page) is kept like a positive result so the URL isn't
+# re-fetched just to be dropped again.
+
+NEGATIVE_TTL_HOURS = float(os.getenv("DEEP_SCAN_NEGATIVE_TTL_HOURS", "6"))
+POSITIVE_TTL_DAYS = float(os.getenv("DEEP_SCAN_POSITIVE_TTL_DAYS", "90"))
+
+_stats = {"lookups": 0, "hits": 0, "negative_hits": 0, "category_hits": 0, "misses": 0, "stored": 0, "evicted": 0}
+
+
+def canonical_url(url: str) -> str:
+    # Same normalization the digest dedupe uses
+    return canonicalize(url)
+
+
+def _now():
+    return datetime.now(timezone.utc)
+
+
+async def get_many(urls: list) -> dict:
+    """
+    Batch lookup. Returns {original_url: {"date": str|None, "title": str|None, "content_type": str|None}}
+    for every URL with a usable entry (positive, category verdict, or negative that hasn't expired).
+    """
+    if not urls:
+        return {}
+    by_key = {}
+    for u in urls:
+        by_key.setdefault(canonical_url(u), []).append(u)
+
+    neg_cutoff = _now() - timedelta(hours=NEGATIVE_TTL_HOURS)
+    found = {}
+    try:
+        async with AsyncSessionLocal() as db:
+            keys = list(by_key.keys())
+            for i in range(0, len(keys), 500): # stay under SQL parameter limits
+                stmt = select(DeepScanCache).where(
+                    DeepScanCache.url.in_(keys[i:i + 500]),
+                    or_(DeepScanCache.date_str.isnot(None), DeepScanCache.content_type == "category", DeepScanCache.scanned_at >= neg_cutoff),
+                )
+                for row in (await db.execute(stmt)).scalars():
+                    for original in by_key.get(row.url, []):
+                        found[original] = {"date": row.date_str, "title": row.title, "content_type": row.content_type}
+    except Exception as e:
+        print(f"DeepScanCache lookup failed: {e}")
+
+    _stats["lookups"] += len(urls)
+    _stats["hits"] += sum(1 for v in found.values() if v["date"])
+    _stats["negative_hits"] += sum(1 for v in found.values() if not v["date"])
+    _stats["category_hits"] += sum(1 for v in found.values() if v["content_type"] == "category")
+    _stats["misses"] += len(urls) - len(found)
+    return found
+
+
+async def put_many(results: list):
+    """Upserts [(url, title, date_str, content_type)] from completed deep scans."""
+    if not results:
+        return
+    entries = {}
+    for url, title, date_str, content_type in results:
+        entries[canonical_url(url)] = (url, title, date_str, content_type)
+
+    try:
+        async with AsyncSessionLocal() as db:
+            existing = {}
+            keys = list(entries.keys())
+            for i in range(0, len(keys), 500):
+                rows = await db.execute(select(DeepScanCache).where(DeepScanCache.url.in_(keys[i:i + 500])))
+                for row in rows.scalars():
+                    existing[row.url] = row
+
+            now = _now()
+            for key, (url, title, date_str, content_type) in entries.items():
+                row = existing.get(key)
+                if row is None:
+                    row = DeepScanCache(url=key, domain=urlparse(url).netloc.replace("www.", "").lower())
+                    db.add(row)
+                elif row.date_str and not date_str:
+                    continue # Never downgrade a known date to a negative result
+                row.date_str = date_str
+                row.title = title
+                row.content_type = content_type
+                row.scanned_at = now
+            await db.commit()
+            _stats["stored"] += len(entries)
+    except Exception as e:
+        print(f"DeepScanCache store failed: {e}")
+
+
+async def evict_expired() -> int:
+    """Drops expired negatives and very old positives / category verdicts. Called from the startup hook."""
+    now = _now()
+    try:
+        async with AsyncSessionLocal() as db:
+            result = await db.execute(delete(DeepScanCache).where(or_(
+                and_(DeepScanCache.date_str.is_(None), or_(DeepScanCache.content_type.is_(None), DeepScanCache.content_type != "category"),
+                     DeepScanCache.scanned_at < now - timedelta(hours=NEGATIVE_TTL_HOURS)),
+                DeepScanCache.scanned_at < now - timedelta(days=POSITIVE_TTL_DAYS),
+            )))
+            await db.commit()
+            _stats["evicted"] += result.rowcount or 0
+            return result.rowcount or 0
+    except Exception as e:
+        print(f"DeepScanCache eviction failed: {e}")
+        return 0
+
+
+def get_deep_scan_stats() -> dict:
+    stats = dict(_stats)
+    lookups = stats["lookups"]
+    stats["hit_rate"] = round((stats["hits"] + stats["negative_hits"]) / lookups, 3) if lookups else 0.0
+    return stats
@@ -6,10 +6,10 @@ from google.api_core.exceptions import ResourceExhausted
 
 # Import schemas from our new location
 from schemas.outlets import OutletCreate
+from services.llm_scheduler import generate, PRIORITY_BACKGROUND
 
 async def gemini_discover_city_outlets(city: str, country: str, lat: float, lng: float, api_key: str) -> List[OutletCreate]:
     if not api_key: return []
-    genai.configure(api_key=api_key)
 
     prompt = f"""
     You are a news outlet discovery expert. 
@@ -46,9 +46,7 @@ async def gemini_discover_city_outlets(city: str, country: str, lat: float, lng:
     for model_name in models_to_try:
         try:
             print(f"DEBUG: Trying model {model_name}...")
-            # recreate model instance for each try
-            model = genai.GenerativeModel(model_name)
-            response = await model.generate_content_async(prompt, generation_config={"max_output_tokens": 4000})
+            response = await generate(api_key, model_name, prompt, priority=PRIORITY_BACKGROUND, generation_config={"max_output_tokens": 4000})
             text = response.text.strip()
             if text: break
         except Exception as e:
@@ -60,6 +58,7 @@ async def gemini_discover_city_outlets(city: str, country: str, lat: float, lng:
         # PROBE: List available models to find out what IS there
         available_models = []
         try:
+            genai.configure(api_key=api_key)
             for m in genai.list_models():
                 if 'generateContent' in m.supported_generation_methods:
                     available_models.append(m.name)
@@ -104,7 +103,6 @@ async def gemini_discover_city_outlets(city: str, country: str, lat: float, lng:
 
 async def gemini_scrape_outlets(html_content: str, city: str, country: str, lat: float, lng: float, api_key: str, instructions: str = None) -> List[OutletCreate]:
     if not api_key: return []
-    genai.configure(api_key=api_key)
 
     # Truncate HTML to avoid token limits (approx 30k chars is usually enough for structure)
     html_sample = html_content[:50000]
@@ -129,8 +127,7 @@ async def gemini_scrape_outlets(html_content: str, city: str, country: str, lat:
     """
     
     try:
-        model = genai.GenerativeModel('gemini-flash-latest')
-        response = await model.generate_content_async([prompt, html_sample])
+        response = await generate(api_key, 'gemini-flash-latest', [prompt, html_sample], priority=PRIORITY_BACKGROUND)
         text = response.text.replace("```json", "").replace("```", "").strip()
         data = json.loads(text)
         return [OutletCreate(
@@ -0,0 +1,250 @@
+import os
+import json
+import time
+from collections import deque
+from urllib.parse import urlparse
+
+# --- Per-Domain Health ---
+# Tracks latency samples and failures per outlet domain and drives two things:
+#   1. Adaptive timeouts: a host that usually answers in 400ms shouldn't get 20s
+#      per read just because the global default says so (timeout = p95 x factor).
+#      An expired timeout counts as a latency sample at the timeout value, and
+#      each consecutive failure doubles the timeout (up to the caller's default),
+#      so a host that merely got slower grows its timeout back instead of timing
+#      out forever. Breaker probes always get the caller's full timeout.
+#   2. A circuit breaker: after N consecutive network failures the domain is
+#      fast-failed for a cooldown, then a single probe request decides whether
+#      to close it again or back off longer.
+# State is kept in memory and flushed to DATA_DIR so a restart doesn't forget
+# which outlets are dead.
+
+DATA_DIR = os.getenv("DATA_DIR")
+if not DATA_DIR:
+    if os.path.exists("/app/data"):
+        DATA_DIR = "/app/data"
+    else:
+        DATA_DIR = "."
+
+HEALTH_FILE = os.path.join(DATA_DIR, "cache", "domain_health.json")
+
+FAILURE_THRESHOLD = int(os.getenv("BREAKER_FAILURE_THRESHOLD", "5"))    # consecutive failures to open
+COOLDOWN_SECONDS = float(os.getenv("BREAKER_COOLDOWN_SECONDS", "300"))   # first open period
+MAX_COOLDOWN_SECONDS = float(os.getenv("BREAKER_MAX_COOLDOWN_SECONDS", "3600"))
+PROBE_STALE_SECONDS = 60 # a probe that never reported back is given up after this
+
+TIMEOUT_P95_FACTOR = float(os.getenv("ADAPTIVE_TIMEOUT_FACTOR", "3"))
+MIN_TIMEOUT = float(os.getenv("ADAPTIVE_TIMEOUT_MIN", "4"))
+MIN_SAMPLES = 5
+SAMPLE_WINDOW = 50
+SAVE_INTERVAL = 30 # seconds between flushes to disk
+
+CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of fetching when a domain's breaker is open."""
+    def __init__(self, domain: str, retry_in: float):
+        super().__init__(f"Circuit open for {domain} (retry in {int(retry_in)}s)")
+        self.domain = domain
+        self.retry_in = retry_in
+
+
+def _key(url: str) -> str:
+    return urlparse(url).netloc.replace("www.", "").lower() if "//" in url else url.lower()
+
+
+class _Domain:
+    __slots__ = ("latencies", "successes", "failures", "consecutive_failures", "state", "opened_at", "cooldown", "probe_started")
+
+    def __init__(self):
+        self.latencies = deque(maxlen=SAMPLE_WINDOW)
+        self.successes = 0
+        self.failures = 0
+        self.consecutive_failures = 0
+        self.state = CLOSED
+        self.opened_at = 0.0
+        self.cooldown = COOLDOWN_SECONDS
+        self.probe_started = 0.0
+
+    def p95(self):
+        if len(self.latencies) < MIN_SAMPLES:
+            return None
+        ordered = sorted(self.latencies)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]
+
+    def to_dict(self) -> dict:
+        return {
+            "latencies": [round(x, 3) for x in self.latencies],
+            "successes": self.successes,
+            "failures": self.failures,
+            "consecutive_failures": self.consecutive_failures,
+            # A half-open probe doesn't survive a restart; it goes back to open
+            "state": OPEN if self.state == HALF_OPEN else self.state,
+            "opened_at": self.opened_at,
+            "cooldown": self.cooldown,
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict):
+        d = cls()
+        d.latencies.extend(data.get("latencies", []))
+        d.successes = data.get("successes", 0)
+        d.failures = data.get("failures", 0)
+        d.consecutive_failures = data.get("consecutive_failures", 0)
+        d.state = data.get("state", CLOSED)
+        d.opened_at = data.get("opened_at", 0.0)
+        d.cooldown = data.get("cooldown", COOLDOWN_SECONDS)
+        return d
+
+
+class DomainHealth:
+    def __init__(self, path: str = HEALTH_FILE):
+        self.path = path
+        self._domains = {}
+        self._dirty = False
+        self._last_save = time.time()
+        self.load()
+
+    def _get(self, url: str) -> _Domain:
+        key = _key(url)
+        d = self._domains.get(key)
+        if d is None:
+            d = self._domains[key] = _Domain()
+        return d
+
+    # --- Breaker ---
+
+    def retry_in(self, url: str) -> float:
+        """Seconds until an open breaker may be probed (0 if not open)."""
+        d = self._domains.get(_key(url))
+        if not d or d.state != OPEN:
+            return 0.0
+        return max(0.0, d.opened_at + d.cooldown - time.time())
+
+    def is_open(self, url: str) -> bool:
+        """True while the domain is in its cooldown (callers should skip it)."""
+        return self.retry_in(url) > 0
+
+    def allow(self, url: str) -> bool:
+        d = self._domains.get(_key(url))
+        if not d or d.state == CLOSED:
+            return True
+        now = time.time()
+        if d.state == OPEN:
+            if now < d.opened_at + d.cooldown:
+                return False
+            d.state = HALF_OPEN # cooldown over: let exactly one probe through
+            d.probe_started = now
+            return True
+        # HALF_OPEN: a probe is already in flight
+        if now - d.probe_started > PROBE_STALE_SECONDS:
+            d.probe_started = now
+            return True
+        return False
+
+    def check(self, url: str):
+        """Raises CircuitOpenError if url's domain must not be fetched right now."""
+        if not self.allow(url):
+            raise CircuitOpenError(_key(url), self.retry_in(url))
+
+    # --- Recording ---
+
+    def record_success(self, url: str, latency: float):
+        d = self._get(url)
+        d.latencies.append(latency)
+        d.successes += 1
+        d.consecutive_failures = 0
+        if d.state != CLOSED:
+            print(f"Breaker: {_key(url)} recovered, closing circuit.")
+        d.state = CLOSED
+        d.cooldown = COOLDOWN_SECONDS
+        self._touch()
+
+    def record_failure(self, url: str, timed_out_after: float = None):
+        """timed_out_after: the timeout that expired, if this failure was a timeout."""
+        d = self._get(url)
+        if timed_out_after:
+            d.latencies.append(timed_out_after) # at least this slow
+        d.failures += 1
+        d.consecutive_failures += 1
+        if d.state == HALF_OPEN:
+            # Probe failed: back off longer
+            d.state = OPEN
+            d.opened_at = time.time()
+            d.cooldown = min(d.cooldown * 2, MAX_COOLDOWN_SECONDS)
+            print(f"Breaker: probe to {_key(url)} failed, open for {int(d.cooldown)}s.")
+        elif d.state == CLOSED and d.consecutive_failures >= FAILURE_THRESHOLD:
+            d.state = OPEN
+            d.opened_at = time.time()
+            print(f"Breaker: {_key(url)} failed {d.consecutive_failures}x in a row, open for {int(d.cooldown)}s.")
+        self._touch()
+
+    # --- Timeouts ---
+
+    def timeout_for(self, url: str, default: float) -> float:
+        """
+        p95 x factor, doubled per consecutive failure, clamped to [MIN_TIMEOUT, default].
+        Default until enough samples, and for breaker probes.
+        """
+        d = self._domains.get(_key(url))
+        p95 = d.p95() if d else None
+        if p95 is None or default is None or d.state != CLOSED:
+            return default
+        adaptive = p95 * TIMEOUT_P95_FACTOR * (2 ** min(d.consecutive_failures, 10))
+        return max(MIN_TIMEOUT, min(default, adaptive))
+
+    # --- Persistence ---
+
+    def _touch(self):
+        self._dirty = True
+        if time.time() - self._last_save > SAVE_INTERVAL:
+            self.save()
+
+    def load(self):
+        try:
+            if os.path.exists(self.path):
+                with open(self.path, "r") as f:
+                    data = json.load(f)
+                self._domains = {k: _Domain.from_dict(v) for k, v in data.items()}
+                print(f"DomainHealth: loaded {len(self._domains)} domains.")
+        except Exception as e:
+            print(f"DomainHealth: failed to load {self.path}: {e}")
+
+    def save(self):
+        if not self._dirty:
+            return
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            tmp = self.path + ".tmp"
+            with open(tmp, "w") as f:
+                json.dump({k: d.to_dict() for k, d in self._domains.items()}, f)
+            os.replace(tmp, self.path)
+            self._dirty = False
+            self._last_save = time.time()
+        except Exception as e:
+            print(f"DomainHealth: failed to save: {e}")
+
+    def snapshot(self) -> dict:
+        out = {}
+        for key, d in sorted(self._domains.items()):
+            total = d.successes + d.failures
+            p95 = d.p95()
+            out[key] = {
+                "state": d.state,
+                "error_rate": round(d.failures / total, 3) if total else 0.0,
+                "requests": total,
+                "consecutive_failures": d.consecutive_failures,
+                "p95": round(p95, 3) if p95 is not None else None,
+                "retry_in": int(self.retry_in(key)) if d.state == OPEN else 0,
+            }
+        return out
+
+
+_health: DomainHealth = None
+
+
+def get_domain_health() -> DomainHealth:
+    global _health
+    if _health is None:
+        _health = DomainHealth()
+    return _health
@@ -0,0 +1,120 @@
+import os
+import httpx
+
+# --- Shared Scraper HTTP Client ---
+# One pooled AsyncClient for the whole process, opened in the app startup hook.
+# Reusing it keeps TCP/TLS connections alive between the homepage fetch, the
+# category page and every deep-scanned article of the same outlet, instead of
+# paying a fresh handshake per page.
+#
+# Certificates are verified. Outlet pages that were always fetched without
+# verification (sitemaps, deep scans, date rescue, /scraper/test: many local
+# outlets serve broken or expired chains) opt in with get_http_client(insecure=True),
+# a second pool built with verify=False. Nothing fetched there may be written to
+# disk as a served file.
+
+ROBUST_HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
+    "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,image/apng,*/*;q=0.8",
+    "Accept-Language": "en-US,en;q=0.9",
+    "Referer": "https://www.google.com/",
+    "Upgrade-Insecure-Requests": "1"
+}
+
+# Pool sizing (env overridable)
+MAX_CONNECTIONS = int(os.getenv("HTTP_MAX_CONNECTIONS", "100"))
+MAX_KEEPALIVE = int(os.getenv("HTTP_MAX_KEEPALIVE", "40"))
+KEEPALIVE_EXPIRY = float(os.getenv("HTTP_KEEPALIVE_EXPIRY", "30"))
+# httpx has no per-host limit, so this is enforced by the crawl scheduler; kept here
+# so all connection settings live in one place.
+MAX_CONNECTIONS_PER_HOST = int(os.getenv("HTTP_MAX_CONNECTIONS_PER_HOST", "6"))
+DEFAULT_TIMEOUT = float(os.getenv("HTTP_TIMEOUT", "20"))
+
+# HTTP/2 is optional: only enabled when requested AND the 'h2' package is installed.
+HTTP2_REQUESTED = os.getenv("HTTP2_ENABLED", "0").lower() in ("1", "true", "yes")
+try:
+    import h2  # noqa: F401
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+_client: httpx.AsyncClient = None
+_insecure_client: httpx.AsyncClient = None
+
+# Connection counters (fed by httpcore trace events)
+_stats = {"requests": 0, "tcp_connects": 0, "tls_handshakes": 0}
+
+
+async def _trace(event_name: str, info: dict):
+    # httpcore awaits this for every connection lifecycle step
+    if event_name == "connection.connect_tcp.complete":
+        _stats["tcp_connects"] += 1
+    elif event_name == "connection.start_tls.complete":
+        _stats["tls_handshakes"] += 1
+
+
+async def _attach_trace(request: httpx.Request):
+    _stats["requests"] += 1
+    request.extensions["trace"] = _trace
+
+
+def build_client(**overrides) -> httpx.AsyncClient:
+    """
+    Creates a pooled AsyncClient with the scraper defaults.
+    Exposed separately so benchmarks/scripts can build an isolated pool.
+    """
+    config = dict(
+        headers=ROBUST_HEADERS,
+        follow_redirects=True,
+        verify=True,
+        timeout=httpx.Timeout(DEFAULT_TIMEOUT, connect=10.0),
+        limits=httpx.Limits(
+            max_connections=MAX_CONNECTIONS,
+            max_keepalive_connections=MAX_KEEPALIVE,
+            keepalive_expiry=KEEPALIVE_EXPIRY,
+        ),
+        http2=HTTP2_REQUESTED and HTTP2_AVAILABLE,
+        event_hooks={"request": [_attach_trace]},
+    )
+    config.update(overrides)
+    return httpx.AsyncClient(**config)
+
+
+async def start_http_client():
+    """Called from the app startup hook. The insecure pool is opened on first use."""
+    global _client
+    if _client is None or _client.is_closed:
+        _client = build_client()
+        print(f"HTTP: Shared client started (http2={HTTP2_REQUESTED and HTTP2_AVAILABLE}, max_conn={MAX_CONNECTIONS})")
+    return _client
+
+
+async def stop_http_client():
+    """Called from the app shutdown hook."""
+    global _client, _insecure_client
+    for client in (_client, _insecure_client):
+        if client is not None and not client.is_closed:
+            await client.aclose()
+    _client = None
+    _insecure_client = None
+
+
+def get_http_client(insecure: bool = False) -> httpx.AsyncClient:
+    """
+    Returns the shared client. Scripts that never ran the startup hook
+    (debug_*.py, verify_*.py) get a lazily created one.
+    insecure: the verify=False pool, only for outlet pages that were never verified.
+    """
+    global _client, _insecure_client
+    if insecure:
+        if _insecure_client is None or _insecure_client.is_closed:
+            _insecure_client = build_client(verify=False)
+        return _insecure_client
+    if _client is None or _client.is_closed:
+        _client = build_client()
+    return _client
+
+
+def get_http_stats() -> dict:
+    """Snapshot of request/handshake counters since process start."""
+    return dict(_stats)
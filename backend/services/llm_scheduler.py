@@ -0,0 +1,273 @@
+import os
+import re
+import time
+import heapq
+import asyncio
+import hashlib
+import itertools
+from typing import Any, Dict, Optional
+
+import google.generativeai as genai
+
+# --- LLM Request Scheduler ---
+# Process-wide gate every Gemini call goes through. Call sites used to fire
+# their own asyncio.gather bursts and sleep(2) on a 429, so concurrent users
+# ran each other's keys into the quota and then all stalled together. Now:
+#   - a global cap on in-flight model calls
+#   - optional per API key token buckets: requests per minute and tokens per
+#     minute (prompt estimated at ~4 chars/token, corrected by usage_metadata).
+#     Unlimited by default - quotas differ per key and tier (free keys: 15 RPM),
+#     so the 429 pause below is what adapts to each key; operators can set
+#     LLM_REQUESTS_PER_MINUTE / LLM_TOKENS_PER_MINUTE to stay under a known quota
+#   - priority classes: waiting calls are granted in (priority, arrival) order,
+#     so interactive title verification overtakes background translation
+#   - 429 / ResourceExhausted: the key is paused for the server's retry delay
+#     ("retry in 27s" / retry_delay { seconds: 27 }) and the call is queued
+#     again, up to LLM_MAX_RETRIES times
+# genai.configure() is process-global, so a call configures its key, builds
+# the model and starts the request without yielding in between: concurrent
+# users no longer send requests with each other's key.
+#
+# response = await generate(api_key, "gemini-flash-latest", prompt, priority=PRIORITY_INTERACTIVE)
+
+PRIORITY_INTERACTIVE = 0 # user is watching the stream: title verification, date / category lookups
+PRIORITY_NORMAL = 1      # one-shot user requests: summaries, analytics, city info
+PRIORITY_BACKGROUND = 2  # bulk work: translation, outlet discovery
+
+MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "8"))
+REQUESTS_PER_MINUTE = float(os.getenv("LLM_REQUESTS_PER_MINUTE", "0")) # per key, 0 = unlimited
+TOKENS_PER_MINUTE = float(os.getenv("LLM_TOKENS_PER_MINUTE", "0")) # per key, 0 = unlimited
+MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "2"))
+DEFAULT_RETRY_AFTER = float(os.getenv("LLM_DEFAULT_RETRY_AFTER", "5")) # when the 429 names no delay
+OUTPUT_TOKENS_ESTIMATE = 1000 # reserved per call until usage_metadata tells
+
+_RETRY_RE = re.compile(r"retry in ([\d.]+)\s*s|retry_delay\s*\{\s*seconds:\s*(\d+)", re.IGNORECASE)
+_PRIORITY_NAMES = {PRIORITY_INTERACTIVE: "interactive", PRIORITY_NORMAL: "normal", PRIORITY_BACKGROUND: "background"}
+
+
+def is_rate_limited(e: Exception) -> bool:
+    return "429" in str(e) or "ResourceExhausted" in type(e).__name__ or "ResourceExhausted" in str(e)
+
+
+def retry_after(e: Exception, attempt: int = 0) -> float:
+    """Server-provided retry delay of a 429, else DEFAULT_RETRY_AFTER doubled per attempt."""
+    m = _RETRY_RE.search(str(e))
+    if m:
+        return float(m.group(1) or m.group(2))
+    return DEFAULT_RETRY_AFTER * (2 ** attempt)
+
+
+def key_label(api_key: str) -> str:
+    """Stable label for an API key in /debug/llm: a short hash, no characters of the key itself."""
+    return "key-" + hashlib.blake2b(api_key.encode("utf-8"), digest_size=4).hexdigest()
+
+
+def estimate_tokens(contents) -> int:
+    if isinstance(contents, str):
+        chars = len(contents)
+    else:
+        chars = sum(len(c) for c in contents if isinstance(c, str))
+    return chars // 4 + OUTPUT_TOKENS_ESTIMATE
+
+
+class TokenBucket:
+    """per_minute <= 0: unlimited, never waits."""
+    def __init__(self, per_minute: float):
+        self.unlimited = per_minute <= 0
+        self.capacity = per_minute
+        self.rate = per_minute / 60.0
+        self.level = per_minute
+        self.updated = time.monotonic()
+
+    def _refill(self, now: float):
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_for(self, n: float, now: float) -> float:
+        """Seconds until n units are available (0 = now). Requests above capacity wait for a full bucket."""
+        if self.unlimited:
+            return 0.0
+        self._refill(now)
+        n = min(n, self.capacity)
+        return 0.0 if self.level >= n else (n - self.level) / self.rate
+
+    def take(self, n: float, now: float):
+        if self.unlimited:
+            return
+        self._refill(now)
+        self.level -= n # may go negative: usage corrections and over-capacity calls are paid back over time
+
+
+class _KeyState:
+    def __init__(self):
+        self.requests = TokenBucket(REQUESTS_PER_MINUTE)
+        self.tokens = TokenBucket(TOKENS_PER_MINUTE)
+        self.paused_until = 0.0
+        self.active = 0
+        self.rate_limited = 0
+
+
+class LlmScheduler:
+    def __init__(self, max_concurrency: int = MAX_CONCURRENCY):
+        self.max_concurrency = max_concurrency
+        self._keys: Dict[str, _KeyState] = {}
+        self._heap = [] # (priority, seq, future, key, tokens)
+        self._seq = itertools.count()
+        self._active = 0
+        self._timer = None
+        self._stats = {"granted": 0, "retries": 0, "failed": 0, "tokens": 0, "wait_total": 0.0, "wait_max": 0.0,
+                       "granted_by_priority": {name: 0 for name in _PRIORITY_NAMES.values()}}
+
+    def _key(self, api_key: str) -> _KeyState:
+        state = self._keys.get(api_key)
+        if state is None:
+            state = self._keys[api_key] = _KeyState()
+        return state
+
+    async def acquire(self, api_key: str, tokens: int, priority: int = PRIORITY_NORMAL):
+        """Waits until api_key may send a call of ~tokens tokens. Pair with release()."""
+        fut = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._heap, (priority, next(self._seq), fut, api_key, tokens))
+        t0 = time.monotonic()
+        self._pump()
+        try:
+            await fut
+        except asyncio.CancelledError:
+            if fut.done() and not fut.cancelled():
+                self.release(api_key)
+            raise
+        waited = time.monotonic() - t0
+        self._stats["granted"] += 1
+        self._stats["granted_by_priority"][_PRIORITY_NAMES.get(priority, "normal")] += 1
+        self._stats["wait_total"] += waited
+        self._stats["wait_max"] = max(self._stats["wait_max"], waited)
+
+    def release(self, api_key: str):
+        self._active -= 1
+        self._key(api_key).active -= 1
+        self._pump()
+
+    def pause(self, api_key: str, seconds: float):
+        """Quota hit: no new calls for this key until the retry delay has passed."""
+        now = time.monotonic()
+        state = self._key(api_key)
+        state.paused_until = max(state.paused_until, now + seconds)
+        state.rate_limited += 1
+
+    def record_usage(self, api_key: str, estimated: int, actual: Optional[int]):
+        if actual:
+            self._key(api_key).tokens.take(actual - estimated, time.monotonic())
+            self._stats["tokens"] += actual
+
+    def _pump(self):
+        # Grant in (priority, arrival) order. A key that cannot send now holds back
+        # its later waiters too, so its own priorities stay ordered; other keys go on.
+        now = time.monotonic()
+        earliest = None
+        held = set()
+        deferred = []
+        while self._heap and self._active < self.max_concurrency:
+            item = heapq.heappop(self._heap)
+            priority, _, fut, api_key, tokens = item
+            if fut.done(): # cancelled waiter
+                continue
+            if api_key in held:
+                deferred.append(item)
+                continue
+            state = self._key(api_key)
+            wait = max(state.paused_until - now, state.requests.wait_for(1, now), state.tokens.wait_for(tokens, now))
+            if wait > 0:
+                held.add(api_key)
+                deferred.append(item)
+                earliest = wait if earliest is None else min(earliest, wait)
+                continue
+            state.requests.take(1, now)
+            state.tokens.take(tokens, now)
+            state.active += 1
+            self._active += 1
+            fut.set_result(None)
+        for item in deferred:
+            heapq.heappush(self._heap, item)
+
+        # Wake up exactly when the first held key may send again
+        if earliest is not None:
+            loop = asyncio.get_running_loop()
+            when = loop.time() + earliest
+            if self._timer is None or self._timer.when() > when:
+                if self._timer:
+                    self._timer.cancel()
+                self._timer = loop.call_at(when, self._on_timer)
+
+    def _on_timer(self):
+        self._timer = None
+        self._pump()
+
+    async def generate(self, api_key: str, model_name: str, contents, priority: int = PRIORITY_NORMAL,
+                       generation_config: Optional[dict] = None, max_retries: int = MAX_RETRIES) -> Any:
+        """
+        model.generate_content_async(contents) once the key has quota and a slot is
+        free. 429s are retried after the server's delay; other errors (and the last
+        429) are raised to the caller, which may fall back to another model.
+        """
+        tokens = estimate_tokens(contents)
+        for attempt in range(max_retries + 1):
+            await self.acquire(api_key, tokens, priority)
+            try:
+                genai.configure(api_key=api_key)
+                model = genai.GenerativeModel(model_name)
+                if generation_config:
+                    response = await model.generate_content_async(contents, generation_config=generation_config)
+                else:
+                    response = await model.generate_content_async(contents)
+                usage = getattr(response, "usage_metadata", None)
+                self.record_usage(api_key, tokens, getattr(usage, "total_token_count", None))
+                return response
+            except Exception as e:
+                if not is_rate_limited(e):
+                    self._stats["failed"] += 1
+                    raise
+                self.pause(api_key, retry_after(e, attempt))
+                if attempt == max_retries:
+                    self._stats["failed"] += 1
+                    raise
+                self._stats["retries"] += 1
+            finally:
+                self.release(api_key)
+
+    def snapshot(self) -> dict:
+        now = time.monotonic()
+        queued = {}
+        for priority, _, fut, _, _ in self._heap:
+            if not fut.done():
+                name = _PRIORITY_NAMES.get(priority, "normal")
+                queued[name] = queued.get(name, 0) + 1
+        granted = self._stats["granted"]
+        return {
+            "limits": {
+                "concurrency": self.max_concurrency,
+                "requests_per_minute": REQUESTS_PER_MINUTE or "unlimited",
+                "tokens_per_minute": TOKENS_PER_MINUTE or "unlimited",
+            },
+            "active": self._active,
+            "queued": queued,
+            **{k: v for k, v in self._stats.items() if k not in ("wait_total", "wait_max")},
+            "avg_wait": round(self._stats["wait_total"] / granted, 3) if granted else 0.0,
+            "max_wait": round(self._stats["wait_max"], 3),
+            "keys": {key_label(k): {"active": s.active, "rate_limited": s.rate_limited,
+                                    "paused_for": round(max(0.0, s.paused_until - now), 1)}
+                     for k, s in self._keys.items()},
+        }
+
+
+_scheduler: LlmScheduler = None
+
+
+def get_llm_scheduler() -> LlmScheduler:
+    global _scheduler
+    if _scheduler is None:
+        _scheduler = LlmScheduler()
+    return _scheduler
+
+
+async def generate(api_key: str, model_name: str, contents, priority: int = PRIORITY_NORMAL, generation_config: Optional[dict] = None) -> Any:
+    return await get_llm_scheduler().generate(api_key, model_name, contents, priority, generation_config)
@@ -0,0 +1,189 @@
+import os
+import re
+import json
+import hashlib
+import unicodedata
+from datetime import datetime, timedelta, timezone
+from functools import lru_cache
+from typing import Dict, Iterable, Optional
+
+from sqlalchemy import select, delete
+
+from database import AsyncSessionLocal
+from models import LlmVerdictCache, NewsDigest, User
+
+# --- LLM Verdict Cache ---
+# batch_verify_titles_debug asks the model for a politics verdict and a
+# translation of every candidate title, and the same titles come back run
+# after run (same outlets, same city). Results are stored per
+#   (normalized title hash, operational definition hash, target language, model family)
+# so a changed definition or another language never reuses a stale verdict,
+# while model versions of one family (gemini-2.0-flash, gemini-flash-latest...)
+# share entries. A lookup names the model it would ask and only matches that
+# family: a gemini-pro verdict never answers for flash, or the reverse. The
+# stream looks all candidates up first and sends only the misses to the model.
+# warm_up_from_digests() seeds the cache from saved digests, whose
+# articles_json already carries ai_verdict / translated_title.
+
+LLM_CACHE_MAX_AGE_DAYS = float(os.getenv("LLM_CACHE_MAX_AGE_DAYS", "180"))
+DEFAULT_FAMILY = "gemini-flash" # assumed for warm-up entries (first title verification model)
+
+_FAMILY_RE = re.compile(r"gemini-(?:[\d.]+-)?(flash-lite|flash|pro)")
+_WS_RE = re.compile(r"\s+")
+
+_stats = {"lookups": 0, "hits": 0, "stored": 0, "warmed": 0}
+
+
+def model_family(model_name: Optional[str]) -> str:
+    """gemini-2.0-flash-lite-preview-02-05 -> gemini-flash-lite, gemini-pro-latest -> gemini-pro."""
+    m = _FAMILY_RE.match(model_name or "")
+    return f"gemini-{m.group(1)}" if m else (model_name or DEFAULT_FAMILY)
+
+
+def title_hash(title: str) -> str:
+    norm = _WS_RE.sub(" ", unicodedata.normalize("NFKC", title).lower()).strip()
+    return hashlib.blake2b(norm.encode("utf-8"), digest_size=8).hexdigest()
+
+
+@lru_cache(maxsize=16)
+def definition_hash(definition: str) -> str:
+    return hashlib.blake2b(definition.strip().encode("utf-8"), digest_size=8).hexdigest()
+
+
+def cache_key(t_hash: str, d_hash: str, language: str, family: str) -> str:
+    return hashlib.blake2b(f"{t_hash}|{d_hash}|{language.lower()}|{family}".encode("utf-8"), digest_size=16).hexdigest()
+
+
+def _now():
+    return datetime.now(timezone.utc)
+
+
+async def get_many(titles: Iterable[str], definition: str, language: str, model_name: Optional[str]) -> Dict[str, dict]:
+    """
+    {title: {"verdict": bool, "translated": str|None}} for every title cached
+    for model_name's family.
+    """
+    titles = [t for t in dict.fromkeys(titles) if t]
+    if not titles:
+        return {}
+    d_hash = definition_hash(definition)
+    family = model_family(model_name)
+    wanted = {cache_key(title_hash(t), d_hash, language, family): t for t in titles}
+
+    found = {}
+    try:
+        async with AsyncSessionLocal() as db:
+            keys = list(wanted)
+            for i in range(0, len(keys), 500): # stay under SQL parameter limits
+                rows = await db.execute(select(LlmVerdictCache).where(LlmVerdictCache.key.in_(keys[i:i + 500])))
+                for row in rows.scalars():
+                    found[wanted[row.key]] = {"verdict": row.verdict, "translated": row.translated_title}
+    except Exception as e:
+        print(f"LlmVerdictCache lookup failed: {e}")
+
+    _stats["lookups"] += len(titles)
+    _stats["hits"] += len(found)
+    return found
+
+
+async def put_many(entries: Iterable[tuple], definition: str, language: str, model_name: Optional[str], source: str = "model") -> int:
+    """
+    Stores [(title, verdict, translated)]. Entries without a boolean verdict are
+    skipped; existing keys are left alone (first answer wins). Returns rows added.
+    """
+    d_hash = definition_hash(definition)
+    family = model_family(model_name)
+    rows = {}
+    for title, verdict, translated in entries:
+        if not title or not isinstance(verdict, bool):
+            continue
+        t_hash = title_hash(title)
+        key = cache_key(t_hash, d_hash, language, family)
+        rows[key] = LlmVerdictCache(
+            key=key, title_hash=t_hash, definition_hash=d_hash, language=language, model_family=family,
+            title=title[:500], verdict=verdict, translated_title=translated or None, source=source,
+        )
+    if not rows:
+        return 0
+    try:
+        async with AsyncSessionLocal() as db:
+            keys = list(rows)
+            existing = set()
+            for i in range(0, len(keys), 500):
+                existing.update((await db.execute(select(LlmVerdictCache.key).where(LlmVerdictCache.key.in_(keys[i:i + 500])))).scalars())
+            new_rows = [r for k, r in rows.items() if k not in existing]
+            db.add_all(new_rows)
+            await db.commit()
+            _stats["stored"] += len(new_rows)
+            return len(new_rows)
+    except Exception as e:
+        # Concurrent runs may race on the same key; the other writer's row is as good
+        print(f"LlmVerdictCache store failed: {e}")
+        return 0
+
+
+async def store_results(titles_map: dict, results: dict, definition: str, language: str, model_name: Optional[str]) -> int:
+    """
+    Stores a batch_verify_titles_debug result ({"<id>": {"verdict", "translated"}})
+    for the titles of that batch only (titles_map: {id: title}). Verdicts the
+    normalization filled in for malformed items ("defaulted") are not stored.
+    """
+    entries = []
+    for k, title in titles_map.items():
+        v = results.get(str(k))
+        if isinstance(v, dict) and not v.get("defaulted"):
+            entries.append((title, v.get("verdict"), v.get("translated")))
+    return await put_many(entries, definition, language, model_name)
+
+
+async def warm_up_from_digests(definition: str, category: str = "Politics", limit: int = None) -> int:
+    """
+    Seeds the cache from saved digests of the given category: every article with
+    an ai_verdict of VERIFIED / REJECTED, in the owner's preferred language.
+    The verdicts are assumed to come from the current definition and the default
+    model family. Returns the number of entries added.
+    """
+    by_language = {}
+    async with AsyncSessionLocal() as db:
+        stmt = (select(NewsDigest.articles_json, User.preferred_language)
+                .join(User, User.id == NewsDigest.user_id, isouter=True)
+                .where(NewsDigest.category == category)
+                .order_by(NewsDigest.created_at.desc()))
+        if limit:
+            stmt = stmt.limit(limit)
+        for articles_json, language in (await db.execute(stmt)).all():
+            try:
+                articles = json.loads(articles_json or "[]")
+            except ValueError:
+                continue
+            entries = by_language.setdefault(language or "English", {})
+            for a in articles:
+                if not isinstance(a, dict):
+                    continue
+                verdict = {"VERIFIED": True, "REJECTED": False}.get(a.get("ai_verdict"))
+                if a.get("title") and verdict is not None:
+                    entries.setdefault(a["title"], (a["title"], verdict, a.get("translated_title")))
+
+    added = 0
+    for language, entries in by_language.items():
+        added += await put_many(entries.values(), definition, language, DEFAULT_FAMILY, source="warmup")
+    _stats["warmed"] += added
+    return added
+
+
+async def evict_expired() -> int:
+    """Drops entries older than LLM_CACHE_MAX_AGE_DAYS. Called from the startup hook."""
+    try:
+        async with AsyncSessionLocal() as db:
+            result = await db.execute(delete(LlmVerdictCache).where(LlmVerdictCache.created_at < _now() - timedelta(days=LLM_CACHE_MAX_AGE_DAYS)))
+            await db.commit()
+            return result.rowcount or 0
+    except Exception as e:
+        print(f"LlmVerdictCache eviction failed: {e}")
+        return 0
+
+
+def get_llm_cache_stats() -> dict:
+    stats = dict(_stats)
+    stats["hit_rate"] = round(stats["hits"] / stats["lookups"], 3) if stats["lookups"] else 0.0
+    return stats
@@ -0,0 +1,173 @@
+import os
+import gzip
+import json
+import time
+import asyncio
+import hashlib
+
+from services.crawl_frontier import get_frontier
+from services.charset import detect_encoding
+
+# --- Conditional-GET Page Cache ---
+# Disk cache for outlet homepages and category pages, keyed by URL.
+# Each entry keeps the validators (ETag / Last-Modified), the page body and
+# whatever we derived from it (extract_article_links output, visible text).
+# On the next run we revalidate: a 304 reuses the body AND the derived data,
+# so neither the download nor the link extraction is repeated.
+# Entries are gzip'd JSON holding the full page, so loading and storing run in
+# a worker thread instead of on the event loop. A 304 only bumps the file's
+# mtime (the revalidation time prune_page_cache() goes by), it is not rewritten.
+
+DATA_DIR = os.getenv("DATA_DIR")
+if not DATA_DIR:
+    if os.path.exists("/app/data"):
+        DATA_DIR = "/app/data"
+    else:
+        DATA_DIR = "."
+
+PAGE_CACHE_DIR = os.path.join(DATA_DIR, "cache", "pages")
+PAGE_CACHE_MAX_AGE_DAYS = int(os.getenv("PAGE_CACHE_MAX_AGE_DAYS", "7"))
+PAGE_CACHE_ENABLED = os.getenv("PAGE_CACHE_ENABLED", "1").lower() not in ("0", "false", "no")
+
+_stats = {"hits_304": 0, "misses": 0, "stored": 0, "bytes_saved": 0}
+
+class CachedPage:
+    """Minimal response-like object returned by fetch_page()."""
+    def __init__(self, url: str, status_code: int, text: str = "", encoding: str = None, from_cache: bool = False, derived: dict = None, final_url: str = None):
+        self.requested_url = url # cache key (use for store_derived)
+        self.url = final_url or url # after redirects
+        self.status_code = status_code
+        self.text = text
+        self.encoding = encoding
+        self.encoding_source = None # services.charset detection step ("fallback" = the outlet's stored encoding)
+        self.from_cache = from_cache # True when the server answered 304
+        self.derived = derived or {}  # {"links": [...], "text": "..."} from a previous run
+        self.entry = None # cache entry backing this page, if any (for store_derived)
+
+
+def _path(url: str) -> str:
+    key = hashlib.sha1(url.encode("utf-8")).hexdigest()
+    return os.path.join(PAGE_CACHE_DIR, key[:2], key + ".json.gz")
+
+
+def _load(url: str):
+    path = _path(url)
+    if not os.path.exists(path):
+        return None
+    try:
+        with gzip.open(path, "rt", encoding="utf-8") as f:
+            entry = json.load(f)
+        return entry if entry.get("url") == url else None
+    except Exception as e:
+        print(f"PageCache: corrupt entry for {url}: {e}")
+        return None
+
+
+def _save(url: str, entry: dict):
+    path = _path(url)
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = path + ".tmp"
+        with gzip.open(tmp, "wt", encoding="utf-8", compresslevel=6) as f:
+            json.dump(entry, f, ensure_ascii=False)
+        os.replace(tmp, path) # atomic swap, readers never see half a file
+    except Exception as e:
+        print(f"PageCache: failed to store {url}: {e}")
+
+
+def _touch(url: str):
+    try:
+        os.utime(_path(url))
+    except OSError:
+        pass
+
+
+async def fetch_page(url: str, timeout: float = 20, encoding: str = None) -> CachedPage:
+    """
+    Fetches url through the crawl frontier, revalidating against the disk cache.
+    encoding: known site encoding (NewsOutlet.encoding) used when the server doesn't declare one.
+    Returns None on network errors (same contract as robust_fetch).
+    """
+    entry = await asyncio.to_thread(_load, url) if PAGE_CACHE_ENABLED else None
+
+    headers = {}
+    if entry:
+        if entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+        if entry.get("last_modified"):
+            headers["If-Modified-Since"] = entry["last_modified"]
+
+    try:
+        resp = await get_frontier().fetch(url, headers=headers, timeout=timeout)
+    except Exception as e:
+        print(f"Fetch error {url}: {e}")
+        return None
+
+    if resp.status_code == 304 and entry:
+        _stats["hits_304"] += 1
+        _stats["bytes_saved"] += len(entry.get("body", ""))
+        _touch(url)
+        page = CachedPage(url, 200, entry.get("body", ""), entry.get("encoding"), from_cache=True, derived=entry.get("derived"), final_url=entry.get("final_url"))
+        page.encoding_source = entry.get("encoding_source")
+        page.entry = entry
+        return page
+
+    final_url = str(resp.url)
+    if resp.status_code != 200:
+        return CachedPage(url, resp.status_code, encoding=resp.encoding, final_url=final_url)
+
+    _stats["misses"] += 1
+    # One byte-level charset decision (BOM / header / <meta> / outlet / detection);
+    # resp.text then decodes once and httpx caches the result.
+    resp.encoding, encoding_source = detect_encoding(resp.content, resp.charset_encoding, encoding)
+    text = resp.text
+    etag = resp.headers.get("ETag")
+    last_modified = resp.headers.get("Last-Modified")
+    page = CachedPage(url, 200, text, resp.encoding, final_url=final_url)
+    page.encoding_source = encoding_source
+    # Only pages with validators are worth keeping - without them we can't revalidate
+    if PAGE_CACHE_ENABLED and (etag or last_modified):
+        _stats["stored"] += 1
+        page.entry = {
+            "url": url,
+            "final_url": final_url,
+            "etag": etag,
+            "last_modified": last_modified,
+            "encoding": resp.encoding,
+            "encoding_source": encoding_source,
+            "body": text,
+            "derived": {},
+            "fetched_at": time.time(),
+        }
+        await asyncio.to_thread(_save, url, page.entry)
+    return page
+
+
+async def store_derived(page: CachedPage, **derived):
+    """Attaches parse results (links, text...) to the page's cache entry so a 304 can reuse them."""
+    if not PAGE_CACHE_ENABLED or page.entry is None:
+        return
+    page.entry.setdefault("derived", {}).update(derived)
+    await asyncio.to_thread(_save, page.requested_url, page.entry)
+
+
+def prune_page_cache(max_age_days: int = PAGE_CACHE_MAX_AGE_DAYS) -> int:
+    """Deletes entries not revalidated in max_age_days. Called from the startup hook."""
+    if not os.path.isdir(PAGE_CACHE_DIR):
+        return 0
+    cutoff = time.time() - max_age_days * 86400
+    removed = 0
+    for root, _, files in os.walk(PAGE_CACHE_DIR):
+        for name in files:
+            path = os.path.join(root, name)
+            try:
+                if os.path.getmtime(path) < cutoff:
+                    os.remove(path)
+                    removed += 1
+            except OSError:
+                pass
+    return removed
+
+
+def get_page_cache_stats() -> dict:
+    return dict(_stats)
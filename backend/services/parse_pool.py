@@ -0,0 +1,223 @@
+import os
+import time
+import signal
+import asyncio
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Optional, Union
+
+import debug_log
+
+# --- HTML Parse Pool ---
+# BeautifulSoup parsing is pure CPU. Run inside the async handlers, one 200KB
+# homepage blocks every other digest stream (and /digests/public) until it's done.
+# This pool moves the parse into worker processes:
+#   - callers hand over the page (bytes or str) and get back small results
+#     (links, date, title, text snippet) - never the soup itself
+#   - PARSE_WORKERS processes, so parsing scales across cores
+#   - at most PARSE_MAX_PENDING parses queued or running; further callers wait
+#     on the semaphore instead of piling pages up in the executor queue
+# PARSE_WORKERS=0 parses inline on the event loop (old behaviour, for debugging).
+# A worker dying (OOM on a huge page...) breaks the whole executor: the first
+# caller to notice replaces it, every caller retries its page once in the new
+# pool, and a page that breaks that one too fails instead of being parsed on
+# the event loop.
+
+PARSE_WORKERS = int(os.getenv("PARSE_WORKERS", str(min(4, os.cpu_count() or 1))))
+PARSE_MAX_PENDING = int(os.getenv("PARSE_MAX_PENDING", str(max(1, PARSE_WORKERS) * 4)))
+PARSE_START_METHOD = os.getenv("PARSE_START_METHOD", "forkserver") # fork is unsafe with a running event loop
+TEXT_SNIPPET_CHARS = 10000
+
+_pool: ProcessPoolExecutor = None
+_slots: asyncio.Semaphore = None
+_stats = {"submitted": 0, "inline": 0, "errors": 0, "restarts": 0, "broken_pages": 0, "wait_total": 0.0, "wait_max": 0.0, "parse_total": 0.0}
+
+
+# --- Worker side (runs in the child processes) ---
+
+def _init_worker(log_queue=None):
+    # Ctrl+C is handled by the server process, which shuts the pool down
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    debug_log.init_worker(log_queue) # debug records are written by the server process
+    import scraper_engine  # noqa: F401  (pay the import once per worker, not on first page)
+
+
+def _warm():
+    return os.getpid()
+
+
+def _with_run_id(run_id, fn, *args):
+    # Context variables don't cross processes: re-apply the digest run's correlation ID
+    debug_log.set_run_id(run_id)
+    return fn(*args)
+
+
+def _decode(html: Union[bytes, str], encoding: Optional[str]) -> str:
+    if isinstance(html, bytes):
+        return html.decode(encoding or "utf-8", errors="replace")
+    return html or ""
+
+
+def _parse_listing(html, url: str, encoding: Optional[str] = None, text_chars: int = TEXT_SNIPPET_CHARS) -> dict:
+    """Homepage / category page: article links + visible text snippet."""
+    import scraper_engine
+    t0 = time.perf_counter()
+    doc = scraper_engine.ParsedDocument(_decode(html, encoding), url)
+    return {
+        "links": scraper_engine.extract_article_links(doc, url),
+        "raw_links": len(doc.links),
+        "text": doc.get_text(' ')[:text_chars],
+        "parse_seconds": time.perf_counter() - t0,
+    }
+
+
+def _parse_article(html, url: str, encoding: Optional[str] = None, rule=None, full_page: bool = False) -> dict:
+    """
+    Deep-scanned article: publication date + title + content type.
+    full_page: the body was read, so link density / paragraphs can be measured;
+    otherwise the content type only comes from og:type in the head.
+    """
+    import scraper_engine
+    t0 = time.perf_counter()
+    doc = scraper_engine.ParsedDocument(_decode(html, encoding), url)
+    result = {
+        "date": scraper_engine.extract_date_from_html(doc, url, custom_rule_override=rule),
+        "title": scraper_engine.extract_title_from_html(doc, url, custom_rule_override=rule),
+        "date_source": doc.date_source,   # "prescan" when no DOM was needed
+        "title_source": doc.title_source,
+        "content_signals": None,
+    }
+    if full_page and doc.html:
+        result["content_signals"] = scraper_engine.content_signals(doc)
+        result["content_type"] = scraper_engine.content_type_from_signals(result["content_signals"])
+    else:
+        result["content_type"] = scraper_engine.content_type_from_head(doc)
+    result["parse_seconds"] = time.perf_counter() - t0
+    return result
+
+
+# --- Server side ---
+
+def _build_pool() -> ProcessPoolExecutor:
+    try:
+        ctx = multiprocessing.get_context(PARSE_START_METHOD)
+    except ValueError:
+        ctx = multiprocessing.get_context("spawn")
+    return ProcessPoolExecutor(max_workers=PARSE_WORKERS, mp_context=ctx, initializer=_init_worker, initargs=(debug_log.worker_queue(ctx),))
+
+
+def start_parse_pool():
+    """Called from the app startup hook. Workers are warmed up in the background."""
+    global _pool
+    if PARSE_WORKERS <= 0:
+        print("PARSE: Pool disabled (PARSE_WORKERS=0), parsing inline.")
+        return None
+    if _pool is None:
+        _pool = _build_pool()
+        for _ in range(PARSE_WORKERS):
+            _pool.submit(_warm)
+        print(f"PARSE: Pool started ({PARSE_WORKERS} workers, max {PARSE_MAX_PENDING} pending)")
+    return _pool
+
+
+def stop_parse_pool():
+    """Called from the app shutdown hook."""
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(wait=False, cancel_futures=True)
+    _pool = None
+
+
+def get_parse_pool() -> Optional[ProcessPoolExecutor]:
+    """Shared pool; lazily created for scripts that never ran the startup hook."""
+    if PARSE_WORKERS <= 0:
+        return None
+    return _pool or start_parse_pool()
+
+
+def _replace_broken_pool(broken: ProcessPoolExecutor) -> Optional[ProcessPoolExecutor]:
+    """Swaps out a broken pool once: callers that saw the same broken pool get the replacement."""
+    global _pool
+    if _pool is broken:
+        print("PARSE: Worker pool broken, restarting.")
+        _stats["restarts"] += 1
+        broken.shutdown(wait=False) # its futures are already failed; others' resubmits go to the new pool
+        _pool = None
+    return get_parse_pool()
+
+
+async def _run(fn, *args) -> dict:
+    global _slots
+    if _slots is None:
+        _slots = asyncio.Semaphore(PARSE_MAX_PENDING)
+
+    t0 = time.monotonic()
+    async with _slots: # backpressure: bounded number of pages in flight
+        waited = time.monotonic() - t0
+        _stats["wait_total"] += waited
+        _stats["wait_max"] = max(_stats["wait_max"], waited)
+        _stats["submitted"] += 1
+
+        pool = get_parse_pool()
+        if pool is None:
+            _stats["inline"] += 1
+            result = fn(*args)
+        else:
+            loop = asyncio.get_running_loop()
+            try:
+                try:
+                    result = await loop.run_in_executor(pool, _with_run_id, debug_log.get_run_id(), fn, *args)
+                except BrokenProcessPool:
+                    # Retry once in the replacement pool; if this page kills that one too, it fails
+                    pool = _replace_broken_pool(pool)
+                    try:
+                        result = await loop.run_in_executor(pool, _with_run_id, debug_log.get_run_id(), fn, *args)
+                    except BrokenProcessPool:
+                        _stats["broken_pages"] += 1
+                        _replace_broken_pool(pool)
+                        raise
+            except Exception:
+                _stats["errors"] += 1
+                raise
+
+    _stats["parse_total"] += result.get("parse_seconds", 0.0)
+    return result
+
+
+async def parse_listing(html: Union[bytes, str], url: str, encoding: Optional[str] = None) -> dict:
+    """
+    Parses a homepage/category page off the event loop.
+    Returns {"links": [{'url','title',...}], "raw_links": int, "text": str}.
+    """
+    return await _run(_parse_listing, html, url, encoding)
+
+
+async def parse_article(html: Union[bytes, str], url: str, rule=None, encoding: Optional[str] = None, full_page: bool = False) -> dict:
+    """
+    Extracts date, title and content type of an article page off the event loop.
+    rule: scraper_engine.ScraperRule (pickled to the worker).
+    Returns {"date": str|None, "title": str|None, "content_type": "article"|"category"|"unknown", ...}.
+    The head pre-scan hit/miss is recorded here, in the server process (workers' counters are invisible).
+    """
+    import scraper_engine
+    result = await _run(_parse_article, html, url, encoding, rule, full_page)
+    scraper_engine.record_prescan(url, result.get("date_source"), result.get("title_source"))
+    return result
+
+
+def get_parse_pool_stats() -> dict:
+    submitted = _stats["submitted"]
+    return {
+        "workers": PARSE_WORKERS,
+        "max_pending": PARSE_MAX_PENDING,
+        "in_flight": PARSE_MAX_PENDING - _slots._value if _slots else 0,
+        "submitted": submitted,
+        "inline": _stats["inline"],
+        "errors": _stats["errors"],
+        "restarts": _stats["restarts"],
+        "broken_pages": _stats["broken_pages"],
+        "avg_wait": round(_stats["wait_total"] / submitted, 4) if submitted else 0.0,
+        "max_wait": round(_stats["wait_max"], 4),
+        "avg_parse": round(_stats["parse_total"] / submitted, 4) if submitted else 0.0,
+    }
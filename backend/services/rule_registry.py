@@ -0,0 +1,166 @@
+import os
+import json
+import time
+from typing import Dict, Optional
+from urllib.parse import urlparse
+
+from sqlalchemy import select, update
+
+from database import AsyncSessionLocal
+from models import ScraperRule as ScraperRuleRow, CacheVersion
+import scraper_engine
+
+# --- Compiled Scraper Rule Registry ---
+# The digest stream used to re-read the whole scraper_rules table, json.loads
+# every config_json and rebuild a scraper_engine.ScraperRule per target URL.
+# Now the table is loaded once per process into ready-to-use rules:
+#   - DB rules merged over the static scraper_engine.SCRAPER_REGISTRY
+#   - lookup by domain, then root domain (news.site.ro -> site.ro)
+#   - date_regex / date_selectors / title_selectors compiled up front
+# POST /scraper/rules bumps the "scraper_rules" CacheVersion row and invalidates
+# the local copy; other worker processes notice the new version on their next
+# poll (at most RULES_VERSION_POLL_SECONDS later) and reload.
+
+RULES_VERSION_POLL_SECONDS = float(os.getenv("RULES_VERSION_POLL_SECONDS", "10"))
+VERSION_NAME = "scraper_rules"
+
+
+def domain_of(url: str) -> str:
+    return urlparse(url).netloc.replace("www.", "").lower() if "//" in url else url.lower()
+
+
+def rule_from_config(domain: str, config: dict) -> scraper_engine.ScraperRule:
+    """DB config_json -> engine rule (same defaults the digest stream always used)."""
+    return scraper_engine.ScraperRule(
+        domain=domain,
+        date_selectors=config.get('date_selectors'),
+        date_regex=config.get('date_regex'),
+        title_selectors=config.get('title_selectors'),
+        use_json_ld=config.get('use_json_ld', True),
+        use_data_layer=config.get('use_data_layer', True),
+        data_layer_var=config.get('data_layer_var', "dataLayer")
+    )
+
+
+def _precompile(rule: scraper_engine.ScraperRule) -> bool:
+    """Warms the engine's compiled selector/regex caches. False if the rule has a broken pattern."""
+    ok = True
+    for selector in (rule.date_selectors or []) + (rule.title_selectors or []):
+        try:
+            scraper_engine.compile_selector(selector)
+        except Exception as e:
+            print(f"RuleRegistry: bad selector '{selector}' for {rule.domain}: {e}")
+            ok = False
+    for pattern in rule.date_regex or []:
+        try:
+            scraper_engine.compile_date_pattern(pattern)
+        except Exception as e:
+            print(f"RuleRegistry: bad date_regex '{pattern}' for {rule.domain}: {e}")
+            ok = False
+    return ok
+
+
+class RuleRegistry:
+    def __init__(self):
+        self.version = None  # CacheVersion seen at last load
+        self._rules: Dict[str, scraper_engine.ScraperRule] = {}
+        self._configs: Dict[str, dict] = {} # raw DB configs (domain -> dict)
+        self._checked_at = 0.0
+        self._stats = {"loads": 0, "lookups": 0, "hits": 0}
+
+    def load(self, rows, version):
+        rules = dict(scraper_engine.SCRAPER_REGISTRY)
+        configs = {}
+        for r in rows:
+            try:
+                config = json.loads(r.config_json) if r.config_json else {}
+            except Exception:
+                print(f"RuleRegistry: invalid config_json for {r.domain}, skipped")
+                continue
+            configs[r.domain] = config
+            rules[r.domain] = rule_from_config(r.domain, config) # DB overrides static
+        for rule in rules.values():
+            _precompile(rule)
+        self._rules = rules
+        self._configs = configs
+        self.version = version
+        self._stats["loads"] += 1
+
+    def invalidate(self):
+        self.version = None
+        self._checked_at = 0.0
+
+    def get(self, url: str) -> Optional[scraper_engine.ScraperRule]:
+        """Rule for url's domain, falling back to its root domain. None if neither has one."""
+        domain = domain_of(url)
+        self._stats["lookups"] += 1
+        rule = self._rules.get(domain)
+        if rule is None:
+            parts = domain.split('.')
+            if len(parts) > 2:
+                rule = self._rules.get(".".join(parts[-2:]))
+        if rule is not None:
+            self._stats["hits"] += 1
+        return rule
+
+    def has_custom_rule(self, url: str) -> bool:
+        """True if a rule stored through /scraper/rules covers url's exact domain."""
+        return domain_of(url) in self._configs
+
+    def __len__(self):
+        return len(self._rules)
+
+    def snapshot(self) -> dict:
+        return {
+            "version": self.version,
+            "rules": len(self._rules),
+            "db_rules": len(self._configs),
+            "static_rules": len(scraper_engine.SCRAPER_REGISTRY),
+            **self._stats,
+        }
+
+
+_registry = RuleRegistry()
+
+
+async def _current_version(db) -> int:
+    row = (await db.execute(select(CacheVersion).where(CacheVersion.name == VERSION_NAME))).scalar_one_or_none()
+    return row.version if row else 0
+
+
+async def get_rule_registry() -> RuleRegistry:
+    """
+    Returns the loaded registry, reloading from the DB when it was invalidated
+    or another process bumped the version since the last poll.
+    """
+    now = time.monotonic()
+    if _registry.version is not None and now - _registry._checked_at < RULES_VERSION_POLL_SECONDS:
+        return _registry
+    try:
+        async with AsyncSessionLocal() as db:
+            version = await _current_version(db)
+            if version != _registry.version:
+                rows = (await db.execute(select(ScraperRuleRow))).scalars().all()
+                _registry.load(rows, version)
+                print(f"RuleRegistry: loaded {len(_registry)} rules (version {version})")
+        _registry._checked_at = now
+    except Exception as e:
+        # Keep serving the previous rules (or the static ones) if the DB is unavailable
+        print(f"RuleRegistry: reload failed: {e}")
+        if not _registry._rules:
+            _registry.load([], None)
+    return _registry
+
+
+async def bump_rules_version(db):
+    """Called after a scraper_rules write, in the caller's session (committed with it)."""
+    result = await db.execute(
+        update(CacheVersion).where(CacheVersion.name == VERSION_NAME).values(version=CacheVersion.version + 1)
+    )
+    if result.rowcount == 0:
+        db.add(CacheVersion(name=VERSION_NAME, version=1))
+
+
+def invalidate_rule_registry():
+    """Drops this process's copy; the next get_rule_registry() reloads."""
+    _registry.invalidate()
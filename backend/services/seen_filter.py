@@ -0,0 +1,250 @@
+import os
+import re
+import math
+import time
+import struct
+from urllib.parse import urlparse
+
+from url_canon import url_key
+
+# --- Cross-Run "Already Seen" Filter ---
+# One rotating Bloom filter per outlet over the URL keys (url_canon) whose deep scan
+# result is in the deep-scan cache (services/deep_scan_cache.py). The cache
+# remains the metadata store; the filter only answers "could this link have
+# been scanned before?" without a DB round trip:
+#   - not in the filter -> definitely never scanned (or aged out): deep scan
+#     it directly, no cache lookup
+#   - in the filter     -> pull date/title/verdict from the cache; a false
+#     positive or an expired negative is simply a cache miss and gets scanned
+# An outlet without a filter file yet (first run, or the file was lost) is
+# "cold": every link goes through the cache and the hits are added, so the
+# filter rebuilds itself from the store in one run.
+#
+# Rotation: two generations (current + previous). Links are added to the
+# current one - also when a cache hit re-confirms them - and looked up in
+# both. The current generation is retired once it holds SEEN_FILTER_CAPACITY
+# links or is older than SEEN_FILTER_ROTATE_DAYS, which keeps the false
+# positive rate at or below SEEN_FILTER_FP_RATE and lets dead links age out
+# (two generations span the cache's positive TTL by default).
+#
+# Memory: m = -n*ln(p) / ln(2)^2 bits for n links at false-positive rate p,
+# k = m/n * ln(2) hash probes. At the default p = 1%: 9.6 bits (1.2 bytes) per
+# link, k = 7 - i.e. ~1.2 MB per 1M URLs per generation, ~2.4 MB with both
+# generations (vs. ~100+ MB for a Python set of 1M URL strings). An outlet at
+# the default capacity of 20k links uses 2 x 24 KB in memory and on disk.
+# Files live in DATA_DIR/cache/seen/<domain>.bloom.
+
+DATA_DIR = os.getenv("DATA_DIR")
+if not DATA_DIR:
+    if os.path.exists("/app/data"):
+        DATA_DIR = "/app/data"
+    else:
+        DATA_DIR = "."
+
+SEEN_FILTER_DIR = os.path.join(DATA_DIR, "cache", "seen")
+SEEN_FILTER_CAPACITY = int(os.getenv("SEEN_FILTER_CAPACITY", "20000"))
+SEEN_FILTER_FP_RATE = float(os.getenv("SEEN_FILTER_FP_RATE", "0.01"))
+SEEN_FILTER_ROTATE_DAYS = float(os.getenv("SEEN_FILTER_ROTATE_DAYS", "45"))
+SEEN_FILTER_ENABLED = os.getenv("SEEN_FILTER_ENABLED", "1").lower() not in ("0", "false", "no")
+
+_MAGIC = b"USF2" # v2: probes from url_canon.url_key
+_HEADER = struct.Struct("<4sIB")   # magic, m (bits), k
+_GENERATION = struct.Struct("<Id")  # count, created (unix time)
+_UNSAFE_RE = re.compile(r"[^a-z0-9.-]")
+
+_stats = {"lookups": 0, "maybe_seen": 0, "skipped_lookups": 0, "false_positives": 0, "added": 0, "rotations": 0, "outlets": 0}
+
+
+def bloom_size(capacity: int, fp_rate: float) -> tuple:
+    """(m bits, k probes) for capacity links at fp_rate."""
+    m = max(64, int(math.ceil(-capacity * math.log(fp_rate) / (math.log(2) ** 2))))
+    m = (m + 7) // 8 * 8
+    k = max(1, round(m / capacity * math.log(2)))
+    return m, k
+
+
+def url_hashes(url: str) -> tuple:
+    """Two 32-bit halves of the URL's 64-bit key (double hashing: probe i = h1 + i*h2)."""
+    key = url_key(url)
+    return key & 0xFFFFFFFF, (key >> 32) | 1
+
+
+class _Generation:
+    __slots__ = ("bits", "count", "created")
+
+    def __init__(self, m: int, count: int = 0, created: float = None, bits: bytearray = None):
+        self.bits = bits if bits is not None else bytearray(m // 8)
+        self.count = count
+        self.created = created or time.time()
+
+
+class SeenFilter:
+    """Rotating two-generation Bloom filter of one outlet's scanned links."""
+
+    def __init__(self, capacity: int = SEEN_FILTER_CAPACITY, fp_rate: float = SEEN_FILTER_FP_RATE, warm: bool = False):
+        self.m, self.k = bloom_size(capacity, fp_rate)
+        self.capacity = capacity
+        self.current = _Generation(self.m)
+        self.previous = None
+        self.warm = warm # loaded from disk: misses can skip the cache lookup
+        self.dirty = False
+
+    def _probes(self, url: str):
+        h1, h2 = url_hashes(url)
+        m = self.m
+        return [(h1 + i * h2) % m for i in range(self.k)]
+
+    @staticmethod
+    def _has(gen: _Generation, probes) -> bool:
+        bits = gen.bits
+        for p in probes:
+            if not bits[p >> 3] & (1 << (p & 7)):
+                return False
+        return True
+
+    def __contains__(self, url: str) -> bool:
+        probes = self._probes(url)
+        return self._has(self.current, probes) or (self.previous is not None and self._has(self.previous, probes))
+
+    def add(self, url: str):
+        probes = self._probes(url)
+        if self._has(self.current, probes):
+            return
+        if self.current.count >= self.capacity or time.time() - self.current.created > SEEN_FILTER_ROTATE_DAYS * 86400:
+            self.previous = self.current
+            self.current = _Generation(self.m)
+            _stats["rotations"] += 1
+        bits = self.current.bits
+        for p in probes:
+            bits[p >> 3] |= 1 << (p & 7)
+        self.current.count += 1
+        self.dirty = True
+        _stats["added"] += 1
+
+    def memory_bytes(self) -> int:
+        return len(self.current.bits) + (len(self.previous.bits) if self.previous is not None else 0)
+
+    def to_bytes(self) -> bytes:
+        gens = [g for g in (self.current, self.previous) if g is not None]
+        out = [_HEADER.pack(_MAGIC, self.m, self.k), bytes([len(gens)])]
+        for g in gens:
+            out.append(_GENERATION.pack(g.count, g.created))
+            out.append(bytes(g.bits))
+        return b"".join(out)
+
+    @classmethod
+    def from_bytes(cls, data: bytes, capacity: int = SEEN_FILTER_CAPACITY, fp_rate: float = SEEN_FILTER_FP_RATE):
+        magic, m, k = _HEADER.unpack_from(data, 0)
+        sf = cls(capacity, fp_rate, warm=True)
+        if magic != _MAGIC or (m, k) != (sf.m, sf.k):
+            raise ValueError("format or size mismatch") # settings changed: rebuild cold
+        offset = _HEADER.size
+        n_gens = data[offset]
+        offset += 1
+        gens = []
+        for _ in range(n_gens):
+            count, created = _GENERATION.unpack_from(data, offset)
+            offset += _GENERATION.size
+            gens.append(_Generation(m, count, created, bytearray(data[offset:offset + m // 8])))
+            offset += m // 8
+        sf.current = gens[0]
+        sf.previous = gens[1] if len(gens) > 1 else None
+        return sf
+
+
+class SeenFilters:
+    """Per-outlet filters, loaded lazily from disk and saved after each outlet's run."""
+
+    def __init__(self, directory: str = SEEN_FILTER_DIR):
+        self.directory = directory
+        self._filters = {}
+
+    @staticmethod
+    def key_for(url: str) -> str:
+        return (urlparse(url).netloc or url).lower().replace("www.", "")
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, _UNSAFE_RE.sub("_", key) + ".bloom")
+
+    def for_outlet(self, outlet_url: str) -> SeenFilter:
+        key = self.key_for(outlet_url)
+        sf = self._filters.get(key)
+        if sf is None:
+            path = self._path(key)
+            if os.path.exists(path):
+                try:
+                    with open(path, "rb") as f:
+                        sf = SeenFilter.from_bytes(f.read())
+                except Exception as e:
+                    print(f"SeenFilter: discarding {path}: {e}")
+            if sf is None:
+                sf = SeenFilter()
+            self._filters[key] = sf
+            _stats["outlets"] = len(self._filters)
+        return sf
+
+    def save(self, outlet_url: str = None):
+        """Writes dirty filters (one outlet, or all of them on shutdown)."""
+        keys = [self.key_for(outlet_url)] if outlet_url else list(self._filters)
+        for key in keys:
+            sf = self._filters.get(key)
+            if sf is None or not sf.dirty:
+                continue
+            path = self._path(key)
+            try:
+                os.makedirs(self.directory, exist_ok=True)
+                tmp = path + ".tmp"
+                with open(tmp, "wb") as f:
+                    f.write(sf.to_bytes())
+                os.replace(tmp, path)
+                sf.dirty = False
+            except Exception as e:
+                print(f"SeenFilter: failed to save {path}: {e}")
+
+
+def partition(sf: SeenFilter, urls: list) -> tuple:
+    """
+    Splits links into (maybe_seen, new). new links were never scanned and can
+    skip the deep-scan cache lookup. A cold filter puts everything in maybe_seen.
+    """
+    _stats["lookups"] += len(urls)
+    if not SEEN_FILTER_ENABLED or not sf.warm:
+        return list(urls), []
+    maybe, new = [], []
+    for u in urls:
+        (maybe if u in sf else new).append(u)
+    _stats["maybe_seen"] += len(maybe)
+    _stats["skipped_lookups"] += len(new)
+    return maybe, new
+
+
+def record(sf: SeenFilter, urls, false_positives: int = 0):
+    """
+    Adds links whose scan result is now in the deep-scan cache (fresh scans and
+    re-confirmed hits). false_positives: maybe-seen links the cache didn't have
+    (Bloom false positives, or negatives that expired there).
+    """
+    if not SEEN_FILTER_ENABLED:
+        return
+    for u in urls:
+        sf.add(u)
+    sf.warm = True # a cold filter has now seen this outlet's current links
+    _stats["false_positives"] += false_positives
+
+
+_filters: SeenFilters = None
+
+
+def get_seen_filters() -> SeenFilters:
+    global _filters
+    if _filters is None:
+        _filters = SeenFilters()
+    return _filters
+
+
+def get_seen_filter_stats() -> dict:
+    stats = dict(_stats)
+    stats["bytes_per_1m_urls"] = bloom_size(1_000_000, SEEN_FILTER_FP_RATE)[0] // 8
+    if _filters is not None:
+        stats["memory_bytes"] = sum(sf.memory_bytes() for sf in _filters._filters.values())
+    return stats
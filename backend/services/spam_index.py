@@ -0,0 +1,201 @@
+import os
+import re
+import time
+import hashlib
+import unicodedata
+from collections import Counter
+from typing import Dict, Optional
+
+from sqlalchemy import select, update
+
+from database import AsyncSessionLocal
+from models import SpamFeedback, CacheVersion
+from url_canon import url_key, url_parts
+
+# --- Spam Feedback Index ---
+# The digest stream used to select the whole spam_feedback table on every run
+# and rebuild its URL / title sets. The index is now loaded once per process
+# and kept current incrementally:
+#   - POST/DELETE /feedback/spam apply the change to this process's index and
+#     bump the "spam_feedback" CacheVersion row
+#   - other worker processes see the new version on their next poll (at most
+#     SPAM_VERSION_POLL_SECONDS later) and reload
+# Every lookup is a handful of set probes:
+#   - exact URL, and canonical URL key (url_canon: no scheme/www/tracking
+#     params/fragment/trailing slash)
+#   - normalized title hash (NFKC, lowercase, collapsed whitespace; 8-byte blake2b)
+#   - path prefixes per domain: a report whose URL ends in "*"
+#     (https://site.ro/anunturi/*) blocks everything under that path on that domain
+
+SPAM_VERSION_POLL_SECONDS = float(os.getenv("SPAM_VERSION_POLL_SECONDS", "10"))
+VERSION_NAME = "spam_feedback"
+
+_WS_RE = re.compile(r"\s+")
+
+
+def title_key(title: str) -> int:
+    norm = _WS_RE.sub(" ", unicodedata.normalize("NFKC", title).lower()).strip()
+    return int.from_bytes(hashlib.blake2b(norm.encode("utf-8"), digest_size=8).digest(), "big")
+
+
+def _prefix_of(url: str) -> Optional[tuple]:
+    """(domain, path prefix) for a wildcard report URL, else None."""
+    if not url.rstrip().endswith("*"):
+        return None
+    host, path, _ = url_parts(url.strip().rstrip("*"))
+    return host, path
+
+
+class SpamIndex:
+    def __init__(self):
+        self.version = None  # CacheVersion seen at last load / update
+        self._urls = Counter()
+        self._canonical = Counter()
+        self._titles = Counter()
+        self._prefixes: Dict[str, Counter] = {}
+        self._rows = 0
+        self._checked_at = 0.0
+        self._stats = {"loads": 0, "updates": 0, "lookups": 0, "hits": 0}
+
+    def _apply(self, url: Optional[str], title: Optional[str], delta: int):
+        if url:
+            prefix = _prefix_of(url)
+            if prefix:
+                domain, path = prefix
+                self._bump(self._prefixes.setdefault(domain, Counter()), path, delta)
+            else:
+                self._bump(self._urls, url, delta)
+                self._bump(self._canonical, url_key(url), delta)
+        if title and title.strip():
+            self._bump(self._titles, title_key(title), delta)
+        self._rows += delta
+
+    @staticmethod
+    def _bump(counter: Counter, key, delta: int):
+        # Counts, not sets: the same URL/title can be reported more than once
+        counter[key] += delta
+        if counter[key] <= 0:
+            del counter[key]
+
+    def load(self, rows, version):
+        self._urls.clear()
+        self._canonical.clear()
+        self._titles.clear()
+        self._prefixes = {}
+        self._rows = 0
+        for r in rows:
+            self._apply(r.url, r.title, 1)
+        self.version = version
+        self._stats["loads"] += 1
+
+    def add(self, url: Optional[str], title: Optional[str] = None):
+        self._apply(url, title, 1)
+        self._stats["updates"] += 1
+
+    def remove(self, url: Optional[str], title: Optional[str] = None):
+        self._apply(url, title, -1)
+        self._stats["updates"] += 1
+
+    def invalidate(self):
+        self.version = None
+        self._checked_at = 0.0
+
+    def match(self, url: Optional[str], title: Optional[str] = None) -> Optional[str]:
+        """Why (url, title) matches a spam report - "url", "canonical_url", "title", "path_prefix" - or None."""
+        self._stats["lookups"] += 1
+        reason = None
+        if url:
+            if url in self._urls:
+                reason = "url"
+            elif url_key(url) in self._canonical:
+                reason = "canonical_url"
+            elif self._prefixes:
+                domain, path, _ = url_parts(url)
+                prefixes = self._prefixes.get(domain)
+                # /a/b/c -> probe /a/b/c, /a/b, /a, "" (one set lookup per path level)
+                while prefixes:
+                    if path in prefixes:
+                        reason = "path_prefix"
+                        break
+                    if not path:
+                        break
+                    path = path.rsplit("/", 1)[0]
+        if reason is None and title and self._titles and title_key(title) in self._titles:
+            reason = "title"
+        if reason:
+            self._stats["hits"] += 1
+        return reason
+
+    def __len__(self):
+        return self._rows
+
+    def snapshot(self) -> dict:
+        return {
+            "version": self.version,
+            "reports": self._rows,
+            "urls": len(self._urls),
+            "titles": len(self._titles),
+            "prefix_domains": len(self._prefixes),
+            **self._stats,
+        }
+
+
+_index = SpamIndex()
+
+
+async def _current_version(db) -> int:
+    row = (await db.execute(select(CacheVersion).where(CacheVersion.name == VERSION_NAME))).scalar_one_or_none()
+    return row.version if row else 0
+
+
+async def get_spam_index() -> SpamIndex:
+    """
+    Returns the loaded index, reloading from the DB when it was invalidated
+    or another process bumped the version since the last poll.
+    """
+    now = time.monotonic()
+    if _index.version is not None and now - _index._checked_at < SPAM_VERSION_POLL_SECONDS:
+        return _index
+    try:
+        async with AsyncSessionLocal() as db:
+            version = await _current_version(db)
+            if version != _index.version:
+                rows = (await db.execute(select(SpamFeedback.url, SpamFeedback.title))).all()
+                _index.load(rows, version)
+                print(f"SpamIndex: loaded {len(_index)} reports (version {version})")
+        _index._checked_at = now
+    except Exception as e:
+        # Keep serving the previous index if the DB is unavailable
+        print(f"SpamIndex: reload failed: {e}")
+    return _index
+
+
+async def bump_spam_version(db) -> int:
+    """Called after a spam_feedback write, in the caller's session. Returns the new version."""
+    result = await db.execute(
+        update(CacheVersion).where(CacheVersion.name == VERSION_NAME).values(version=CacheVersion.version + 1)
+    )
+    if result.rowcount == 0:
+        db.add(CacheVersion(name=VERSION_NAME, version=1))
+        await db.flush()
+    return await _current_version(db)
+
+
+def record_spam_change(new_version: int, added=(), removed=()):
+    """
+    Applies a committed /feedback/spam change to this process's index.
+    added / removed: (url, title) pairs. If another process changed the table
+    in between (version jumped by more than one), reload instead.
+    """
+    if _index.version is None or new_version != _index.version + 1:
+        _index.invalidate()
+        return
+    for url, title in added:
+        _index.add(url, title)
+    for url, title in removed:
+        _index.remove(url, title)
+    _index.version = new_version
+
+
+def get_spam_index_stats() -> dict:
+    return _index.snapshot()
@@ -0,0 +1,144 @@
+import os
+import re
+import time
+import codecs
+from contextlib import asynccontextmanager
+
+from services import charset
+from services.http_client import get_http_client
+from services.crawl_frontier import get_frontier
+from services.domain_health import get_domain_health
+
+# --- Byte-capped Streaming Fetch ---
+# Deep scans only need <head> metadata (JSON-LD, article:published_time, og:title),
+# so we read the body incrementally and stop as soon as the head is closed or a
+# JSON-LD datePublished has gone by. The connection stays open inside open_page(),
+# so a caller whose extraction misses can keep reading the rest of the page.
+
+HEAD_BYTE_CAP = int(os.getenv("DEEP_SCAN_HEAD_BYTES", str(256 * 1024)))
+FULL_BYTE_CAP = int(os.getenv("DEEP_SCAN_MAX_BYTES", str(3 * 1024 * 1024)))
+# Closing a half-read response drops the keep-alive connection; when only a little
+# is left it's cheaper to drain it than to pay a new handshake on the next fetch.
+DRAIN_BYTES = int(os.getenv("DEEP_SCAN_DRAIN_BYTES", str(32 * 1024)))
+
+HEAD_END_RE = re.compile(rb"</head\s*>", re.I)
+JSONLD_DATE_RE = re.compile(rb'"datePublished"\s*:\s*"[^"]{6,}"')
+
+
+def head_complete(buf: bytes, start: int) -> bool:
+    """Default stop condition: </head> closed or a JSON-LD datePublished value seen."""
+    # Re-scan a small overlap so markers split across chunks are still found
+    window = buf[max(0, start - 64):]
+    return bool(HEAD_END_RE.search(window) or JSONLD_DATE_RE.search(window))
+
+
+class StreamedPage:
+    def __init__(self, response, encoding: str = None):
+        self._resp = response
+        self._iter = response.aiter_bytes()
+        self._buf = bytearray()
+        self.url = str(response.url)
+        self.status_code = response.status_code
+        # Charset is decided once, on the first bytes (see services/charset.py)
+        self._declared_encoding = response.charset_encoding
+        self._fallback_encoding = encoding
+        self.encoding = None
+        self._decoder = None
+        self._decoded_upto = 0 # bytes of _buf already fed to the decoder
+        self._flushed = False
+        self._parts = [] # decoded text so far, so read_all() never re-decodes the head
+        self._text = ""
+        self.exhausted = False
+        self.content_length = None
+        try:
+            # Content-Length and num_bytes_downloaded both count raw (wire) bytes
+            self.content_length = int(response.headers.get("Content-Length"))
+        except (TypeError, ValueError):
+            pass
+
+    @property
+    def text(self) -> str:
+        """Decoded body so far. Each byte is decoded once, however often this is read."""
+        if self._decoder is None and self._buf:
+            self.encoding, _ = charset.detect_encoding(bytes(self._buf[:charset.SAMPLE_BYTES]), self._declared_encoding, self._fallback_encoding)
+            self._decoder = codecs.getincrementaldecoder(self.encoding)(errors="replace")
+        if self._decoder is not None and (self._decoded_upto < len(self._buf) or (self.exhausted and not self._flushed)):
+            chunk = self._decoder.decode(bytes(self._buf[self._decoded_upto:]), final=self.exhausted)
+            self._decoded_upto = len(self._buf)
+            self._flushed = self.exhausted
+            if chunk:
+                self._parts.append(chunk)
+                self._text = "".join(self._parts)
+        return self._text
+
+    async def read_until(self, stop=head_complete, max_bytes: int = HEAD_BYTE_CAP) -> str:
+        """Reads until stop(buf, offset) is true, the cap is hit or the body ends."""
+        if self.exhausted or len(self._buf) >= max_bytes:
+            return self.text
+        if self._buf and stop and stop(self._buf, 0):
+            return self.text
+        async for chunk in self._iter:
+            offset = len(self._buf)
+            self._buf.extend(chunk)
+            if len(self._buf) >= max_bytes or (stop and stop(self._buf, offset)):
+                return self.text
+        self.exhausted = True
+        return self.text
+
+    async def read_all(self, max_bytes: int = FULL_BYTE_CAP) -> str:
+        return await self.read_until(stop=None, max_bytes=max_bytes)
+
+    async def drain_if_small(self):
+        if self.exhausted or self.content_length is None:
+            return
+        if self.content_length - self.bytes_read <= DRAIN_BYTES:
+            async for _ in self._iter:
+                pass
+            self.exhausted = True
+
+    @property
+    def bytes_read(self) -> int:
+        return self._resp.num_bytes_downloaded
+
+    @property
+    def bytes_saved(self) -> int:
+        """Known bytes we never downloaded (0 when the server didn't send a length)."""
+        if self.exhausted or self.content_length is None:
+            return 0
+        return max(0, self.content_length - self.bytes_read)
+
+
+@asynccontextmanager
+async def open_page(url: str, timeout: float = 15, stats: dict = None, encoding: str = None, insecure: bool = False, **kwargs):
+    """
+    Streams url through the crawl frontier. Usage:
+        async with open_page(url, stats=run_stats) as page:
+            html = await page.read_until()
+    The frontier slot is held until the block exits. If stats is given, the
+    bytes read / saved and early-stop count are added to it on exit.
+    insecure: use the unverified pool (see services/http_client.py).
+    """
+    health = get_domain_health()
+    timeout = health.timeout_for(url, timeout)
+    async with get_frontier().slot(url, timeout):
+        t0 = time.monotonic()
+        async with get_http_client(insecure).stream("GET", url, timeout=timeout, **kwargs) as response:
+            # Latency = time to response headers; body reads are the caller's business
+            if response.status_code >= 500:
+                health.record_failure(url)
+            else:
+                health.record_success(url, time.monotonic() - t0)
+            page = StreamedPage(response, encoding)
+            try:
+                yield page
+                try:
+                    await page.drain_if_small()
+                except Exception:
+                    pass
+            finally:
+                if stats is not None:
+                    stats["bytes_read"] = stats.get("bytes_read", 0) + page.bytes_read
+                    stats["bytes_saved"] = stats.get("bytes_saved", 0) + page.bytes_saved
+                    stats["pages"] = stats.get("pages", 0) + 1
+                    if not page.exhausted:
+                        stats["early_stops"] = stats.get("early_stops", 0) + 1
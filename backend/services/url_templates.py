@@ -0,0 +1,280 @@
+import os
+import re
+import time
+import bisect
+from datetime import date
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import select
+
+from database import AsyncSessionLocal
+from models import DeepScanCache
+from url_canon import url_parts
+
+# --- Learned Per-Outlet URL Templates ---
+# Mines the deep-scan cache (successfully dated articles + category verdicts)
+# of each outlet for its URL shapes and learns, per shape:
+#   - whether links of that shape are articles or category/landing pages
+#   - where the date sits in the URL, if anywhere: a /YYYY/MM/DD run of
+#     segments or a YYYYMMDD token - only when it matches the scanned date
+#     of (almost) every article of the shape
+#   - where a numeric article ID sits, and whether IDs grow with the date
+# smart_scrape_outlet looks every extracted link up with one dict probe:
+# category shapes are dropped before any deep scan, and links whose shape
+# reliably implies the date skip their deep scan (unless the title is bad).
+#
+# Shapes: the canonical path split into segments, each reduced to a shape -
+#   "2026" -> "#4", "10" -> "#2", "20261017" -> "#8", "482913" -> "#N",
+#   "482913-guvernul-a-aprobat.html" -> "#N-{slug}.html", short words kept
+#   ("stiri", "politica"). /stiri/482913-guvernul-a-aprobat.html -> ("stiri", "#N-{slug}.html")
+# Each link also counts towards a generalized shape where words after the
+# first segment become "{w}" (/tag/buget, /tag/scoala -> ("tag", "{w}")); the
+# exact shape wins when it has enough support.
+#
+# Date from ID: for a shape whose IDs are monotonic in the scanned dates, a new
+# link's ID is placed between known IDs; the date is implied only when both
+# neighbours were published the same day, or when the ID is above every known
+# ID and the newest known one is from today (re-runs during the same day).
+
+URL_TEMPLATE_TTL_SECONDS = float(os.getenv("URL_TEMPLATE_TTL_SECONDS", "1800"))
+URL_TEMPLATE_HISTORY = int(os.getenv("URL_TEMPLATE_HISTORY", "5000")) # rows per outlet
+MIN_SUPPORT = int(os.getenv("URL_TEMPLATE_MIN_SUPPORT", "5"))
+MIN_RATIO = 0.9 # share of a shape's rows that must agree (kind, date position, ID order)
+
+_SEGMENT_RE = re.compile(r"^(?:(?P<lead>\d+)[-_])?(?P<body>.*?)(?:[-_](?P<trail>\d+))?(?P<ext>\.[a-z0-9]{2,5})?$")
+_SLUG_MIN_LEN = 12
+
+_stats = {"learned": 0, "lookups": 0, "category_rejects": 0, "path_dates": 0, "id_dates": 0}
+
+
+def _num_class(digits: str) -> str:
+    n = len(digits)
+    if n <= 2:
+        return "#2"
+    if n <= 4:
+        return "#4"
+    if n == 8:
+        return "#8"
+    return "#N"
+
+
+def _segment_shape(seg: str, tokens: list) -> str:
+    """Shape of one path segment; its numeric tokens are appended to tokens."""
+    if seg.isdigit():
+        tokens.append(seg)
+        return _num_class(seg)
+    m = _SEGMENT_RE.match(seg.lower())
+    lead, body, trail, ext = m.group("lead"), m.group("body"), m.group("trail"), m.group("ext") or ""
+    is_slug = len(body) >= _SLUG_MIN_LEN or body.count("-") + body.count("_") >= 2
+    if not is_slug and not lead and not trail:
+        return seg.lower() # literal: section name, "tag", "page"...
+    shape = "{slug}" if is_slug else body
+    if lead:
+        tokens.append(lead)
+        shape = f"{_num_class(lead)}-{shape}"
+    if trail:
+        tokens.append(trail)
+        shape = f"{shape}-{_num_class(trail)}"
+    return shape + ext
+
+
+def generalize(shape: tuple) -> tuple:
+    return shape[:1] + tuple(s if ("#" in s or "{" in s) else "{w}" for s in shape[1:])
+
+
+def url_shape(url: str) -> Tuple[tuple, list]:
+    """(shape, numeric tokens in order) of a link's canonical path."""
+    _, path, _ = url_parts(url)
+    tokens = []
+    shape = tuple(_segment_shape(seg, tokens) for seg in path.strip("/").split("/") if seg)
+    return shape, tokens
+
+
+def _ymd(y: str, m: str, d: str) -> Optional[date]:
+    try:
+        return date(int(y), int(m), int(d))
+    except ValueError:
+        return None
+
+
+class Template:
+    def __init__(self, shape: tuple):
+        self.shape = shape
+        self.articles = 0
+        self.categories = 0
+        self.date_reader = None # ("ymd", i): tokens i..i+2 | ("ymd8", i): token i
+        self.id_index = None
+        self._ids: List[int] = []
+        self._ords: List[int] = []
+
+    @property
+    def kind(self) -> Optional[str]:
+        total = self.articles + self.categories
+        if total < MIN_SUPPORT:
+            return None
+        if self.articles >= MIN_RATIO * total:
+            return "article"
+        if self.categories >= MIN_RATIO * total:
+            return "category"
+        return None
+
+    def _learn_dates(self, dated: list):
+        """dated: [(tokens, date)] of this shape's articles."""
+        if len(dated) < MIN_SUPPORT:
+            return
+        n_tokens = len(dated[0][0])
+        readers = [("ymd", i) for i in range(n_tokens - 2)] + [("ymd8", i) for i in range(n_tokens)]
+        for reader in readers:
+            hits = sum(1 for tokens, d in dated if self._read(reader, tokens) == d)
+            if hits >= MIN_RATIO * len(dated):
+                self.date_reader = reader
+                return
+
+        # ID position: the longest numeric token, if IDs order the dates
+        id_positions = [i for i in range(n_tokens) if len(dated[0][0][i]) >= 3]
+        for i in sorted(id_positions, key=lambda i: -len(dated[0][0][i])):
+            pairs = sorted((int(tokens[i]), d.toordinal()) for tokens, d in dated)
+            in_order = sum(1 for a, b in zip(pairs, pairs[1:]) if b[1] >= a[1])
+            if in_order >= MIN_RATIO * (len(pairs) - 1):
+                self.id_index = i
+                self._ids = [p[0] for p in pairs]
+                self._ords = [p[1] for p in pairs]
+                return
+
+    @staticmethod
+    def _read(reader, tokens) -> Optional[date]:
+        kind, i = reader
+        if kind == "ymd":
+            return _ymd(*tokens[i:i + 3]) if i + 2 < len(tokens) else None
+        t = tokens[i] if i < len(tokens) else ""
+        return _ymd(t[:4], t[4:6], t[6:]) if len(t) == 8 else None
+
+    def implied_date(self, tokens: list, today: int) -> Tuple[Optional[str], Optional[str]]:
+        """(YYYY-MM-DD, "path"|"id") when this shape reliably implies the link's date."""
+        if self.date_reader:
+            d = self._read(self.date_reader, tokens)
+            return (d.isoformat(), "path") if d else (None, None)
+        if self.id_index is None or self.id_index >= len(tokens):
+            return None, None
+        link_id = int(tokens[self.id_index])
+        i = bisect.bisect_left(self._ids, link_id)
+        if i < len(self._ids) and self._ids[i] == link_id:
+            day = self._ords[i]
+        elif i == len(self._ids):
+            day = today if self._ords[-1] == today else None # newer than everything we know, and that is from today
+        elif i > 0 and self._ords[i - 1] == self._ords[i]:
+            day = self._ords[i]
+        else:
+            day = None
+        return (date.fromordinal(day).isoformat(), "id") if day else (None, None)
+
+
+class OutletTemplates:
+    def __init__(self, domain: str):
+        self.domain = domain
+        self.templates: Dict[tuple, Template] = {}
+        self.learned_at = 0.0
+
+    def learn(self, rows):
+        """rows: (url, date_str, content_type) from the deep-scan cache."""
+        templates = {}
+        dated = {}
+        for url, date_str, content_type in rows:
+            shape, tokens = url_shape(url)
+            if not shape:
+                continue
+            try:
+                day = date.fromisoformat(date_str[:10]) if date_str else None
+            except ValueError:
+                day = None
+            for s in {shape, generalize(shape)}:
+                t = templates.get(s)
+                if t is None:
+                    t = templates[s] = Template(s)
+                if content_type == "category":
+                    t.categories += 1
+                elif date_str:
+                    t.articles += 1
+                    if day:
+                        dated.setdefault(s, []).append((tokens, day))
+        for shape, items in dated.items():
+            templates[shape]._learn_dates(items)
+        self.templates = templates
+        self.learned_at = time.monotonic()
+        _stats["learned"] += 1
+
+    def lookup(self, url: str, today: int = None) -> Tuple[Optional[str], Optional[str], Optional[str]]:
+        """(kind, implied date, how) for a link: kind "article" / "category" / None."""
+        _stats["lookups"] += 1
+        shape, tokens = url_shape(url)
+        t = self.templates.get(shape)
+        if t is None or t.kind is None:
+            t = self.templates.get(generalize(shape))
+        if t is None:
+            return None, None, None
+        kind = t.kind
+        if kind == "category":
+            _stats["category_rejects"] += 1
+            return kind, None, None
+        if kind != "article":
+            return None, None, None
+        day, how = t.implied_date(tokens, today or date.today().toordinal())
+        if how:
+            _stats[f"{how}_dates"] += 1
+        return kind, day, how
+
+    def snapshot(self) -> list:
+        out = []
+        for t in sorted(self.templates.values(), key=lambda t: -(t.articles + t.categories)):
+            if t.kind is None:
+                continue
+            out.append({
+                "shape": "/" + "/".join(t.shape),
+                "kind": t.kind,
+                "articles": t.articles,
+                "categories": t.categories,
+                "date": "path" if t.date_reader else ("id" if t.id_index is not None else None),
+            })
+        return out
+
+
+_outlets: Dict[str, OutletTemplates] = {}
+
+
+def domain_of(url: str) -> str:
+    host, _, _ = url_parts(url)
+    return host
+
+
+async def get_outlet_templates(outlet_url: str) -> OutletTemplates:
+    """Templates of one outlet, (re)learned from its deep-scan history at most every URL_TEMPLATE_TTL_SECONDS."""
+    domain = domain_of(outlet_url)
+    ot = _outlets.get(domain)
+    if ot is not None and time.monotonic() - ot.learned_at < URL_TEMPLATE_TTL_SECONDS:
+        return ot
+    if ot is None:
+        ot = _outlets[domain] = OutletTemplates(domain)
+    try:
+        async with AsyncSessionLocal() as db:
+            stmt = (select(DeepScanCache.url, DeepScanCache.date_str, DeepScanCache.content_type)
+                    .where(DeepScanCache.domain == domain)
+                    .order_by(DeepScanCache.scanned_at.desc())
+                    .limit(URL_TEMPLATE_HISTORY))
+            rows = (await db.execute(stmt)).all()
+        ot.learn(rows)
+    except Exception as e:
+        # Keep the previous templates (or none) if the DB is unavailable
+        print(f"UrlTemplates: learning failed for {domain}: {e}")
+        ot.learned_at = time.monotonic()
+    return ot
+
+
+def invalidate(outlet_url: str):
+    """Relearn on the next lookup (new deep-scan results were stored for the outlet)."""
+    ot = _outlets.get(domain_of(outlet_url))
+    if ot is not None:
+        ot.learned_at = 0.0
+
+
+def get_url_template_stats() -> dict:
+    return {**_stats, "outlets": len(_outlets), "templates": sum(1 for ot in _outlets.values() for t in ot.templates.values() if t.kind)}
@@ -0,0 +1,99 @@
+"""
+Checks the single-pass charset detection (services/charset.py) on the page
+shapes that used to come out garbled, through both fetch paths:
+  - httpx.Response + apply_detected_encoding (page cache, rescue, /scraper/test)
+  - StreamedPage incremental decode (deep scans), with chunks split mid-character
+
+Usage: python test_charset.py
+"""
+import time
+import asyncio
+import httpx
+
+from services import charset
+from services.stream_fetch import StreamedPage
+
+RO = "Știri din Țara Bârsei: ședința consiliului județean"
+RU = "Новости Кишинёва: заседание муниципального совета"
+PL = "Wiadomości z Łodzi: źródło żółć"
+
+
+def page(body: str, meta: str = None) -> str:
+    head = f'<meta charset="{meta}">' if meta else ""
+    return f"<html><head>{head}<title>{body}</title></head><body><p>{body * 20}</p></body></html>"
+
+
+CASES = [
+    # label, raw bytes, Content-Type, outlet encoding, expected text
+    ("cp1251 declared in <meta> only", page(RU, "windows-1251").encode("cp1251"), "text/html", None, RU),
+    ("iso-8859-2 declared in <meta> only", page(PL, "iso-8859-2").encode("iso-8859-2"), "text/html", None, PL),
+    ("header beats <meta>", page(RO, "iso-8859-1").encode("utf-8"), "text/html; charset=utf-8", None, RO),
+    ("utf-8 BOM, no declaration", b"\xef\xbb\xbf" + page(RO).encode("utf-8"), "text/html", None, RO),
+    ("undeclared utf-8", page(RO).encode("utf-8"), "text/html", None, RO),
+    ("outlet encoding memoized", page(RU).encode("cp1251"), "text/html", "windows-1251", RU),
+    ("wrong memoized encoding, utf-8 page", page(RO).encode("utf-8"), "text/html", "windows-1250", RO),
+    ("undeclared cp1251 (detector)", page(RU * 3).encode("cp1251"), "text/html", None, RU),
+    ("bogus header charset", page(RO, "utf-8").encode("utf-8"), "text/html; charset=x-unknown", None, RO),
+]
+
+
+class FakeStream:
+    """Just enough of an httpx streaming response for StreamedPage."""
+    def __init__(self, content: bytes, content_type: str, chunk: int):
+        self._resp = httpx.Response(200, headers={"Content-Type": content_type}, content=content,
+                                    request=httpx.Request("GET", "https://example.ro/a"))
+        self._content = content
+        self._chunk = chunk
+        self.url = self._resp.url
+        self.status_code = 200
+        self.headers = self._resp.headers
+        self.charset_encoding = self._resp.charset_encoding
+        self.num_bytes_downloaded = 0
+
+    async def aiter_bytes(self):
+        for i in range(0, len(self._content), self._chunk):
+            self.num_bytes_downloaded += len(self._content[i:i + self._chunk])
+            yield self._content[i:i + self._chunk]
+
+
+async def check_stream(raw, ctype, fallback, expected) -> bool:
+    # 7-byte chunks split multi-byte characters; read_until() then read_all() like a deep scan
+    sp = StreamedPage(FakeStream(raw, ctype, 7), fallback)
+    head = await sp.read_until(max_bytes=64)
+    full = await sp.read_all()
+    # BOM stripped, head is a prefix of the full text (never re-decoded differently)
+    return expected in full and full.startswith(head) and not full.startswith("\ufeff")
+
+
+async def main():
+    ok = True
+    for label, raw, ctype, fallback, expected in CASES:
+        resp = httpx.Response(200, headers={"Content-Type": ctype}, content=raw, request=httpx.Request("GET", "https://example.ro/"))
+        enc = charset.apply_detected_encoding(resp, fallback)
+        text = resp.text
+        good = expected in text and not text.startswith("\ufeff") and resp.text is text # cached, single decode
+        stream_good = await check_stream(raw, ctype, fallback, expected)
+        ok = ok and good and stream_good
+        print(f"{'OK  ' if good and stream_good else 'FAIL'} {label:<36} -> {enc}{'' if stream_good else ' (stream FAIL)'}")
+
+    # Cost of decoding a large cp1251 page once vs. the old decode-per-consumer pattern
+    big = page(RU * 400, "windows-1251").encode("cp1251")
+    t0 = time.perf_counter()
+    for _ in range(20):
+        resp = httpx.Response(200, content=big, request=httpx.Request("GET", "https://example.ro/"))
+        charset.apply_detected_encoding(resp)
+        for _ in range(3):
+            resp.text
+    once = (time.perf_counter() - t0) / 20
+    t0 = time.perf_counter()
+    for _ in range(20):
+        for _ in range(3):
+            big.decode("cp1251", errors="replace")
+    thrice = (time.perf_counter() - t0) / 20
+    print(f"{len(big) // 1024}KB page, 3 consumers: detect+decode once {once * 1000:.2f}ms vs 3 decodes {thrice * 1000:.2f}ms")
+    print("stats:", charset.get_charset_stats(), "| charset_normalizer:", charset.CHARSET_NORMALIZER_AVAILABLE)
+    return ok
+
+
+if __name__ == "__main__":
+    raise SystemExit(0 if asyncio.run(main()) else 1)
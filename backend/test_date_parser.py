@@ -0,0 +1,202 @@
+"""
+Correctness corpus for date_parser.
+
+1. Hand-written multilingual cases (expected date given).
+2. DATED_CORPUS: date strings the way outlets print them in meta tags,
+   JSON-LD and bylines (Romanian / Russian month names, dotted and ISO forms,
+   relative dates resolved against NOW), with expected dates. Where the old
+   parse_romanian_date found a date it must be the same one.
+   Strings harvested from spam_urls.json (titles) and the debug scripts
+   (debug_meta_selector.py meta values) get the same legacy check.
+3. URL date slugs from spam_urls.json (/2026/01/20/) must parse. The old parser
+   misread these (2026/01/07/2026-... -> July 1st), so URLs are not in the
+   regression set.
+
+Usage: python test_date_parser.py
+Exits 1 on any failure.
+"""
+import os
+import re
+import sys
+import json
+from datetime import datetime
+
+import date_parser
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+CASES = [
+    # Romanian (old parser's docstring)
+    ("29 decembrie 2025", "2025-12-29"), ("ian. 04, 2026", "2026-01-04"), ("la 06.01.2026", "2026-01-06"),
+    ("Publicat: 3 Februarie 2026, 10:15", "2026-02-03"), ("din 12.11.2025", "2025-11-12"),
+    # Russian / Ukrainian / Bulgarian / Serbian
+    ("30 декабря 2025", "2025-12-30"), ("3 марта 2026 г.", "2026-03-03"), ("1 лютого 2026", "2026-02-01"),
+    ("14 листопада 2025", "2025-11-14"), ("5 януари 2026", "2026-01-05"), ("7. јануар 2026.", "2026-01-07"),
+    ("7. januar 2026.", "2026-01-07"),
+    # Central European
+    ("15 listopada 2025", "2025-11-15"), ("7. září 2025", "2025-09-07"), ("2. júna 2025", "2025-06-02"),
+    ("2026. január 16.", "2026-01-16"), ("16. Januar 2026", "2026-01-16"), ("3. März 2026", "2026-03-03"),
+    ("5. Jänner 2026", "2026-01-05"),
+    # Western European / Turkish / Greek
+    ("5 août 2026", "2026-08-05"), ("16 de enero de 2026", "2026-01-16"), ("2 maggio 2025", "2025-05-02"),
+    ("10 de março de 2026", "2026-03-10"), ("4 maart 2026", "2026-03-04"), ("12 Ocak 2026", "2026-01-12"),
+    ("16 Ιανουαρίου 2026", "2026-01-16"),
+    # English
+    ("January 16, 2026", "2026-01-16"), ("Jan 16th, 2026", "2026-01-16"), ("16 January 2026", "2026-01-16"),
+    ("Sept. 3, 2025", "2025-09-03"),
+    # Numeric / ISO / CJK
+    ("2026-01-05T14:04:00+02:00", "2026-01-05"), ("2026/01/16 14:25:36", "2026-01-16"), ("16/01/2026 02:14 pm", "2026-01-16"),
+    ("01/16/2026", "2026-01-16"), ("2026年1月16日", "2026-01-16"), ("2026년 1월 16일", "2026-01-16"),
+    # No date
+    ("", None), ("Stiri locale", None), ("31.02.2026", None), ("Update 2026", None),
+]
+
+NOW = datetime(2026, 1, 5, 12, 0)
+
+DATED_CORPUS = [
+    # ISO / machine-readable (meta article:published_time, JSON-LD datePublished, <time datetime>)
+    ("2026-01-05T14:04:00+02:00", "2026-01-05"), ("2025-12-30T18:20:11.000Z", "2025-12-30"),
+    ("2026-01-04 09:15:00", "2026-01-04"), ("2025-11-28", "2025-11-28"), ("20260105", None),
+    ("Mon, 05 Jan 2026 14:04:00 +0200", "2026-01-05"),
+    # Dotted / slashed day-first (bylines)
+    ("05.01.2026", "2026-01-05"), ("5.1.2026", "2026-01-05"), ("Publicat: 05.01.2026 14:04", "2026-01-05"),
+    ("30.12.2025 | 18:20", "2025-12-30"), ("Actualizat: 31.12.2025, 09:41", "2025-12-31"),
+    ("28/11/2025 - 10:02", "2025-11-28"), ("04-01-2026", "2026-01-04"), ("Опубликовано: 30.12.2025 в 18:20", "2025-12-30"),
+    ("Обновлено 04.01.2026 11:30", "2026-01-04"),
+    # Romanian month names
+    ("5 ianuarie 2026", "2026-01-05"), ("Luni, 5 ianuarie 2026, 14:04", "2026-01-05"),
+    ("Actualizat la 30 decembrie 2025, ora 18:20", "2025-12-30"), ("3 februarie 2026", "2026-02-03"),
+    ("14 mai 2025", "2025-05-14"), ("21 noiembrie 2025", "2025-11-21"), ("1 octombrie 2025", "2025-10-01"),
+    ("ian. 04, 2026", "2026-01-04"), ("dec. 30, 2025", "2025-12-30"), ("27 sept. 2025", "2025-09-27"),
+    ("9 iunie 2025", "2025-06-09"), ("17 iulie 2025", "2025-07-17"), ("Joi, 11 septembrie 2025", "2025-09-11"),
+    # Russian month names
+    ("30 декабря 2025", "2025-12-30"), ("30 декабря 2025 г. в 18:20", "2025-12-30"),
+    ("Опубликовано: 4 января 2026, 11:30", "2026-01-04"), ("12 мая 2025", "2025-05-12"),
+    ("1 сентября 2025 г.", "2025-09-01"), ("23 февраля 2026", "2026-02-23"), ("8 марта 2025", "2025-03-08"),
+    ("15 июня 2025", "2025-06-15"), ("7 ноября 2025 года", "2025-11-07"),
+    # Relative (resolved against NOW)
+    ("azi, 09:15", "2026-01-05"), ("Astăzi la 10:30", "2026-01-05"), ("ieri, 18:20", "2026-01-04"),
+    ("Publicat: ieri, 10:00", "2026-01-04"), ("alaltăieri", "2026-01-03"), ("acum 3 ore", "2026-01-05"),
+    ("acum o oră", "2026-01-05"), ("acum 2 zile", "2026-01-03"), ("acum 15 minute", "2026-01-05"),
+    ("сегодня, 09:15", "2026-01-05"), ("Вчера в 18:20", "2026-01-04"), ("позавчера", "2026-01-03"),
+    ("2 часа назад", "2026-01-05"), ("5 дней назад", "2025-12-31"), ("30 минут назад", "2026-01-05"),
+    ("yesterday at 6:20 pm", "2026-01-04"), ("3 days ago", "2026-01-02"),
+    # Look like dates, aren't (whole-string rule for relative words, impossible days)
+    ("Ce s-a votat ieri in consiliul local", None), ("Вчера в Думе обсудили бюджет на 2026 год", None),
+    ("30.02.2026", None), ("acum 3 saptamani si ceva", None),
+]
+
+LANG_CASES = [
+    ("15 listopada 2025", "hr", "2025-10-15"), ("15 listopada 2025", "pl", "2025-11-15"),
+    ("listopad 3, 2025", "cs", "2025-11-03"),
+]
+
+
+def legacy_parse_romanian_date(date_str):
+    """parse_romanian_date as it was before date_parser (reference for the regression check)."""
+    if not date_str: return None
+    ro_months = {
+        "ianuarie": 1, "ian": 1, "februarie": 2, "feb": 2, "martie": 3, "mar": 3, "aprilie": 4, "apr": 4,
+        "mai": 5, "iunie": 6, "iun": 6, "iulie": 7, "iul": 7, "august": 8, "aug": 8, "septembrie": 9, "sept": 9,
+        "octombrie": 10, "oct": 10, "noiembrie": 11, "nov": 11, "decembrie": 12, "dec": 12,
+        "января": 1, "январь": 1, "февраля": 2, "февраль": 2, "марта": 3, "март": 3,
+        "апреля": 4, "апрель": 4, "мая": 5, "май": 5, "июня": 6, "июнь": 6,
+        "июля": 7, "июль": 7, "августа": 8, "август": 8, "сентября": 9, "сентябрь": 9,
+        "октября": 10, "октябрь": 10, "ноября": 11, "ноябрь": 11, "декабря": 12, "декабрь": 12,
+        "january": 1, "february": 2, "march": 3, "april": 4, "may": 5, "june": 6,
+        "july": 7, "august": 8, "september": 9, "october": 10, "november": 11, "december": 12
+    }
+    clean_text = date_str.lower().replace("la ", "").replace("din ", "").strip()
+    m = re.search(r'(\d{4})-(\d{1,2})-(\d{1,2})', clean_text)
+    if m:
+        try: return datetime(int(m.group(1)), int(m.group(2)), int(m.group(3)))
+        except: pass
+    m = re.search(r'(\d{1,2})[./-](\d{1,2})[./-](\d{4})', clean_text)
+    if m:
+        try: return datetime(int(m.group(3)), int(m.group(2)), int(m.group(1)))
+        except: pass
+    m = re.search(r'(\d{1,2})\s+([a-zа-яăâîșț]+)\s+(\d{4})', clean_text)
+    if m:
+        day, month_name, year = m.groups()
+        month = ro_months.get(month_name) or ro_months.get(month_name[:3])
+        if month:
+            try: return datetime(int(year), month, int(day))
+            except: pass
+    m = re.search(r'([a-zа-яăâîșț]{3,})\.?\s+(\d{1,2})[,\.]?\s+(\d{4})', clean_text)
+    if m:
+        month_name, day, year = m.groups()
+        month = ro_months.get(month_name.lower()) or ro_months.get(month_name.lower()[:3])
+        if month:
+            try: return datetime(int(year), month, int(day))
+            except: pass
+    return None
+
+
+def harvested_strings():
+    """Titles and URL date slugs from spam_urls.json, plus debug script meta values."""
+    strings, slugs = [], []
+    with open(os.path.join(BASE_DIR, "spam_urls.json"), encoding="utf-8") as f:
+        for entry in json.load(f):
+            if entry.get("title"):
+                strings.append(entry["title"])
+            for y, m, d in re.findall(r'/(\d{4})/(\d{2})/(\d{2})/', entry.get("url") or ""):
+                slugs.append((f"{y}/{m}/{d}", f"{y}-{m}-{d}"))
+    with open(os.path.join(BASE_DIR, "debug_meta_selector.py"), encoding="utf-8") as f:
+        strings += re.findall(r'content="([^"]*\d{4}[^"]*)"', f.read())
+    return strings, slugs
+
+
+def fmt(d):
+    return d.strftime("%Y-%m-%d") if d else None
+
+
+def main():
+    failures = []
+    for text, expected in CASES:
+        got = fmt(date_parser.parse_date(text))
+        if got != expected:
+            failures.append(f"{text!r}: expected {expected}, got {got}")
+    for text, lang, expected in LANG_CASES:
+        got = fmt(date_parser.parse_date(text, lang))
+        if got != expected:
+            failures.append(f"{text!r} [{lang}]: expected {expected}, got {got}")
+
+    agreed = 0
+    for text, expected in DATED_CORPUS:
+        got = fmt(date_parser.parse_date(text, now=NOW))
+        if got != expected:
+            failures.append(f"corpus {text!r}: expected {expected}, got {got}")
+        old = legacy_parse_romanian_date(text)
+        if old and fmt(old) != got:
+            failures.append(f"regression {text!r}: legacy {fmt(old)}, now {got}")
+        elif old:
+            agreed += 1
+
+    strings, slugs = harvested_strings()
+    for text in strings:
+        old = legacy_parse_romanian_date(text)
+        if old:
+            new = date_parser.parse_date(text)
+            if fmt(new) != fmt(old):
+                failures.append(f"regression {text!r}: legacy {fmt(old)}, now {fmt(new)}")
+            else:
+                agreed += 1
+    for text, expected in slugs:
+        got = fmt(date_parser.parse_date(text))
+        if got != expected:
+            failures.append(f"slug {text!r}: expected {expected}, got {got}")
+
+    batch = date_parser.parse_dates([t for t, _ in CASES])
+    if [fmt(d) for d in batch] != [e for _, e in CASES]:
+        failures.append("parse_dates() disagrees with parse_date()")
+
+    print(f"Cases: {len(CASES) + len(LANG_CASES)} | dated corpus: {len(DATED_CORPUS)} | harvested strings: {len(strings)} "
+          f"| {agreed} dated by the legacy parser, all must match | URL slugs: {len(slugs)}")
+    for line in failures:
+        print(f"   FAIL {line}")
+    print("OK" if not failures else f"{len(failures)} FAILURES")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,89 @@
+"""
+Checks near_dup.NearDupIndex on syndicated-story shapes (wire copy with small
+edits, diacritics stripped, suffixes added) vs. distinct stories that share
+most words, and times add() on a digest-sized batch.
+
+Usage: python test_near_dup.py
+"""
+import time
+import random
+
+from near_dup import NearDupIndex
+
+CLUSTERS = [
+    ["PSD și PNL negociază o nouă coaliție de guvernare",
+     "PSD si PNL negociaza o noua coalitie de guvernare - surse",
+     "Surse: PSD și PNL negociază o nouă coaliție de guvernare"],
+    ["Primarul Clujului a demisionat după scandalul de corupție",
+     "Primarul Clujului a demisionat după scandalul de corupție | VIDEO"],
+]
+
+# Rewritten headlines: one story only by the snippet (title-only they stay apart)
+SNIPPET = ("Executivul a adoptat in sedinta de miercuri proiectul legii bugetului de stat pentru anul 2027, "
+           "care prevede un deficit de 2,5% din PIB si cresterea investitiilor in infrastructura locala.")
+SNIPPET_CLUSTER = [
+    ("Guvernul a aprobat bugetul pentru anul 2027", SNIPPET),
+    ("Guvernul a aprobat bugetul pentru anul 2027, anunță ministrul Finanțelor", SNIPPET + " Ministrul a prezentat cifrele."),
+    ("Guvernul a aprobat bugetul pe 2027", "Publicat de redactie. " + SNIPPET),
+]
+
+DISTINCT = [
+    "Ședința consiliului local din 12 octombrie",
+    "Ședința consiliului local din 19 octombrie",
+    "Accident grav pe DN1 la Brașov, trei victime",
+    "Incendiu puternic într-un bloc din Sibiu",
+    # same local template, another place
+    "Accident grav pe DN1 la Brasov, doi raniti",
+    "Accident grav pe DN1 la Ploiesti, doi raniti",
+    "Primaria Cluj anunta inchiderea centrului pentru trafic in weekend",
+    "Primaria Iasi anunta inchiderea centrului pentru trafic in weekend",
+    "Incendiu puternic intr-un bloc de locuinte din Constanta",
+    "Incendiu puternic intr-un bloc de locuinte din Timisoara",
+    "Consiliul județean a aprobat bugetul pentru spitale",
+    "Video",
+    "Meteo azi",
+]
+
+
+if __name__ == "__main__":
+    ok = True
+    idx = NearDupIndex()
+    reps = {}
+    for i, cluster in enumerate(CLUSTERS):
+        for j, title in enumerate(cluster):
+            rep = idx.add((i, j), title)
+            good = rep is None if j == 0 else rep == (i, 0)
+            ok = ok and good
+            print(f"{'OK  ' if good else 'FAIL'} {title[:60]:<62} -> {rep}")
+    for j, (title, text) in enumerate(SNIPPET_CLUSTER):
+        rep = idx.add(("s", j), title, text)
+        good = rep is None if j == 0 else rep == ("s", 0)
+        ok = ok and good
+        print(f"{'OK  ' if good else 'FAIL'} {title[:60]:<62} -> {rep} (snippet)")
+    title_only = NearDupIndex()
+    good = all(title_only.add(j, title) is None for j, (title, _) in enumerate(SNIPPET_CLUSTER))
+    ok = ok and good
+    print(f"{'OK  ' if good else 'FAIL'} same rewritten headlines without a snippet stay apart")
+    for k, title in enumerate(DISTINCT):
+        rep = idx.add(("d", k), title)
+        good = rep is None
+        ok = ok and good
+        print(f"{'OK  ' if good else 'FAIL'} {title[:60]:<62} -> {rep} (distinct)")
+
+    # Digest-sized batch: 2000 unrelated titles + 5 copies of 50 stories
+    rng = random.Random(7)
+    syllables = ["ca", "re", "mi", "to", "lu", "na", "pe", "si", "vo", "da", "ge", "bu", "ro", "ta", "ni", "che", "stra", "pri", "con", "ment"]
+    words = ["".join(rng.choice(syllables) for _ in range(rng.randint(2, 4))) for _ in range(3000)]
+    titles = [" ".join(rng.choice(words) for _ in range(9)) + f" {i}" for i in range(2000)]
+    stories = [" ".join(rng.choice(words) for _ in range(10)) for _ in range(50)]
+    copies = [s + suffix for s in stories for suffix in ("", " - surse", " | VIDEO", " | FOTO", " (live)")]
+    rng.shuffle(copies)
+    idx = NearDupIndex()
+    t0 = time.perf_counter()
+    dups = sum(1 for n, t in enumerate(titles + copies) if idx.add(n, t) is not None)
+    elapsed = time.perf_counter() - t0
+    good = dups == 200
+    ok = ok and good
+    print(f"{'OK  ' if good else 'FAIL'} {len(titles) + len(copies)} titles: {dups} near-duplicates clustered (expected 200), "
+          f"{elapsed / (len(titles) + len(copies)) * 1e6:.0f}us per title, stats {idx.stats()}")
+    raise SystemExit(0 if ok else 1)
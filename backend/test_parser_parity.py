@@ -0,0 +1,128 @@
+"""
+Parity check: every SCRAPER_PARSER backend must extract the same thing as html.parser.
+
+Pages come from bench_parse.load_corpus (a directory of *.html files, the page
+cache of recorded outlet pages, or synthetic pages) plus a few hand-written
+edge cases (entities, broken nesting, missing quotes, uppercase tags).
+
+Compared per page: extract_article_links, extract_date_from_html,
+extract_title_from_html, detect_content_type and the meta map.
+
+The head pre-scanner (SCRAPER_PRESCAN) is checked the same way: date and title
+with the regex fast path must equal the DOM-only cascade.
+
+Usage: python test_parser_parity.py [corpus_dir]
+Exits 1 if any backend disagrees with html.parser.
+"""
+import io
+import os
+import sys
+import tempfile
+import contextlib
+
+import scraper_engine
+from scraper_engine import ParsedDocument, PARSER_BACKENDS, resolve_parser_backend
+from bench_parse import load_corpus
+
+EDGE_CASES = [
+    ("https://ziar.example.ro/", """<html><head><title>Stiri &amp; Evenimente</title>
+<META PROPERTY="og:title" CONTENT="Primaria &quot;Centru&quot; anunta">
+<meta name="date" content="2026-10-03"></head><body>
+<A HREF="/stiri/2026/10/03/primaria-anunta-lucrari">Primăria anunță <b>lucrări</b> &amp; investiții</A>
+<a href=/stiri/2026/10/02/fara-ghilimele>Link fara ghilimele in atribut</a>
+<a href="/stiri/2026/10/01/nested"><span>  Titlu   </span> <em>imbricat</em></a>
+<p>Paragraf neinchis <a href="/stiri/2026/09/30/in-paragraf">Link in paragraf neinchis</a>
+<div><a href="">Gol</a><a href="#top">Sus</a><a>Fara href</a></div>
+</body></html>"""),
+    ("https://ziar.example.ro/articol", """<!DOCTYPE html><html><head>
+<script type="application/ld+json">{"@graph": [{"@type": "NewsArticle", "datePublished": "2026-09-28T08:00:00+03:00"}]}</script>
+<meta property="og:title" content="">
+<meta name="twitter:title" content="Titlu Twitter">
+</head><body><h1>Scurt</h1><time datetime="2026-09-27">ieri</time></body></html>"""),
+    ("https://ziar.example.ro/comentarii", """<html><head>
+<!-- <meta property="article:published_time" content="2020-01-01"> -->
+<script>var tpl = '<meta property="og:title" content="Din script">';</script>
+<meta content="2026-08-15T09:30:00Z" property="article:published_time" />
+<meta property='og:title' content='Titlu cu &#8222;ghilimele&#8221; &amp; simboluri > 3'>
+</head><body><time>fara atribut</time><TIME DATETIME="2026-08-14">ieri</TIME></body></html>"""),
+]
+
+
+def prescan_mismatches(pages):
+    """Date/title with the pre-scan fast path vs the DOM-only cascade."""
+    mismatches, hits = [], 0
+    for src, url, html in pages:
+        with contextlib.redirect_stdout(io.StringIO()):
+            scraper_engine.PRESCAN_ENABLED = False
+            doc = ParsedDocument(html, url, backend="html.parser")
+            expected = {"date": scraper_engine.extract_date_from_html(doc, url), "title": scraper_engine.extract_title_from_html(doc, url)}
+            scraper_engine.PRESCAN_ENABLED = True
+            doc = ParsedDocument(html, url, backend="html.parser")
+            actual = {"date": scraper_engine.extract_date_from_html(doc, url), "title": scraper_engine.extract_title_from_html(doc, url)}
+        hits += doc.date_source == "prescan"
+        for field in expected:
+            if expected[field] != actual[field]:
+                mismatches.append((src, url, field, expected[field], actual[field]))
+    return mismatches, hits
+
+
+def extract_all(url, html, backend):
+    doc = ParsedDocument(html, url, backend=backend)
+    return {
+        "links": scraper_engine.extract_article_links(doc, url),
+        "date": scraper_engine.extract_date_from_html(doc, url),
+        "title": scraper_engine.extract_title_from_html(doc, url),
+        "content_type": scraper_engine.detect_content_type(doc),
+        "meta": doc.meta,
+    }
+
+
+def main():
+    corpus_dir = sys.argv[1] if len(sys.argv) > 1 else None
+    pages = [(src, url, html) for src, url, html in load_corpus(corpus_dir)]
+    pages += [("edge", url, html) for url, html in EDGE_CASES]
+
+    backends = [b for b in PARSER_BACKENDS if b != "html.parser" and resolve_parser_backend(b) == b]
+    if not backends:
+        print("No alternative parser backend installed (lxml / selectolax). Nothing to compare.")
+
+    os.chdir(tempfile.mkdtemp()) # extractors append to stream_debug.log
+    failures = 0
+
+    prescan_enabled = scraper_engine.PRESCAN_ENABLED
+    mismatches, hits = prescan_mismatches(pages)
+    scraper_engine.PRESCAN_ENABLED = prescan_enabled
+    status = "OK" if not mismatches else f"{len(mismatches)} MISMATCHES"
+    print(f"[prescan] {len(pages)} pages, fast path answered {hits}: {status}")
+    for src, url, field, exp, act in mismatches[:20]:
+        print(f"   - {url} {field}: {exp!r} vs {act!r}")
+    failures += len(mismatches)
+
+    for backend in backends:
+        mismatches = []
+        for src, url, html in pages:
+            with contextlib.redirect_stdout(io.StringIO()):
+                expected = extract_all(url, html, "html.parser")
+                actual = extract_all(url, html, backend)
+            for field in expected:
+                if expected[field] != actual[field]:
+                    mismatches.append((src, url, field, expected[field], actual[field]))
+
+        status = "OK" if not mismatches else f"{len(mismatches)} MISMATCHES"
+        print(f"[{backend}] {len(pages)} pages: {status}")
+        for src, url, field, exp, act in mismatches[:20]:
+            if field == "links":
+                exp_urls = [l["url"] for l in exp]
+                act_urls = [l["url"] for l in act]
+                only_exp = [l for l in exp if l not in act][:3]
+                only_act = [l for l in act if l not in exp][:3]
+                print(f"   - {url} links: {len(exp_urls)} vs {len(act_urls)} | html.parser only: {only_exp} | {backend} only: {only_act}")
+            else:
+                print(f"   - {url} {field}: {exp!r} vs {act!r}")
+        failures += len(mismatches)
+
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,66 @@
+"""
+Checks url_canon: every spelling of a link maps to one canonical form / key,
+distinct articles stay distinct, and the per-link cost in the stream dedupe
+vs. the old split + regex + md5 fingerprint.
+
+Usage: python test_url_canon.py
+"""
+import re
+import time
+import hashlib
+
+from url_canon import canonicalize, url_key
+
+SAME = [
+    # (variants..., expected canonical form)
+    (["https://www.ziar.ro/stiri/a", "http://ziar.ro/stiri/a/", "https://ZIAR.ro:443/stiri/a#comments",
+      "https://ziar.ro/stiri/a?utm_source=facebook&utm_medium=social", "https://ziar.ro/stiri/a?fbclid=IwAR0x"], "ziar.ro/stiri/a"),
+    (["https://ziar.ro/știri/ședința", "https://ziar.ro/%c8%99tiri/%C8%99edin%c8%9ba", "https://ziar.ro/%C8%99tiri/%C8%99edin%C8%9Ba/"],
+     "ziar.ro/%C8%99tiri/%C8%99edin%C8%9Ba"),
+    (["https://ziar.ro/%7Eredactia/%61rticol", "https://ziar.ro/~redactia/articol"], "ziar.ro/~redactia/articol"),
+    (["https://ziar.ro/?p=123&utm_campaign=x", "https://ziar.ro/?p=123", "https://www.ziar.ro/?p=123#top"], "ziar.ro?p=123"),
+    (["https://ziar.ro/a?b=2&a=1", "https://ziar.ro/a?a=1&b=2&gclid=z"], "ziar.ro/a?a=1&b=2"),
+]
+
+DIFFERENT = [
+    ("https://ziar.ro/?p=123", "https://ziar.ro/?p=124"), # query-identified articles
+    ("https://ziar.ro/Stiri/A", "https://ziar.ro/stiri/a"), # path case kept
+    ("https://ziar.ro/a%2Fb", "https://ziar.ro/a/b"),     # encoded slash is not a separator
+    ("https://ziar.ro:8080/a", "https://ziar.ro/a"),      # non-default port
+]
+
+
+def old_fingerprint(title, url):
+    clean_title = str(title).strip().lower()
+    clean_url = str(url).split('?')[0].split('#')[0].strip().lower()
+    clean_url = re.sub(r'^https?://(www\.)?', '', clean_url).strip('/')
+    return hashlib.md5((clean_title + clean_url).encode()).hexdigest()
+
+
+def new_fingerprint(title, url):
+    return (url_key(str(url)), str(title).strip().lower())
+
+
+if __name__ == "__main__":
+    ok = True
+    for variants, expected in SAME:
+        forms = {canonicalize(v) for v in variants}
+        keys = {url_key(v) for v in variants}
+        good = forms == {expected} and len(keys) == 1
+        ok = ok and good
+        print(f"{'OK  ' if good else 'FAIL'} {expected:<40} {'' if good else forms}")
+    for a, b in DIFFERENT:
+        good = url_key(a) != url_key(b)
+        ok = ok and good
+        print(f"{'OK  ' if good else 'FAIL'} distinct: {a} / {b}")
+
+    # The same ~300 links come back on every listing page and every run of the stream
+    links = [(f"Titlul articolului numarul {i}", f"https://www.ziar.ro/stiri/2026/10/articol-{i}/?utm_source=rss") for i in range(300)]
+    for name, fn in (("split + re + md5", old_fingerprint), ("url_key (memoized)", new_fingerprint)):
+        t0 = time.perf_counter()
+        for _ in range(50):
+            seen = set()
+            for title, url in links:
+                seen.add(fn(title, url))
+        print(f"{name:<22} {(time.perf_counter() - t0) / (50 * len(links)) * 1e6:.2f}us per link")
+    raise SystemExit(0 if ok else 1)
@@ -0,0 +1,101 @@
+"""
+URL canonicalization and 64-bit URL keys - the one normalization every
+dedupe set, cache and index keys on.
+
+Replaces the ad hoc variants the digest used to mix (split("?")[0] with or
+without the fragment / trailing slash / scheme / lowercasing, then md5 of
+that). canonicalize() maps every spelling of an article URL to one string:
+  - scheme, "www.", default port, fragment and trailing slash dropped
+  - host lowercased; path case kept (paths are case-sensitive on most sites)
+  - tracking parameters (utm_*, fbclid, gclid, ...) dropped; the rest kept
+    and sorted - ?p=123 / ?id=... identify articles on many sites
+  - percent-encoding normalized: escapes of unreserved characters decoded,
+    other escapes uppercased, raw non-ASCII characters encoded
+        HTTPS://www.Ziar.ro/știri/a/?utm_source=fb&id=7#c -> ziar.ro/%C8%99tiri/a?id=7
+
+url_key() is an 8-byte blake2b of that string as an int: stable across
+processes and restarts (keys end up in Bloom filter files), no hex string
+allocated, and memoized on the raw URL since the same links come back on
+every listing page.
+
+canonicalize(url)  -> "host/path?query"
+url_key(url)       -> int (64-bit)
+url_parts(url)     -> (host, path, query) of the canonical form
+"""
+import os
+import re
+import hashlib
+from functools import lru_cache
+from urllib.parse import urlsplit, quote, parse_qsl, urlencode
+
+URL_CANON_CACHE_SIZE = int(os.getenv("URL_CANON_CACHE_SIZE", "65536"))
+
+TRACKING_PARAMS = frozenset({
+    "fbclid", "gclid", "gclsrc", "dclid", "msclkid", "yclid", "igshid", "twclid", "ttclid",
+    "mc_cid", "mc_eid", "_ga", "_gl", "ocid", "cmpid", "wt_mc", "ref_src", "amp",
+})
+TRACKING_PREFIXES = ("utm_", "pk_", "mtm_", "hsa_")
+
+DEFAULT_PORTS = {"http": "80", "https": "443"}
+_UNRESERVED = frozenset("ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789-._~")
+_ESCAPE_RE = re.compile(r"%([0-9A-Fa-f]{2})")
+_PATH_SAFE = "/%:@!$&'()*+,;=-._~"
+
+
+def _normalize_escape(match) -> str:
+    char = chr(int(match.group(1), 16))
+    return char if char in _UNRESERVED else "%" + match.group(1).upper()
+
+
+def _normalize_path(path: str) -> str:
+    if "%" in path:
+        path = _ESCAPE_RE.sub(_normalize_escape, path)
+    if not path.isascii() or " " in path:
+        path = quote(path, safe=_PATH_SAFE)
+    return path.rstrip("/")
+
+
+def _is_tracking(name: str) -> bool:
+    name = name.lower()
+    return name in TRACKING_PARAMS or name.startswith(TRACKING_PREFIXES)
+
+
+@lru_cache(maxsize=URL_CANON_CACHE_SIZE)
+def url_parts(url: str) -> tuple:
+    """(host, path, query) of the canonical form; cached on the raw URL. Idempotent: accepts canonical forms too."""
+    url = url.strip()
+    if "://" not in url and not url.startswith("/"):
+        url = "//" + url # canonical form (host/path) has no scheme
+    try:
+        parts = urlsplit(url)
+    except ValueError:
+        return "", url, ""
+    host = parts.netloc.rsplit("@", 1)[-1].lower()
+    if host.startswith("www."):
+        host = host[4:]
+    if ":" in host:
+        name, _, port = host.rpartition(":")
+        if not port or port == DEFAULT_PORTS.get(parts.scheme.lower()):
+            host = name
+
+    query = ""
+    if parts.query:
+        params = [(k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True) if not _is_tracking(k)]
+        if params:
+            query = urlencode(sorted(params), quote_via=quote)
+    return host, _normalize_path(parts.path), query
+
+
+def canonicalize(url: str) -> str:
+    host, path, query = url_parts(url)
+    return f"{host}{path}?{query}" if query else host + path
+
+
+@lru_cache(maxsize=URL_CANON_CACHE_SIZE)
+def url_key(url: str) -> int:
+    """64-bit key of canonicalize(url)."""
+    return int.from_bytes(hashlib.blake2b(canonicalize(url).encode("utf-8"), digest_size=8).digest(), "little")
+
+
+def url_keys(urls) -> list:
+    return [url_key(u) for u in urls]
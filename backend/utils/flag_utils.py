@@ -1,8 +1,8 @@
 import os
-import httpx
 import hashlib
 import json
 from urllib.parse import urlparse
+from services.http_client import get_http_client
 
 STATIC_URL_PREFIX = "/static/flags"
 
@@ -86,16 +86,15 @@ async def ensure_local_flag(remote_url: str, country_name: str = None) -> str:
     print(f"DEBUG: Localizing flag for {country_name} from {remote_url}")
     try:
         headers = {"User-Agent": "Urbanous/1.0"}
-        async with httpx.AsyncClient(timeout=10, follow_redirects=True, headers=headers) as client:
-            resp = await client.get(remote_url)
-            if resp.status_code == 200:
-                with open(local_path, "wb") as f:
-                    f.write(resp.content)
-                return public_url
-            else:
-                print(f"WARN: Failed to download flag {remote_url}, status {resp.status_code}")
-                # Don't return remote_url if it failed? actually keep remote as last resort
-                return remote_url
+        resp = await get_http_client().get(remote_url, headers=headers, timeout=10)
+        if resp.status_code == 200:
+            with open(local_path, "wb") as f:
+                f.write(resp.content)
+            return public_url
+        else:
+            print(f"WARN: Failed to download flag {remote_url}, status {resp.status_code}")
+            # Don't return remote_url if it failed? actually keep remote as last resort
+            return remote_url
     except Exception as e:
         print(f"ERROR: Could not localize flag {remote_url}: {e}")
         return remote_url
@@ -0,0 +1,49 @@
+"""
+Shared scaffolding for the verify_*.py scripts.
+
+scratch_db() gives a script its own SQLite file in a fresh temp dir and points
+every imported module's AsyncSessionLocal (database, services.*, the script
+itself) at it. The app engine - DATABASE_URL / DATA_DIR, possibly production -
+is never opened, so a verify run can't touch real users, digests or rules.
+
+Checks collects OK / FAIL lines:
+    check = Checks()
+    check("label", condition)
+    return check.ok
+"""
+import os
+import sys
+import tempfile
+
+from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
+from sqlalchemy.orm import sessionmaker
+
+import database
+
+
+async def scratch_db() -> str:
+    """Creates the schema in a private SQLite DB and rebinds the session factory to it. Returns the temp dir."""
+    tmp_dir = tempfile.mkdtemp(prefix="urbanous_verify_")
+    engine = create_async_engine(f"sqlite+aiosqlite:///{os.path.join(tmp_dir, 'verify.db')}")
+    session_factory = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+
+    app_factory = database.AsyncSessionLocal
+    for module in list(sys.modules.values()):
+        if getattr(module, "AsyncSessionLocal", None) is app_factory:
+            module.AsyncSessionLocal = session_factory
+    database.engine = engine
+
+    async with engine.begin() as conn:
+        await conn.run_sync(database.Base.metadata.create_all)
+    print(f"Scratch DB: {tmp_dir}")
+    return tmp_dir
+
+
+class Checks:
+    def __init__(self):
+        self.ok = True
+
+    def __call__(self, label: str, cond) -> bool:
+        self.ok = self.ok and bool(cond)
+        print(f"{'OK  ' if cond else 'FAIL'} {label}")
+        return bool(cond)
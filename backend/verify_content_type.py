@@ -0,0 +1,63 @@
+"""
+Verifies the content-type verdict computed during deep scans:
+parse_pool worker output for article / category / short og:type=article pages,
+head-only reads (og:type only, never 'category'), and the verdict round-trip
+through the deep-scan cache (category verdicts outlive the negative TTL).
+
+Usage: python verify_content_type.py
+"""
+import json
+import asyncio
+from datetime import timedelta
+
+from sqlalchemy import update
+
+from database import AsyncSessionLocal
+from models import DeepScanCache
+from services import parse_pool, deep_scan_cache
+from verify_common import scratch_db, Checks
+
+PARA = "<p>Consiliul local a aprobat in sedinta de joi bugetul pentru reabilitarea strazilor din cartierul Centru.</p>"
+ARTICLE = f"""<html><head><title>Buget aprobat</title><meta property="og:type" content="article">
+<meta property="article:published_time" content="2026-10-01T10:00:00+03:00"></head>
+<body><nav><a href="/">Acasa</a><a href="/stiri">Stiri</a></nav><h1>Buget aprobat</h1>{PARA * 6}</body></html>"""
+CATEGORY = f"""<html><head><title>Stiri locale</title><meta property="og:type" content="website"></head>
+<body><h1>Stiri locale</h1>{"".join(f'<div><a href="/stiri/{i}">Titlul stirii numarul {i} din sectiunea locala</a></div>' for i in range(40))}
+<p>Toate stirile din judet, actualizate zilnic.</p></body></html>"""
+VIDEO = """<html><head><title>Video: inaugurarea podului</title><meta property="og:type" content="article"></head>
+<body><h1>Video: inaugurarea podului</h1><video src="/v.mp4"></video>
+<p>Imagini de la inaugurarea podului peste Mures, filmate de echipa noastra de reporteri.</p></body></html>"""
+
+
+async def verify():
+    await scratch_db()
+    check = Checks()
+
+    url = "https://ziar.example.ro/stiri/"
+    art = await parse_pool.parse_article(ARTICLE, url + "buget", full_page=True)
+    cat = await parse_pool.parse_article(CATEGORY, url, full_page=True)
+    vid = await parse_pool.parse_article(VIDEO, url + "video-pod", full_page=True)
+    check("article page -> article", art["content_type"] == "article")
+    check(f"category page -> category (link density {cat['content_signals']['link_density']})", cat["content_type"] == "category")
+    check("short og:type=article page is not dropped", vid["content_type"] != "category")
+    check("head-only og:type=article -> article", (await parse_pool.parse_article(ARTICLE.split("<body>")[0], url + "buget"))["content_type"] == "article")
+    check("head-only og:type=website -> unknown", (await parse_pool.parse_article(CATEGORY.split("<body>")[0], url))["content_type"] == "unknown")
+
+    await deep_scan_cache.put_many([(url + "buget", "Buget aprobat", "2026-10-01", "article"), (url, "Stiri locale", None, "category"), (url + "x", "X", None, "unknown")])
+    async with AsyncSessionLocal() as db: # age everything past the negative TTL
+        await db.execute(update(DeepScanCache).values(scanned_at=deep_scan_cache._now() - timedelta(hours=deep_scan_cache.NEGATIVE_TTL_HOURS + 1)))
+        await db.commit()
+    hits = await deep_scan_cache.get_many([url + "buget", url, url + "x"])
+    check("verdict stored with the date", hits.get(url + "buget", {}).get("content_type") == "article")
+    check("category verdict outlives negative TTL", hits.get(url, {}).get("content_type") == "category")
+    check("plain negative expires", url + "x" not in hits)
+    await deep_scan_cache.evict_expired()
+    check("eviction keeps category verdict", url in await deep_scan_cache.get_many([url]))
+
+    print(json.dumps(deep_scan_cache.get_deep_scan_stats()))
+    parse_pool.stop_parse_pool()
+    return check.ok
+
+
+if __name__ == "__main__":
+    raise SystemExit(0 if asyncio.run(verify()) else 1)
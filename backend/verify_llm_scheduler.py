@@ -0,0 +1,92 @@
+"""
+Verifies the Gemini request scheduler (services/llm_scheduler.py) without
+calling the API: slots are taken with acquire()/release() directly.
+Checks priority order under the concurrency cap, the per-key request bucket
+(when configured; unlimited by default),
+that a paused key (429 retry-after) does not hold back other keys, and the
+retry delay parsing.
+
+Usage: python verify_llm_scheduler.py
+"""
+import time
+import asyncio
+
+from services import llm_scheduler
+from services.llm_scheduler import LlmScheduler, PRIORITY_INTERACTIVE, PRIORITY_NORMAL, PRIORITY_BACKGROUND
+
+
+async def verify():
+    ok = True
+    def check(label, cond):
+        nonlocal ok
+        ok = ok and bool(cond)
+        print(f"{'OK  ' if cond else 'FAIL'} {label}")
+
+    # 1. Priority order: one slot, background queued before interactive
+    sched = LlmScheduler(max_concurrency=1)
+    order = []
+    async def call(name, priority, hold=0.01, key="key-A"):
+        await sched.acquire(key, 100, priority)
+        order.append(name)
+        await asyncio.sleep(hold)
+        sched.release(key)
+
+    first = asyncio.create_task(call("first", PRIORITY_NORMAL, hold=0.05))
+    await asyncio.sleep(0)
+    tasks = [asyncio.create_task(call(f"translate{i}", PRIORITY_BACKGROUND)) for i in range(3)]
+    await asyncio.sleep(0)
+    tasks += [asyncio.create_task(call(f"verify{i}", PRIORITY_INTERACTIVE)) for i in range(2)]
+    await asyncio.gather(first, *tasks)
+    check(f"interactive overtakes queued background: {order}", order == ["first", "verify0", "verify1", "translate0", "translate1", "translate2"])
+
+    # 2. Request bucket: 4 RPM -> the 5th call on a key waits, another key does not
+    llm_scheduler.REQUESTS_PER_MINUTE, saved_rpm = 4, llm_scheduler.REQUESTS_PER_MINUTE
+    sched = LlmScheduler(max_concurrency=10)
+    for _ in range(4):
+        await sched.acquire("key-B", 100)
+        sched.release("key-B")
+    blocked = asyncio.create_task(sched.acquire("key-B", 100))
+    await asyncio.sleep(0.05)
+    check("5th call within the minute waits for the bucket", not blocked.done())
+    await asyncio.wait_for(sched.acquire("key-C", 100), 0.5)
+    sched.release("key-C")
+    check("other key is not held back", True)
+    blocked.cancel()
+    llm_scheduler.REQUESTS_PER_MINUTE = saved_rpm
+
+    # Default (no LLM_*_PER_MINUTE set): no bucket, a digest's burst on one key never waits
+    sched = LlmScheduler(max_concurrency=10)
+    t0 = time.monotonic()
+    for _ in range(100):
+        await sched.acquire("key-F", 50000)
+        sched.release("key-F")
+    check(f"unlimited by default: 100 calls in {time.monotonic() - t0:.3f}s", time.monotonic() - t0 < 0.5)
+
+    # 3. 429 pause: the key waits for retry-after, other keys go on
+    sched = LlmScheduler(max_concurrency=10)
+    sched.pause("key-D", 0.2)
+    t0 = time.monotonic()
+    other = asyncio.create_task(sched.acquire("key-E", 100))
+    await sched.acquire("key-D", 100)
+    waited = time.monotonic() - t0
+    check(f"paused key waited {waited:.2f}s (retry-after 0.2s)", 0.18 <= waited < 0.5)
+    check("other key granted while paused", other.done())
+    sched.release("key-D")
+    sched.release("key-E")
+
+    # 4. Retry delay parsing
+    check("'Please retry in 27.5s'", llm_scheduler.retry_after(Exception("429 Quota exceeded. Please retry in 27.5s.")) == 27.5)
+    check("'retry_delay { seconds: 41 }'", llm_scheduler.retry_after(Exception("429 ... retry_delay {\n  seconds: 41\n}")) == 41)
+    check("no delay given -> backoff", llm_scheduler.retry_after(Exception("429"), attempt=1) == llm_scheduler.DEFAULT_RETRY_AFTER * 2)
+    check("429 detection", llm_scheduler.is_rate_limited(Exception("429 Resource has been exhausted")) and not llm_scheduler.is_rate_limited(ValueError("404 model not found")))
+
+    # 5. /debug/llm labels keys by a short hash: no part of the key is shown
+    labels = list(sched.snapshot()["keys"])
+    check(f"snapshot key labels {labels}", len(labels) == 2 and not any(k[-4:] in label for label in labels for k in ("key-D", "key-E")))
+
+    print(sched.snapshot())
+    return ok
+
+
+if __name__ == "__main__":
+    raise SystemExit(0 if asyncio.run(verify()) else 1)
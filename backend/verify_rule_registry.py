@@ -0,0 +1,55 @@
+"""
+Verifies the compiled ScraperRule registry against a scratch SQLite DB:
+load, domain / root-domain lookup, static registry merge, and reload after
+a /scraper/rules-style write bumps the version (as seen by another process).
+
+Usage: python verify_rule_registry.py
+"""
+import json
+import asyncio
+
+from database import AsyncSessionLocal
+from models import ScraperRule
+from services import rule_registry
+from services.rule_registry import get_rule_registry, bump_rules_version
+from verify_common import scratch_db, Checks
+
+
+async def write_rule(domain: str, config: dict):
+    async with AsyncSessionLocal() as db:
+        db.add(ScraperRule(domain=domain, config_json=json.dumps(config)))
+        await bump_rules_version(db)
+        await db.commit()
+
+
+async def verify():
+    await scratch_db()
+    check = Checks()
+
+    await write_rule("tribuna.ro", {"date_selectors": [".post-date"], "date_regex": [r"(\d{2}\.\d{2}\.\d{4})"]})
+    reg = await get_rule_registry()
+    first_version = reg.version
+    check("DB rule by domain", reg.get("https://www.tribuna.ro/stiri/x").date_selectors == [".post-date"])
+    check("DB rule by root domain", reg.get("https://sport.tribuna.ro/a") is not None)
+    check("static registry merged", reg.get("https://www.digi24.ro/stiri/x").domain == "digi24.ro")
+    check("unknown domain -> None", reg.get("https://example.com/") is None)
+    check("has_custom_rule only for DB rules", reg.has_custom_rule("https://tribuna.ro/") and not reg.has_custom_rule("https://digi24.ro/"))
+    check("regex precompiled", rule_registry.scraper_engine.compile_date_pattern.cache_info().currsize > 0)
+
+    # Another worker writes a rule: this process only sees the version bump on its next poll
+    await write_rule("ziarulunirea.ro", {"title_selectors": ["h1.entry-title"]})
+    reg._checked_at = -1e9 # pretend the poll interval elapsed
+    reg = await get_rule_registry()
+    check("reload after version bump", reg.version != first_version and reg.get("https://ziarulunirea.ro/a") is not None)
+
+    loads = reg.snapshot()["loads"]
+    reg._checked_at = -1e9
+    await get_rule_registry()
+    check("no reload without a bump", reg.snapshot()["loads"] == loads)
+
+    print(json.dumps(reg.snapshot()))
+    return check.ok
+
+
+if __name__ == "__main__":
+    raise SystemExit(0 if asyncio.run(verify()) else 1)
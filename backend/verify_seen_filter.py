@@ -0,0 +1,79 @@
+"""
+Verifies the per-outlet seen-link filter (services/seen_filter.py): measured
+false-positive rate and memory per 1M URLs vs. the documented figures,
+persistence to disk, rotation, and the cold -> warm flow in front of
+the deep-scan cache (new links skip the cache lookup, known links come from it).
+
+Usage: python verify_seen_filter.py
+"""
+import os
+import sys
+import json
+import time
+import asyncio
+
+from services import seen_filter, deep_scan_cache
+from services.seen_filter import SeenFilter, SeenFilters, bloom_size
+from verify_common import scratch_db, Checks
+
+BASE = "https://ziar.example.ro/stiri/"
+
+
+async def verify():
+    tmp_dir = await scratch_db()
+    check = Checks()
+
+    # Sizing: 1M URLs at 1%
+    m, k = bloom_size(1_000_000, 0.01)
+    print(f"1M URLs @1%: {m // 8 / 1e6:.2f} MB per generation, k={k}")
+    sample = [f"{BASE}articol-{i}" for i in range(100_000)]
+    as_set = sys.getsizeof(set(sample)) + sum(sys.getsizeof(u) for u in sample)
+    print(f"(a set of the same 100k URL strings: {as_set / 1e6:.1f} MB -> ~{as_set * 10 / 1e6:.0f} MB per 1M)")
+
+    # Measured false positives at capacity
+    sf = SeenFilter(capacity=20000, fp_rate=0.01)
+    t0 = time.perf_counter()
+    for u in sample[:20000]:
+        sf.add(u)
+    add_us = (time.perf_counter() - t0) / 20000 * 1e6
+    t0 = time.perf_counter()
+    fp = sum(1 for u in sample[20000:] if u in sf) / 80000
+    check_us = (time.perf_counter() - t0) / 80000 * 1e6
+    check(f"no false negatives, fp rate {fp:.4f} <= 0.015 ({add_us:.1f}us add, {check_us:.1f}us check)", all(u in sf for u in sample[:20000]) and fp <= 0.015)
+    check(f"memory {sf.memory_bytes()} bytes for 20k links", sf.memory_bytes() <= 25_000)
+    check("canonical URL key (query, fragment, trailing slash)", f"{BASE}articol-7/?utm_source=fb#c" in sf)
+
+    # Rotation keeps the previous generation searchable
+    small = SeenFilter(capacity=100)
+    for u in sample[:250]:
+        small.add(u)
+    check("rotation: last two generations searchable, oldest dropped", all(u in small for u in sample[150:250]) and small.previous is not None)
+
+    # Cold -> warm in front of the deep-scan cache
+    store_dir = os.path.join(tmp_dir, "seen")
+    filters = SeenFilters(store_dir)
+    seen = filters.for_outlet("https://www.ziar.example.ro/")
+    await deep_scan_cache.put_many([(f"{BASE}vechi-{i}", f"Vechi {i}", "2026-10-01", "article") for i in range(50)])
+    links = [f"{BASE}vechi-{i}" for i in range(50)] + [f"{BASE}nou-{i}" for i in range(50)]
+
+    maybe, new = seen_filter.partition(seen, links)
+    check("cold filter: everything goes through the cache", len(maybe) == 100 and not new)
+    hits = await deep_scan_cache.get_many(maybe)
+    seen_filter.record(seen, hits)
+    seen_filter.record(seen, [u for u in links if u not in hits]) # scanned this run
+    filters.save("https://ziar.example.ro/")
+    check("saved to disk", os.path.exists(os.path.join(store_dir, "ziar.example.ro.bloom")))
+
+    reloaded = SeenFilters(store_dir).for_outlet("https://ziar.example.ro/")
+    fresh = [f"{BASE}azi-{i}" for i in range(200)]
+    maybe, new = seen_filter.partition(reloaded, links + fresh)
+    check(f"reloaded warm: {len(new)}/200 new links skip the lookup, all 100 known found", reloaded.warm and set(links) <= set(maybe) and len(new) >= 195)
+    hits = await deep_scan_cache.get_many(maybe)
+    check("known links resolved from the cache", all(f"{BASE}vechi-{i}" in hits for i in range(50)))
+
+    print(json.dumps(seen_filter.get_seen_filter_stats()))
+    return check.ok
+
+
+if __name__ == "__main__":
+    raise SystemExit(0 if asyncio.run(verify()) else 1)
@@ -0,0 +1,93 @@
+"""
+Verifies the in-memory spam index against a scratch SQLite DB: startup load,
+exact / canonical URL, title and path-prefix matches, incremental updates from
+/feedback/spam-style writes, reload when another process bumps the version,
+and the per-article lookup cost vs. the old set build per run.
+
+Usage: python verify_spam_index.py
+"""
+import json
+import time
+import asyncio
+
+from database import AsyncSessionLocal
+from models import SpamFeedback
+from services import spam_index
+from services.spam_index import get_spam_index, bump_spam_version, record_spam_change
+from verify_common import scratch_db, Checks
+
+
+async def report(url: str, title: str = None, local: bool = True):
+    """Like POST /feedback/spam; local=False simulates a write from another worker."""
+    async with AsyncSessionLocal() as db:
+        db.add(SpamFeedback(url=url, domain="", title=title, reason="spam"))
+        version = await bump_spam_version(db)
+        await db.commit()
+    if local:
+        record_spam_change(version, added=[(url, title)])
+
+
+async def undo(url: str):
+    """Like DELETE /feedback/spam."""
+    async with AsyncSessionLocal() as db:
+        rows = [(r.url, r.title) for r in (await db.execute(SpamFeedback.__table__.select().where(SpamFeedback.url == url))).all()]
+        await db.execute(SpamFeedback.__table__.delete().where(SpamFeedback.url == url))
+        version = await bump_spam_version(db)
+        await db.commit()
+    record_spam_change(version, removed=rows)
+
+
+async def verify():
+    await scratch_db()
+    check = Checks()
+
+    await report("https://www.ziar.example.ro/stiri/horoscop-zilnic/?utm_source=fb", "Horoscop  zilnic: ce spun astrele", local=False)
+    await report("https://ziar.example.ro/anunturi/*")
+    index = await get_spam_index() # startup load
+    check("startup load", len(index) == 2 and index.version == 2)
+
+    check("exact url", index.match("https://www.ziar.example.ro/stiri/horoscop-zilnic/?utm_source=fb") == "url")
+    check("canonical url (scheme, www, query, slash)", index.match("http://ziar.example.ro/stiri/horoscop-zilnic") == "canonical_url")
+    check("title (case, spacing)", index.match("https://alt.example.ro/x", " HOROSCOP zilnic: ce spun   astrele") == "title")
+    check("path prefix", index.match("https://www.ziar.example.ro/anunturi/2026/vand-apartament") == "path_prefix")
+    check("prefix is segment-aligned", index.match("https://ziar.example.ro/anunturile-zilei") is None)
+    check("clean article", index.match("https://ziar.example.ro/stiri/buget-aprobat", "Buget aprobat") is None)
+
+    loads = index.snapshot()["loads"]
+    await report("https://ziar.example.ro/stiri/concurs", "Concurs cu premii")
+    check("local report applied without reload", index.match("https://ziar.example.ro/stiri/concurs") == "url" and index.snapshot()["loads"] == loads)
+    await report("https://ziar.example.ro/stiri/concurs", "Concurs cu premii") # reported twice
+    await undo("https://ziar.example.ro/stiri/concurs")
+    check("undo removes every report of the url", index.match("https://ziar.example.ro/stiri/concurs", "Concurs cu premii") is None)
+
+    await report("https://ziar.example.ro/stiri/pariuri", local=False) # another worker
+    check("not seen before the next poll", (await get_spam_index()).match("https://ziar.example.ro/stiri/pariuri") is None)
+    index._checked_at = 0.0 # poll interval elapsed
+    check("reloaded after version bump", (await get_spam_index()).match("https://ziar.example.ro/stiri/pariuri") == "url")
+
+    # Per-article cost: one match() vs. the old per-run select + set build (lookups were free)
+    async with AsyncSessionLocal() as db:
+        db.add_all([SpamFeedback(url=f"https://ziar.example.ro/stiri/spam-{i}", domain="ziar.example.ro", title=f"Spam {i}", reason="spam") for i in range(5000)])
+        await bump_spam_version(db)
+        await db.commit()
+    index._checked_at = 0.0
+    index = await get_spam_index()
+    t0 = time.perf_counter()
+    async with AsyncSessionLocal() as db:
+        records = (await db.execute(SpamFeedback.__table__.select())).all()
+    spam_urls = {r.url for r in records if r.url}
+    spam_titles_lower = {r.title.lower() for r in records if r.title}
+    per_run = time.perf_counter() - t0
+    urls = [f"https://ziar.example.ro/stiri/articol-{i}/" for i in range(20000)]
+    t0 = time.perf_counter()
+    for u in urls:
+        index.match(u, "Un titlu de articol oarecare")
+    per_article = (time.perf_counter() - t0) / len(urls)
+    print(f"{len(index)} reports: old select+sets {per_run * 1000:.1f}ms per run | match() {per_article * 1e6:.2f}us per article")
+
+    print(json.dumps(spam_index.get_spam_index_stats()))
+    return check.ok
+
+
+if __name__ == "__main__":
+    raise SystemExit(0 if asyncio.run(verify()) else 1)
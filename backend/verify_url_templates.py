@@ -0,0 +1,60 @@
+"""
+Verifies URL template learning (services/url_templates.py) against a scratch
+SQLite DB seeded with one outlet's deep-scan history: category shapes are
+rejected, a YYYYMMDD path token and monotonic article IDs imply dates, and
+unknown or mixed shapes fall through to the normal pipeline.
+
+Usage: python verify_url_templates.py
+"""
+import json
+import asyncio
+from datetime import date, timedelta
+
+from services import deep_scan_cache, url_templates
+from verify_common import scratch_db, Checks
+
+SITE = "https://www.ziar.example.ro"
+
+
+async def verify():
+    await scratch_db()
+    check = Checks()
+
+    today = date.today()
+    rows = []
+    # /stiri/<id>-<slug>.html: IDs grow with the date, newest from today
+    for i in range(30):
+        d = today - timedelta(days=(29 - i) // 3)
+        rows.append((f"{SITE}/stiri/{480000 + i * 10}-consiliul-local-a-aprobat-proiectul-{chr(97 + i % 26)}{chr(97 + i // 26)}.html", f"Stire {i}", d.isoformat(), "article"))
+    # /articol/<YYYYMMDD>/<slug>
+    for i in range(8):
+        d = today - timedelta(days=i)
+        rows.append((f"{SITE}/articol/{d.strftime('%Y%m%d')}/primaria-anunta-lucrari-pe-strada-{'abcdefgh'[i]}", f"Articol {i}", d.isoformat(), "article"))
+    # /tag/<word>: category pages
+    for word in ("buget", "primarie", "politie", "scoala", "spital", "drumuri"):
+        rows.append((f"{SITE}/tag/{word}", word, None, "category"))
+    await deep_scan_cache.put_many(rows)
+
+    templates = await url_templates.get_outlet_templates(SITE + "/")
+    print(json.dumps(templates.snapshot(), indent=1))
+    t = today.toordinal()
+
+    check("category shape rejected", templates.lookup(f"{SITE}/tag/alegeri", t)[0] == "category")
+    kind, day, how = templates.lookup(f"{SITE}/articol/{(today - timedelta(days=20)).strftime('%Y%m%d')}/un-titlu-nou-de-articol", t)
+    check(f"YYYYMMDD token -> {day} ({how})", kind == "article" and how == "path" and day == (today - timedelta(days=20)).isoformat())
+    kind, day, how = templates.lookup(f"{SITE}/stiri/480295-alt-articol-de-astazi.html", t)
+    check(f"ID above the newest (today's) -> {day} ({how})", how == "id" and day == today.isoformat())
+    kind, day, how = templates.lookup(f"{SITE}/stiri/480005-intre-doua-articole-din-aceeasi-zi.html", t)
+    check(f"ID between two same-day IDs -> {day} ({how})", how == "id" and day == (today - timedelta(days=9)).isoformat())
+    kind, day, how = templates.lookup(f"{SITE}/stiri/480025-intre-zile-diferite-de-publicare.html", t)
+    check(f"ID between different days -> no date ({kind})", kind == "article" and day is None)
+    check("unknown shape falls through", templates.lookup(f"{SITE}/video/ceva-nou-si-diferit", t) == (None, None, None))
+
+    url_templates.invalidate(SITE)
+    await url_templates.get_outlet_templates(SITE)
+    print(json.dumps(url_templates.get_url_template_stats()))
+    return check.ok
+
+
+if __name__ == "__main__":
+    raise SystemExit(0 if asyncio.run(verify()) else 1)
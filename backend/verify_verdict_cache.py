@@ -0,0 +1,71 @@
+"""
+Verifies the persistent LLM verdict cache (services/llm_verdict_cache.py)
+against a scratch SQLite DB: warm-up from a saved Politics digest, hits across
+model versions of one family and across title spacing/case, misses for another
+language, a changed definition or another model family, and storing a model
+batch result.
+
+Usage: python verify_verdict_cache.py
+"""
+import json
+import asyncio
+
+from database import AsyncSessionLocal
+from models import User, NewsDigest
+from services import llm_verdict_cache
+from verify_common import scratch_db, Checks
+
+DEFINITION = "Politics: actions of elected officials, parties, public budgets."
+FLASH = "gemini-2.0-flash"
+LITE = "gemini-2.0-flash-lite-preview-02-05"
+
+
+async def verify():
+    await scratch_db()
+    check = Checks()
+
+    articles = [
+        {"title": "Consiliul local a aprobat bugetul", "ai_verdict": "VERIFIED", "translated_title": "Local council approved the budget"},
+        {"title": "Meteo: ninsori la munte", "ai_verdict": "REJECTED", "translated_title": "Weather: snow in the mountains"},
+        {"title": "Titlu fara verdict", "ai_verdict": "UNKNOWN"},
+    ]
+    async with AsyncSessionLocal() as db:
+        user = User(email="cache@example.com", hashed_password="x", preferred_language="English")
+        db.add(user)
+        await db.flush()
+        db.add(NewsDigest(user_id=user.id, title="d", category="Politics", summary_markdown="", articles_json=json.dumps(articles)))
+        db.add(NewsDigest(user_id=user.id, title="d", category="Sports", summary_markdown="", articles_json=json.dumps([{"title": "Meci", "ai_verdict": "REJECTED"}])))
+        await db.commit()
+
+    added = await llm_verdict_cache.warm_up_from_digests(DEFINITION)
+    check(f"warm-up added {added} entries (expected 2)", added == 2)
+    check("warm-up is idempotent", await llm_verdict_cache.warm_up_from_digests(DEFINITION) == 0)
+
+    hits = await llm_verdict_cache.get_many(["Consiliul  local a aprobat BUGETUL", "Meteo: ninsori la munte", "Titlu nou"], DEFINITION, "English", FLASH)
+    check(f"2 of 3 titles cached, spacing/case folded: {sorted(hits)}", len(hits) == 2)
+    check("verdict + translation restored", hits.get("Meteo: ninsori la munte") == {"verdict": False, "translated": "Weather: snow in the mountains"})
+    check("other language misses", not await llm_verdict_cache.get_many(["Meteo: ninsori la munte"], DEFINITION, "German", FLASH))
+    check("changed definition misses", not await llm_verdict_cache.get_many(["Meteo: ninsori la munte"], DEFINITION + " Also sports.", "English", FLASH))
+
+    titles_map = {0: "Primarul a demisionat", 1: "Concert in parc", 2: "Raspuns invalid", 3: "Element lipsa din raspuns"}
+    result = {"0": {"verdict": True, "translated": "The mayor resigned"}, "1": {"verdict": False, "translated": None}, "2": {"verdict": "maybe"},
+              "3": {"verdict": False, "translated": None, "defaulted": True}, "4": {"verdict": True, "translated": None}}
+    stored = await llm_verdict_cache.store_results(titles_map, result, DEFINITION, "English", LITE)
+    check(f"stored {stored} model verdicts (non-boolean, defaulted and other batches' ids skipped)", stored == 2)
+    hits = await llm_verdict_cache.get_many(titles_map.values(), DEFINITION, "English", LITE)
+    check("flash-lite entries found by a flash-lite lookup", hits.get("Primarul a demisionat", {}).get("verdict") is True
+          and "Raspuns invalid" not in hits and "Element lipsa din raspuns" not in hits)
+
+    check("other families miss: flash and pro lookups see no flash-lite verdict",
+          not await llm_verdict_cache.get_many(titles_map.values(), DEFINITION, "English", FLASH)
+          and not await llm_verdict_cache.get_many(titles_map.values(), DEFINITION, "English", "gemini-pro-latest"))
+    check("warm-up verdicts answer the flash family only", not await llm_verdict_cache.get_many(["Meteo: ninsori la munte"], DEFINITION, "English", "gemini-pro-latest"))
+
+    check("model families", [llm_verdict_cache.model_family(m) for m in ("gemini-2.0-flash", "gemini-flash-latest", "gemini-pro-latest", "gemini-1.5-flash-latest")]
+          == ["gemini-flash", "gemini-flash", "gemini-pro", "gemini-flash"])
+    print(json.dumps(llm_verdict_cache.get_llm_cache_stats()))
+    return check.ok
+
+
+if __name__ == "__main__":
+    raise SystemExit(0 if asyncio.run(verify()) else 1)